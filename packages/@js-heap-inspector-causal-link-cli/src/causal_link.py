@@ -1,50 +1,239 @@
 import argparse
+import importlib
 import json
+import os
 import sys
 
-from runtime_analyzer.application.reporter.code_link.code_link_reporter import CodeLinkReporter
-from runtime_analyzer.application.reporter.matching.matching_reporter import MatchingReporter
+from runtime_analyzer.application.helpers.instrumentation import Instrumentation, Profiler, print_progress, \
+    current_instrumentation, use_instrumentation
+from runtime_analyzer.application.helpers.result_writer import COLUMNAR_FORMATS, COMPRESSIONS, open_output, \
+    write_json, write_ndjson, with_compression_extension
 from runtime_analyzer.application.services.runtime_causal_link.runtime_causal_link import RuntimeCausalLinkService
 from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
-from runtime_analyzer.application.services.matching.heuristic_matching_algorithm import HeuristicMatchingAlgorithm
-from runtime_analyzer.application.services.subgraph_creation.community_creation_subgraph_algorithm import \
-    CommunityDetectionSubgraphAlgorithm
-from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
-    GreedyKHopSubgraphAlgorithm
-from runtime_analyzer.application.services.subgraph_creation.primitive_subgraph_algorithm import \
-    PrimitiveSubgraphAlgorithm
-from runtime_analyzer.application.services.code_link.deterministic_code_link_algorithm import DeterministicLinkage
 from runtime_analyzer.domain.exceptions import ParsingError, InvalidRuntimeError, UnsupportedAlgorithmError
-from runtime_analyzer.domain.models import CodeEvolution
+from runtime_analyzer.domain.models import BatchComparison, CodeEvolution
+
+# Components are referenced as "module:Class" and only imported once a strategy is selected,
+# so a run never pays for the imports of the strategies it does not use
+_SERVICES = "runtime_analyzer.application.services"
+_HEURISTIC_MATCHING = f"{_SERVICES}.matching.heuristic_matching_algorithm:HeuristicMatchingAlgorithm"
+_DETERMINISTIC_LINKAGE = f"{_SERVICES}.code_link.deterministic_code_link_algorithm:DeterministicLinkage"
 
 STRATEGY_MAP = {
     "heuristic-greedy": {
-        "matching": HeuristicMatchingAlgorithm,
-        "subgraph": GreedyKHopSubgraphAlgorithm,
-        "code_link": DeterministicLinkage
+        "matching": _HEURISTIC_MATCHING,
+        "subgraph": f"{_SERVICES}.subgraph_creation.greedy_k_hop_subgraph_algorithm:GreedyKHopSubgraphAlgorithm",
+        "code_link": _DETERMINISTIC_LINKAGE
     },
     "community-detection": {
-        "matching": HeuristicMatchingAlgorithm,
-        "subgraph": CommunityDetectionSubgraphAlgorithm,
-        "code_link": DeterministicLinkage
+        "matching": _HEURISTIC_MATCHING,
+        "subgraph": f"{_SERVICES}.subgraph_creation.community_creation_subgraph_algorithm:"
+                    f"CommunityDetectionSubgraphAlgorithm",
+        "code_link": _DETERMINISTIC_LINKAGE
     },
     "primitive": {
-        "matching": HeuristicMatchingAlgorithm,
-        "subgraph": PrimitiveSubgraphAlgorithm,
-        "code_link": DeterministicLinkage
+        "matching": _HEURISTIC_MATCHING,
+        "subgraph": f"{_SERVICES}.subgraph_creation.primitive_subgraph_algorithm:PrimitiveSubgraphAlgorithm",
+        "code_link": _DETERMINISTIC_LINKAGE
+    },
+    "dominator-tree": {
+        "matching": _HEURISTIC_MATCHING,
+        "subgraph": f"{_SERVICES}.subgraph_creation.dominator_tree_subgraph_algorithm:DominatorTreeSubgraphAlgorithm",
+        "code_link": _DETERMINISTIC_LINKAGE
     }
 }
 
+
+def load_component(reference: str):
+    """Imports the class of a "module:Class" reference."""
+    module_name, _, class_name = reference.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_strategy(strategy_name: str) -> dict:
+    """Imports the components of a strategy of STRATEGY_MAP."""
+    strategy = STRATEGY_MAP.get(strategy_name)
+    if not strategy:
+        raise UnsupportedAlgorithmError(f"Strategy '{strategy_name}' is not supported.")
+    return {stage: load_component(reference) for stage, reference in strategy.items()}
+
+
+def load_code_evolutions(path: str) -> tuple[list[CodeEvolution], list[CodeEvolution]]:
+    """Loads a code evolution file and splits it into the evolutions of the baseline and the modified code."""
+    with open(path, 'r') as f:
+        code_evolutions_raw = f.read()
+    code_evolutions = json.loads(code_evolutions_raw)
+    code_evolutions_baseline = []
+    code_evolutions_modified = []
+
+    for code_evolution in code_evolutions:
+        parsed_code_evolution = CodeEvolution.model_validate(code_evolution)
+
+        if parsed_code_evolution.modificationSource == "base":
+            code_evolutions_baseline.append(parsed_code_evolution)
+        if parsed_code_evolution.modificationSource == "modified":
+            code_evolutions_modified.append(parsed_code_evolution)
+
+    return code_evolutions_baseline, code_evolutions_modified
+
+
+def write_results(output, output_reporter, baseline_runtime, modified_runtime, matching_result, code_links,
+                  time_tracking, rank_by_retained_size, output_format="json", pretty=False, compression=None,
+                  report_chunk_rows=1000, output_columnar=None, columnar_format="parquet"):
+    """Saves the comparison result (or prints it without output path), the columnar tables and the reports."""
+    instrumentation = current_instrumentation()
+
+    # Output result, streamed one subgraph result or causal pair at a time
+    with instrumentation.stage("write.result"), open_output(output, compression) as f:
+        if output_format == "ndjson":
+            write_ndjson(f, time_tracking, matching_result, code_links)
+        else:
+            write_json(f, time_tracking, matching_result, code_links, indent=2 if pretty else None)
+            if not output:
+                f.write("\n")
+    if output:
+        print(f"Results saved to {output}")
+
+    if output_columnar:
+        from runtime_analyzer.application.helpers.columnar_export import write_columnar
+
+        with instrumentation.stage("write.columnar"):
+            paths = write_columnar(output_columnar, baseline_runtime, modified_runtime, matching_result, code_links,
+                                   columnar_format)
+        print(f"Saved {len(paths)} {columnar_format} tables to {output_columnar}")
+
+    if output_reporter:
+        from runtime_analyzer.application.reporter.code_link.code_link_reporter import CodeLinkReporter
+        from runtime_analyzer.application.reporter.matching.matching_reporter import MatchingReporter
+        from runtime_analyzer.application.reporter.report_sidecars import ReportSidecars
+
+        # Reports are streamed to their files, detail rows to chunked sidecar files next to them
+        def sidecars(path):
+            return ReportSidecars(path, report_chunk_rows) if report_chunk_rows else None
+
+        matching_report_path = f'{output_reporter}-matching_report.html'
+        with instrumentation.stage("report.matching"), open(matching_report_path, 'w') as f:
+            MatchingReporter(baseline_runtime, modified_runtime).write(f, matching_result,
+                                                                       sidecars(matching_report_path))
+        print(f"Reporter saved to {matching_report_path}")
+
+        code_link_report_path = f'{output_reporter}-code_link_report.html'
+        with instrumentation.stage("report.code_link"), open(code_link_report_path, 'w') as f:
+            CodeLinkReporter(baseline_runtime, modified_runtime, rank_by_retained_size=rank_by_retained_size).write(
+                f, code_links, sidecars(code_link_report_path))
+        print(f"Reporter saved to {code_link_report_path}")
+
+
+def run_batch(manifest_path: str, batch_service, rank_by_retained_size: bool,
+              output_options: dict):
+    """
+    Runs the comparisons of a batch manifest and writes one result (and optionally the reports) per comparison.
+
+    The manifest holds a list of comparisons (or an object with the list as "comparisons"), each with
+    "baseline", "modified" and optionally "name", "codeEvolution", "output", "outputReporter" and
+    "outputColumnar" like the command line arguments. Relative paths are resolved against the manifest
+    directory. Results are saved to "output", by default `<name>.json` (`<name>.ndjson` for NDJSON, with
+    `.gz` or `.zst` appended when compressed) next to the manifest. A manifest whose outputs would overwrite one of its inputs is rejected.
+    """
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    entries = manifest["comparisons"] if isinstance(manifest, dict) else manifest
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    def resolve(path):
+        return os.path.join(manifest_dir, path) if path else None
+
+    comparisons, outputs = [], {}
+    for position, entry in enumerate(entries):
+        name = entry.get("name") or f"comparison-{position + 1}"
+        if name in outputs:
+            raise ValueError(f"Duplicate comparison name '{name}' in manifest.")
+
+        code_evolutions = load_code_evolutions(resolve(entry["codeEvolution"])) \
+            if entry.get("codeEvolution") else ([], [])
+        comparisons.append(BatchComparison(name=name, baseline=resolve(entry["baseline"]),
+                                           modified=resolve(entry["modified"]),
+                                           code_evolution_baseline=code_evolutions[0],
+                                           code_evolution_modified=code_evolutions[1]))
+        default_output = with_compression_extension(
+            os.path.join(manifest_dir, f"{name}.{output_options['output_format']}"), output_options["compression"])
+        outputs[name] = (resolve(entry.get("output")) or default_output,
+                         resolve(entry.get("outputReporter")), resolve(entry.get("outputColumnar")))
+
+    # Results are written while later comparisons still load their runtimes, e.g. the default
+    # output "m1.json" of a comparison named "m1" must not replace the runtime "m1.json"
+    inputs = {os.path.realpath(path) for comparison in comparisons
+              for path in (comparison.baseline, comparison.modified)}
+    inputs.update(os.path.realpath(resolve(entry["codeEvolution"])) for entry in entries if entry.get("codeEvolution"))
+    written = set()
+    for name, (output, _, _) in outputs.items():
+        path = os.path.realpath(output)
+        if path in inputs or path in written:
+            raise ValueError(f"Output '{output}' of comparison '{name}' would overwrite an input or another output.")
+        written.add(path)
+
+    def handle_result(comparison, baseline_runtime, modified_runtime, matching_result, code_links, time_tracking):
+        output, output_reporter, output_columnar = outputs[comparison.name]
+        write_results(output, output_reporter, baseline_runtime, modified_runtime, matching_result, code_links,
+                      time_tracking, rank_by_retained_size, output_columnar=output_columnar, **output_options)
+        return output
+
+    saved = batch_service.run(comparisons, handle_result)
+    print(f"Saved results of {len(saved)} comparisons")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Compare two V8 heap snapshots in common runtime format.")
-    parser.add_argument("--baseline", required=True, help="Path to the baseline runtime JSON file.")
-    parser.add_argument("--modified", required=True, help="Path to the modified runtime JSON file.")
+    parser.add_argument("--baseline", help="Path to the baseline runtime JSON file.")
+    parser.add_argument("--modified", help="Path to the modified runtime JSON file.")
+    parser.add_argument("--manifest",
+                        help="Path to a batch manifest (JSON) listing comparisons to run instead of a single pair. "
+                             "Every distinct runtime is parsed and decomposed into subgraphs once.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of comparisons of a batch running at once in worker processes (default: 1).")
     parser.add_argument("--settings", help="Path to the settings JSON file.")
     parser.add_argument("--codeEvolution", help="Path to the code evolution JSON file.")
     parser.add_argument("--output", help="Path to save the comparison result (JSON).")
     parser.add_argument("--outputReporter", help="Path to save the reporter output (HTML).")
+    parser.add_argument("--outputFormat", choices=["json", "ndjson"], default="json",
+                        help="Format of the comparison result: one JSON document (default) or newline delimited "
+                             "JSON with one subgraph result or causal pair per line.")
+    parser.add_argument("--pretty", action="store_true",
+                        help="Indent the JSON result. By default it is written compact.")
+    parser.add_argument("--outputCompression", choices=list(COMPRESSIONS),
+                        help="Compress the result file. Inferred from a .gz or .zst extension if not given "
+                             "(zstd requires the zstandard package).")
+    parser.add_argument("--outputColumnar",
+                        help="Directory to save one table per result category with the energy counters of every "
+                             "node (requires the pyarrow package).")
+    parser.add_argument("--columnarFormat", choices=list(COLUMNAR_FORMATS), default="parquet",
+                        help="File format of the columnar tables: Parquet or Arrow IPC.")
+    parser.add_argument("--reportChunkRows", type=int, default=1000,
+                        help="Rows per sidecar file of the report detail tables. 0 omits the detail tables.")
+    parser.add_argument("--streamingParser", action="store_true",
+                        help="Parse the runtime files incrementally instead of loading them at once.")
+    parser.add_argument("--reportParserMemory", action="store_true",
+                        help="Report the peak memory used while parsing each runtime file.")
+    parser.add_argument("--cacheDir", help="Directory of the persistent cache of parsed runtimes.")
+    parser.add_argument("--cacheMaxSize", type=int, default=4096,
+                        help="Upper bound of the runtime cache size in MiB (default: 4096).")
+    parser.add_argument("--rankByRetainedSize", action="store_true",
+                        help="Rank the causal links of the code link report by retained size.")
+    parser.add_argument("--concurrentStages", action="store_true",
+                        help="Parse both runtimes and generate their subgraphs in parallel, one worker process "
+                             "per runtime.")
+    parser.add_argument("--trace", help="Path to save a profile of all stages and counters (Chrome trace JSON).")
+    parser.add_argument("--traceMemory", action="store_true",
+                        help="Record traced Python allocations per stage in the profile (slows down the run).")
+    parser.add_argument("--progress", action="store_true",
+                        help="Report the progress of long running loops, at most once per second each.")
+    parser.add_argument("--checkpointDir",
+                        help="Directory persisting the output of every stage. Reruns skip stages whose inputs and "
+                             "parameters did not change.")
 
     args = parser.parse_args()
+    if not args.manifest and not (args.baseline and args.modified):
+        parser.error("--baseline and --modified are required unless --manifest is given")
 
     settings = {}
     if args.settings:
@@ -55,82 +244,116 @@ def main():
     strategy_params = settings.get("parameters", {})
 
     parser_service = RuntimeParserService()
+    cache_service = None
+    if args.cacheDir:
+        from runtime_analyzer.application.services.runtime_cache.runtime_cache import RuntimeCacheService
+
+        cache_service = RuntimeCacheService(args.cacheDir, args.cacheMaxSize * 1024 * 1024, parser_service)
+
+    def load_runtime(path: str, track_memory: bool = args.reportParserMemory):
+        parser_service.last_peak_memory = None
+        if cache_service:
+            return cache_service.load(path, streaming=args.streamingParser, track_memory=track_memory)
+        return parser_service.parse_file(path, streaming=args.streamingParser, track_memory=track_memory)
+
+    output_options = {"output_format": args.outputFormat, "pretty": args.pretty,
+                      "compression": args.outputCompression, "report_chunk_rows": args.reportChunkRows,
+                      "columnar_format": args.columnarFormat}
+
+    profiling = args.trace or args.traceMemory or args.progress
+    instrumentation = Profiler(print_progress if args.progress else None,
+                               trace_memory=args.traceMemory) if profiling else Instrumentation()
 
     try:
-        # Load baseline
-        with open(args.baseline, 'r') as f:
-            baseline_raw = f.read()
-        baseline_runtime = parser_service.parse(baseline_raw)
-        if not baseline_runtime.nodes:
-            raise InvalidRuntimeError("Baseline runtime has no nodes.")
-
-        # Load modified
-        with open(args.modified, 'r') as f:
-            modified_raw = f.read()
-        modified_runtime = parser_service.parse(modified_raw)
-        if not modified_runtime.nodes:
-            raise InvalidRuntimeError("Modified runtime has no nodes.")
-
-        # Get strategy components
-        strategy = STRATEGY_MAP.get(strategy_name)
-        if not strategy:
-            raise UnsupportedAlgorithmError(f"Strategy '{strategy_name}' is not supported.")
-
-        with open(args.codeEvolution, 'r') as f:
-            code_evolutions_raw = f.read()
-        code_evolutions = json.loads(code_evolutions_raw)
-        code_evolutions_baseline = []
-        code_evolutions_modified = []
-
-        for code_evolution in code_evolutions:
-            parsed_code_evolution = CodeEvolution.model_validate(code_evolution)
-
-            if parsed_code_evolution.modificationSource == "base":
-                code_evolutions_baseline.append(parsed_code_evolution)
-            if parsed_code_evolution.modificationSource == "modified":
-                code_evolutions_modified.append(parsed_code_evolution)
-
-        # Initialize service
-        service = RuntimeCausalLinkService(
-            differentiation_algorithm=strategy["matching"],
-            subgraph_algorithm=strategy["subgraph"],
-            code_link_algorithm=strategy["code_link"],
-            differentiation_params=strategy_params.get("matching"),
-            subgraph_params=strategy_params.get("subgraph"),
-            code_link_params=strategy_params.get("code_link")
-        )
-
-        matching_result, code_links, time_tracking = service.compare(
-            baseline=baseline_runtime,
-            code_evolution_baseline=code_evolutions_baseline,
-            modified=modified_runtime,
-            code_evolution_modified=code_evolutions_modified
-        )
-
-        result = {
-            "time_tracking": time_tracking,
-            "matching": matching_result.model_dump(),
-            "causal_links": code_links.model_dump()
-        }
-
-        # Output result
-        if args.output:
-            with open(args.output, 'w') as f:
-                json.dump(result, f, indent=2)
-            print(f"Results saved to {args.output}")
-        else:
-            print(json.dumps(result, indent=2))
-            
-        if args.outputReporter:
-            matching_report_html = MatchingReporter(baseline_runtime, modified_runtime).report(matching_result)
-            with open(f'{args.outputReporter}-matching_report.html', 'w') as f:
-                f.write(matching_report_html)
-            print(f"Reporter saved to {args.outputReporter}-matching_report.html")
-
-            code_link_report_html = CodeLinkReporter(baseline_runtime, modified_runtime).report(code_links)
-            with open(f'{args.outputReporter}-code_link_report.html', 'w') as f:
-                f.write(code_link_report_html)
-            print(f"Reporter saved to {args.outputReporter}-code_link_report.html")
+        with use_instrumentation(instrumentation):
+            # Get strategy components
+            strategy = load_strategy(strategy_name)
+
+            # Initialize service
+            service = RuntimeCausalLinkService(
+                differentiation_algorithm=strategy["matching"],
+                subgraph_algorithm=strategy["subgraph"],
+                code_link_algorithm=strategy["code_link"],
+                differentiation_params=strategy_params.get("matching"),
+                subgraph_params=strategy_params.get("subgraph"),
+                code_link_params=strategy_params.get("code_link"),
+                concurrent_stages=args.concurrentStages,
+                checkpoint_dir=args.checkpointDir
+            )
+
+            if args.manifest:
+                from runtime_analyzer.application.services.runtime_causal_link.batch_comparison import \
+                    BatchComparisonService
+
+                def load_batch_runtime(path: str):
+                    runtime = load_runtime(path)
+                    if runtime.to_columnar().node_count == 0:
+                        raise InvalidRuntimeError(f"Runtime {path} has no nodes.")
+                    return runtime
+
+                run_batch(args.manifest, BatchComparisonService(service, load_batch_runtime, args.workers),
+                          args.rankByRetainedSize, output_options)
+            else:
+                def load_reported_runtime(path: str, label: str):
+                    runtime = load_runtime(path)
+                    if parser_service.last_peak_memory is not None:
+                        print(f"Parsed {label} with peak memory {parser_service.last_peak_memory / (1024 * 1024):.2f} MiB")
+                    return runtime
+
+                # Workers parse each runtime once and generate its subgraphs, the runtimes are built here from
+                # the columns they hand back. With checkpoints, the service only generates the subgraphs that
+                # were not stored.
+                subgraphs = None
+                if args.concurrentStages and not args.checkpointDir:
+                    from runtime_analyzer.application.services.runtime_causal_link.concurrent_stages import \
+                        ConcurrentRuntimeStages
+
+                    labels = {args.modified: "modified", args.baseline: "baseline"}
+                    stages = ConcurrentRuntimeStages(service.subgraph_algorithm,
+                                                     lambda path: load_reported_runtime(path, labels[path]))
+                    with instrumentation.stage("load.concurrent"), \
+                            stages.submit([args.baseline, args.modified]) as pending:
+                        subgraphs = pending.collect() if pending else None
+
+                if subgraphs:
+                    baseline_runtime, modified_runtime = (partition.runtime for partition in subgraphs)
+                    if baseline_runtime.to_columnar().node_count == 0:
+                        raise InvalidRuntimeError("Baseline runtime has no nodes.")
+                    if modified_runtime.to_columnar().node_count == 0:
+                        raise InvalidRuntimeError("Modified runtime has no nodes.")
+                else:
+                    subgraphs = [None, None]
+
+                    # Load baseline
+                    with instrumentation.stage("load.baseline"):
+                        baseline_runtime = load_reported_runtime(args.baseline, "baseline")
+                    if baseline_runtime.to_columnar().node_count == 0:
+                        raise InvalidRuntimeError("Baseline runtime has no nodes.")
+
+                    # Load modified
+                    with instrumentation.stage("load.modified"):
+                        modified_runtime = load_reported_runtime(args.modified, "modified")
+                    if modified_runtime.to_columnar().node_count == 0:
+                        raise InvalidRuntimeError("Modified runtime has no nodes.")
+
+                code_evolutions_baseline, code_evolutions_modified = load_code_evolutions(args.codeEvolution)
+
+                matching_result, code_links, time_tracking = service.compare(
+                    baseline=baseline_runtime,
+                    code_evolution_baseline=code_evolutions_baseline,
+                    modified=modified_runtime,
+                    code_evolution_modified=code_evolutions_modified,
+                    subgraphs_baseline=subgraphs[0],
+                    subgraphs_modified=subgraphs[1]
+                )
+
+                write_results(args.output, args.outputReporter, baseline_runtime, modified_runtime, matching_result,
+                              code_links, time_tracking, args.rankByRetainedSize,
+                              output_columnar=args.outputColumnar, **output_options)
+
+        if args.trace:
+            instrumentation.write_trace(args.trace)
+            print(f"Trace saved to {args.trace}")
 
     except FileNotFoundError as e:
         print(f"Error: File not found: {e.filename}", file=sys.stderr)
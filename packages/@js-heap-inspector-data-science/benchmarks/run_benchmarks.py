@@ -0,0 +1,244 @@
+"""
+Times and memory-profiles every stage of the comparison pipeline per strategy on synthetic
+runtimes, and flags regressions against stored baselines.
+
+    python benchmarks/run_benchmarks.py                      # compare with baselines.json
+    python benchmarks/run_benchmarks.py --updateBaselines    # record new baselines
+    python benchmarks/run_benchmarks.py --sizes 1000000 --strategies primitive
+
+Every case (strategy and node count) runs in its own process, so the peak RSS of a stage is
+not inflated by earlier cases. Strategies and their parameters are the modes of the CLI.
+The exit code is 1 if a stage regressed.
+
+Durations are only compared on the machine the baselines were recorded on (same Python,
+platform and CPU count); elsewhere only the peak RSS is, unless `--ignoreMachine` is passed.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARKS_DIR, "..", "src")
+CLI_DIR = os.path.join(BENCHMARKS_DIR, "..", "..", "@js-heap-inspector-causal-link-cli")
+
+STRATEGIES = ("heuristic-greedy", "primitive", "dominator-tree", "community-detection")
+DEFAULT_SIZES = (10000, 50000)
+
+# Differences below these are noise, whatever the tolerance
+MIN_SECONDS_DIFFERENCE = 0.05
+MIN_MEMORY_DIFFERENCE_MIB = 32
+
+
+def run_case(strategy_name: str, node_count: int, seed: int, data_dir: str, trace_memory: bool) -> Dict[str, Any]:
+    """Runs the pipeline once in this process and returns the totals of every stage."""
+    sys.path[:0] = [SRC_DIR, os.path.join(CLI_DIR, "src")]
+    from causal_link import load_code_evolutions, load_strategy
+    from runtime_analyzer.application.helpers.instrumentation import Profiler, use_instrumentation
+    from runtime_analyzer.application.helpers.result_writer import write_json
+    from runtime_analyzer.application.reporter.code_link.code_link_reporter import CodeLinkReporter
+    from runtime_analyzer.application.reporter.matching.matching_reporter import MatchingReporter
+    from runtime_analyzer.application.services.runtime_causal_link.runtime_causal_link import \
+        RuntimeCausalLinkService
+    from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
+    from synthetic_runtime import generate_runtime_pair
+
+    paths = generate_runtime_pair(data_dir, node_count, seed)
+    with open(os.path.join(CLI_DIR, "modes", f"{strategy_name}.json"), 'r') as f:
+        parameters = json.load(f).get("parameters", {})
+    strategy = load_strategy(strategy_name)
+
+    profiler = Profiler(trace_memory=trace_memory)
+    parser = RuntimeParserService()
+    with use_instrumentation(profiler):
+        with profiler.stage("load.baseline"):
+            baseline = parser.parse_file(paths["baseline"])
+        with profiler.stage("load.modified"):
+            modified = parser.parse_file(paths["modified"])
+        code_evolution_baseline, code_evolution_modified = load_code_evolutions(paths["code_evolution"])
+
+        service = RuntimeCausalLinkService(strategy["matching"], strategy["subgraph"], strategy["code_link"],
+                                           differentiation_params=parameters.get("matching"),
+                                           subgraph_params=parameters.get("subgraph"),
+                                           code_link_params=parameters.get("code_link"))
+        matching_result, code_links, time_tracking = service.compare(baseline, code_evolution_baseline, modified,
+                                                                     code_evolution_modified)
+
+        with profiler.stage("write.result"), open(os.devnull, 'w') as f:
+            write_json(f, time_tracking, matching_result, code_links)
+        with profiler.stage("report.matching"), open(os.devnull, 'w') as f:
+            MatchingReporter(baseline, modified).write(f, matching_result)
+        with profiler.stage("report.code_link"), open(os.devnull, 'w') as f:
+            CodeLinkReporter(baseline, modified).write(f, code_links)
+
+    summary = profiler.summary()
+    stages: Dict[str, Dict[str, float]] = {}
+    for stage in summary["stages"]:
+        totals = stages.setdefault(stage["name"], {"seconds": 0.0, "cpu_seconds": 0.0})
+        totals["seconds"] += stage["duration_seconds"]
+        totals["cpu_seconds"] += stage["cpu_seconds"]
+        for key, total_key in (("peak_rss_bytes", "peak_rss_mib"), ("traced_peak_bytes", "traced_peak_mib")):
+            if key in stage:
+                totals[total_key] = max(totals.get(total_key, 0.0), stage[key] / (1024 * 1024))
+    return {"strategy": strategy_name, "nodes": node_count,
+            "stages": {name: {key: round(value, 4) for key, value in totals.items()}
+                       for name, totals in stages.items()},
+            "counters": summary["counters"]}
+
+
+def compare_to_baselines(results: List[Dict[str, Any]], baselines: Dict[str, Any], time_tolerance: float,
+                         memory_tolerance: float, compare_durations: bool = True) -> List[str]:
+    """
+    Describes every stage slower or larger than its baseline by more than the tolerance.
+
+    :param results: Results of `run_case`.
+    :param baselines: Stored baselines with the results per case key ("<strategy>/<nodes>").
+    :param time_tolerance: Allowed relative increase of the duration.
+    :param memory_tolerance: Allowed relative increase of the peak RSS.
+    :param compare_durations: Also compares the durations, only meaningful on the machine of the baselines.
+    """
+    regressions = []
+    for result in results:
+        key = case_key(result)
+        baseline = baselines.get("cases", {}).get(key)
+        if baseline is None:
+            continue
+        for name, stage in result["stages"].items():
+            base = baseline["stages"].get(name)
+            if base is None:
+                continue
+            if compare_durations and stage["seconds"] > base["seconds"] * (1 + time_tolerance) \
+                    and stage["seconds"] - base["seconds"] > MIN_SECONDS_DIFFERENCE:
+                regressions.append(f"{key} {name}: {stage['seconds']:.3f}s (baseline {base['seconds']:.3f}s)")
+            if "peak_rss_mib" in stage and "peak_rss_mib" in base \
+                    and stage["peak_rss_mib"] > base["peak_rss_mib"] * (1 + memory_tolerance) \
+                    and stage["peak_rss_mib"] - base["peak_rss_mib"] > MIN_MEMORY_DIFFERENCE_MIB:
+                regressions.append(f"{key} {name}: peak RSS {stage['peak_rss_mib']:.0f} MiB "
+                                   f"(baseline {base['peak_rss_mib']:.0f} MiB)")
+    return regressions
+
+
+def case_key(result: Dict[str, Any]) -> str:
+    return f"{result['strategy']}/{result['nodes']}"
+
+
+def machine() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def machine_differences(baselines: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Describes every property of the current machine that differs from the machine of the baselines.
+
+    :param baselines: Stored baselines, with the machine they were recorded on.
+    :param current: Properties of the current machine, see `machine`.
+    """
+    if not baselines.get("cases"):
+        return []
+    recorded = baselines.get("machine")
+    if recorded is None:
+        return ["machine of the baselines unknown"]
+    return [f"{key} {current.get(key)} (baseline {recorded.get(key)})"
+            for key in sorted(set(recorded) | set(current)) if recorded.get(key) != current.get(key)]
+
+
+def print_results(results: List[Dict[str, Any]], baselines: Dict[str, Any]):
+    for result in results:
+        baseline = baselines.get("cases", {}).get(case_key(result), {}).get("stages", {})
+        print(f"\n{case_key(result)}")
+        print(f"  {'stage':<24}{'seconds':>10}{'baseline':>10}{'peak RSS':>12}")
+        for name, stage in result["stages"].items():
+            base = baseline.get(name, {}).get("seconds")
+            print(f"  {name:<24}{stage['seconds']:>10.3f}{'' if base is None else f'{base:.3f}':>10}"
+                  f"{stage.get('peak_rss_mib', 0):>8.0f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the comparison pipeline on synthetic runtimes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Node counts of the baseline runtimes.")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic runtimes.")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per case, the fastest duration and smallest peak of every stage are kept.")
+    parser.add_argument("--dataDir", default=os.path.join(tempfile.gettempdir(), "runtime-analyzer-benchmarks"),
+                        help="Directory caching the synthetic runtimes.")
+    parser.add_argument("--baselines", default=os.path.join(BENCHMARKS_DIR, "baselines.json"))
+    parser.add_argument("--updateBaselines", action="store_true",
+                        help="Store the results as baselines instead of comparing with them.")
+    parser.add_argument("--timeTolerance", type=float, default=0.5)
+    parser.add_argument("--memoryTolerance", type=float, default=0.25)
+    parser.add_argument("--ignoreMachine", action="store_true",
+                        help="Compare durations even if the baselines were recorded on another machine.")
+    parser.add_argument("--traceMemory", action="store_true",
+                        help="Also record the tracemalloc peak per stage (slows down allocations).")
+    parser.add_argument("--output", help="Path to save the results (JSON).")
+    parser.add_argument("--case", nargs=3, metavar=("STRATEGY", "NODES", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        strategy_name, node_count, output = args.case
+        result = run_case(strategy_name, int(node_count), args.seed, args.dataDir, args.traceMemory)
+        with open(output, 'w') as f:
+            json.dump(result, f)
+        return
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, 'r') as f:
+            baselines = json.load(f)
+
+    results = []
+    for node_count in args.sizes:
+        for strategy_name in args.strategies:
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                with tempfile.NamedTemporaryFile(suffix=".json") as output:
+                    command = [sys.executable, os.path.abspath(__file__), "--seed", str(args.seed),
+                               "--dataDir", args.dataDir, "--case", strategy_name, str(node_count), output.name]
+                    if args.traceMemory:
+                        command.append("--traceMemory")
+                    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+                    runs.append(json.load(output))
+            result = runs[0]
+            for run in runs[1:]:
+                for name, stage in run["stages"].items():
+                    for key, value in stage.items():
+                        result["stages"][name][key] = min(result["stages"][name][key], value)
+            results.append(result)
+            print(f"Benchmarked {case_key(result)}", file=sys.stderr)
+
+    print_results(results, baselines)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"machine": machine(), "results": results}, f, indent=2)
+
+    if args.updateBaselines:
+        cases = baselines.get("cases", {})
+        cases.update((case_key(result), {"stages": result["stages"]}) for result in results)
+        with open(args.baselines, 'w') as f:
+            json.dump({"machine": machine(), "cases": dict(sorted(cases.items()))}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines saved to {args.baselines}")
+        return
+
+    differences = machine_differences(baselines, machine())
+    if differences and not args.ignoreMachine:
+        print(f"\nBaselines were recorded on another machine ({', '.join(differences)}), durations are not "
+              f"compared. Record baselines here with --updateBaselines or pass --ignoreMachine.", file=sys.stderr)
+    regressions = compare_to_baselines(results, baselines, args.timeTolerance, args.memoryTolerance,
+                                       compare_durations=not differences or args.ignoreMachine)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Deterministic synthetic runtimes for benchmarking the comparison pipeline at scale.
+
+A baseline heap is generated from a seed with the shapes of real heaps: power-law fan-in
+(few nodes retained by many), deep retainer chains, a shared stack DAG whose hot
+allocation sites own most nodes, and energy counters on most nodes. The modified heap
+removes, adds and modifies controlled fractions of nodes, and the code evolution holds
+hunks around the allocation sites of the changed nodes.
+
+Runtimes are held as NumPy columns and written to JSON one node at a time, so the size is
+only bounded by the time it takes to write the files.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+NODE_TYPES = ("object", "array", "string", "closure", "number", "code", "hidden", "concatenated string")
+EDGE_NAMES = ("property", "element", "context", "internal", "hidden", "shortcut")
+# Types whose nodes carry a value
+VALUE_TYPES = (2, 4, 7)
+
+# Bumped whenever the generated heaps change, so cached files are not reused
+GENERATOR_VERSION = 1
+
+
+class SyntheticHeap:
+    """Columns of a generated runtime. Nodes and edges are referenced by position."""
+
+    def __init__(self, node_id: np.ndarray, node_type: np.ndarray, node_value: np.ndarray, node_trace: np.ndarray,
+                 node_root: np.ndarray, energy_mask: np.ndarray, energy_read: np.ndarray, energy_write: np.ndarray,
+                 energy_size: np.ndarray, edge_id: np.ndarray, edge_from: np.ndarray, edge_to: np.ndarray,
+                 edge_name: np.ndarray, stacks: List[dict]):
+        self.node_id = node_id
+        self.node_type = node_type
+        self.node_value = node_value
+        self.node_trace = node_trace
+        self.node_root = node_root
+        self.energy_mask = energy_mask
+        self.energy_read = energy_read
+        self.energy_write = energy_write
+        self.energy_size = energy_size
+        self.edge_id = edge_id
+        self.edge_from = edge_from
+        self.edge_to = edge_to
+        self.edge_name = edge_name
+        self.stacks = stacks
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_id)
+
+    def write(self, path: str):
+        """Writes the runtime in the JSON format of `RuntimeParserService`."""
+        order = np.argsort(self.edge_from, kind="stable")
+        offsets = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.edge_from, minlength=self.node_count), out=offsets[1:])
+        edge_ids = self.edge_id[order].tolist()
+        node_ids = self.node_id.tolist()
+
+        with open(path, 'w') as f:
+            f.write('{"nodes": [')
+            for i, node_id in enumerate(node_ids):
+                node = {"id": f"n{node_id}", "edgeIds": [f"e{edge}" for edge in edge_ids[offsets[i]:offsets[i + 1]]],
+                        "type": NODE_TYPES[self.node_type[i]]}
+                if self.node_value[i] >= 0:
+                    node["value"] = f"v{self.node_value[i]}"
+                if self.node_trace[i] >= 0:
+                    node["traceId"] = f"s{self.node_trace[i]}"
+                if self.node_root[i]:
+                    node["root"] = True
+                if self.energy_mask[i]:
+                    node["energy"] = {"nodeId": node["id"], "readCounter": int(self.energy_read[i]),
+                                      "writeCounter": int(self.energy_write[i]), "size": int(self.energy_size[i])}
+                f.write(("," if i else "") + "\n" + json.dumps(node))
+
+            f.write('\n], "edges": [')
+            for i, (edge, source, target, name) in enumerate(zip(self.edge_id.tolist(), self.edge_from.tolist(),
+                                                                 self.edge_to.tolist(), self.edge_name.tolist())):
+                f.write(("," if i else "") + "\n" + json.dumps({
+                    "id": f"e{edge}", "fromNodeId": f"n{node_ids[source]}", "toNodeId": f"n{node_ids[target]}",
+                    "name": EDGE_NAMES[name]}))
+
+            f.write('\n], "stacks": [')
+            for i, stack in enumerate(self.stacks):
+                f.write(("," if i else "") + "\n" + json.dumps(stack))
+            f.write('\n]}\n')
+
+
+def generate_heap(node_count: int, seed: int = 0, mean_out_degree: float = 3.0, fan_in_exponent: float = 2.5,
+                  chain_fraction: float = 0.05, chain_length: int = 200, trace_fraction: float = 0.7,
+                  energy_fraction: float = 0.8, script_count: int = 20) -> SyntheticHeap:
+    """
+    Generates a baseline heap.
+
+    :param node_count: Number of nodes.
+    :param seed: Seed of the generator, equal seeds give equal heaps.
+    :param mean_out_degree: Mean number of outgoing edges per node.
+    :param fan_in_exponent: Skew of the edge targets. Targets are drawn at rank `n * u^exponent` of
+        a random order of the nodes, so larger exponents concentrate more edges on fewer nodes.
+    :param chain_fraction: Fraction of nodes in retainer chains, only retained by their predecessor.
+    :param chain_length: Number of nodes per retainer chain.
+    :param trace_fraction: Fraction of nodes with an allocation stack.
+    :param energy_fraction: Fraction of nodes with energy counters.
+    :param script_count: Number of scripts of the stacks.
+    """
+    rng = np.random.default_rng(seed)
+    n = node_count
+    root_count = max(1, n // 1000)
+
+    # Retainer chains are taken from the non-root nodes
+    chain_nodes = rng.permutation(np.arange(root_count, n))[:int(n * chain_fraction)]
+    in_chain = np.zeros(n, dtype=bool)
+    in_chain[chain_nodes] = True
+    free_nodes = np.flatnonzero(~in_chain)
+
+    # Power-law fan-in: a few hubs in a random order of the free nodes receive most edges
+    out_degree = rng.geometric(1 / (mean_out_degree + 1), size=n) - 1
+    edge_from = np.repeat(np.arange(n, dtype=np.int64), out_degree)
+    hubs = rng.permutation(free_nodes)
+    edge_to = hubs[(len(hubs) * rng.random(len(edge_from)) ** fan_in_exponent).astype(np.int64)]
+
+    # Every chain is retained by a root and links its nodes one after another
+    chain_from, chain_to = [], []
+    for start in range(0, len(chain_nodes), chain_length):
+        chain = chain_nodes[start:start + chain_length]
+        chain_from.append(np.concatenate([[rng.integers(root_count)], chain[:-1]]))
+        chain_to.append(chain)
+    if chain_from:
+        edge_from = np.concatenate([edge_from] + chain_from)
+        edge_to = np.concatenate([edge_to] + chain_to)
+
+    # Stack DAG: every stack is called from one or two earlier stacks, sharing their frames
+    stack_count = max(script_count, n // 50)
+    stacks = []
+    for i in range(stack_count):
+        callers = [] if i < script_count else sorted({int(caller) for caller in rng.integers(0, i, rng.integers(1, 3))})
+        stacks.append({"id": f"s{i}", "frameIds": [f"s{caller}" for caller in callers], "functionName": f"fn{i}",
+                       "scriptName": f"src/module_{i % script_count}.js", "lineNumber": int(rng.integers(1, 2000)),
+                       "columnNumber": int(rng.integers(0, 80))})
+
+    # Hot allocation sites own most traced nodes
+    traced = rng.random(n) < trace_fraction
+    node_trace = np.where(traced, (stack_count * rng.random(n) ** 2).astype(np.int64), -1)
+
+    node_type = rng.choice(len(NODE_TYPES), size=n, p=[0.35, 0.15, 0.2, 0.1, 0.08, 0.05, 0.05, 0.02]).astype(np.int8)
+    node_value = np.where(np.isin(node_type, VALUE_TYPES), rng.integers(0, max(1, n // 10), n), -1)
+    energy_mask = rng.random(n) < energy_fraction
+    node_root = np.zeros(n, dtype=bool)
+    node_root[:root_count] = True
+
+    return SyntheticHeap(
+        node_id=np.arange(n, dtype=np.int64), node_type=node_type, node_value=node_value, node_trace=node_trace,
+        node_root=node_root, energy_mask=energy_mask, energy_read=rng.zipf(2.0, n) - 1,
+        energy_write=rng.zipf(2.5, n) - 1, energy_size=rng.integers(16, 512, n),
+        edge_id=np.arange(len(edge_from), dtype=np.int64), edge_from=edge_from, edge_to=edge_to,
+        edge_name=rng.integers(0, len(EDGE_NAMES), len(edge_from)), stacks=stacks)
+
+
+def mutate_heap(heap: SyntheticHeap, seed: int = 1, modified_fraction: float = 0.05, added_fraction: float = 0.02,
+                removed_fraction: float = 0.02, hunk_count: int = 8) -> Tuple[SyntheticHeap, List[dict]]:
+    """
+    Derives the modified heap and the code evolution of a baseline heap.
+
+    Removed nodes disappear with their edges, added nodes are retained by existing nodes and
+    modified nodes get a new value and grown energy counters. The code evolution holds
+    `hunk_count` hunks in the modified code around the allocation sites of added and modified
+    nodes and as many in the baseline code around the allocation sites of removed nodes.
+
+    :param heap: The baseline heap.
+    :param seed: Seed of the changes.
+    :param modified_fraction: Fraction of nodes whose value and counters change.
+    :param added_fraction: Number of added nodes as fraction of the baseline nodes.
+    :param removed_fraction: Fraction of non-root nodes that are removed.
+    :param hunk_count: Number of hunks per code version.
+    """
+    rng = np.random.default_rng(seed)
+    n = heap.node_count
+    candidates = np.flatnonzero(~heap.node_root)
+    changed = rng.permutation(candidates)
+    removed = changed[:int(n * removed_fraction)]
+    modified = changed[len(removed):len(removed) + int(n * modified_fraction)]
+
+    keep = np.ones(n, dtype=bool)
+    keep[removed] = False
+    position = np.cumsum(keep) - 1
+    kept = np.flatnonzero(keep)
+    kept_edges = keep[heap.edge_from] & keep[heap.edge_to]
+
+    node_value = heap.node_value.copy()
+    node_value[modified] = np.where(node_value[modified] >= 0, node_value[modified] + n, -1)
+    energy_read, energy_write, energy_size = heap.energy_read.copy(), heap.energy_write.copy(), heap.energy_size.copy()
+    energy_read[modified] += rng.integers(1, 10, len(modified))
+    energy_write[modified] += rng.integers(1, 10, len(modified))
+    energy_size[modified] *= 2
+
+    # Added nodes are allocated at a few new hot sites and retained by existing nodes
+    added_count = int(n * added_fraction)
+    added_sites = rng.choice(len(heap.stacks), size=min(hunk_count, len(heap.stacks)), replace=False)
+    added_type = rng.choice(len(NODE_TYPES), size=added_count).astype(np.int8)
+    added_position = len(kept) + np.arange(added_count)
+    retainers = position[rng.choice(kept, size=added_count)]
+    added_targets = position[rng.choice(kept, size=added_count)]
+    edge_count = len(heap.edge_id)
+
+    modified_heap = SyntheticHeap(
+        node_id=np.concatenate([heap.node_id[kept], n + np.arange(added_count)]),
+        node_type=np.concatenate([heap.node_type[kept], added_type]),
+        node_value=np.concatenate([node_value[kept],
+                                   np.where(np.isin(added_type, VALUE_TYPES), 2 * n + np.arange(added_count), -1)]),
+        node_trace=np.concatenate([heap.node_trace[kept], added_sites[rng.integers(0, len(added_sites), added_count)]]),
+        node_root=np.concatenate([heap.node_root[kept], np.zeros(added_count, dtype=bool)]),
+        energy_mask=np.concatenate([heap.energy_mask[kept], np.ones(added_count, dtype=bool)]),
+        energy_read=np.concatenate([energy_read[kept], rng.zipf(2.0, added_count) - 1]),
+        energy_write=np.concatenate([energy_write[kept], rng.zipf(2.5, added_count) - 1]),
+        energy_size=np.concatenate([energy_size[kept], rng.integers(16, 512, added_count)]),
+        # Every added node is retained once and retains one existing node
+        edge_id=np.concatenate([heap.edge_id[kept_edges], edge_count + np.arange(2 * added_count)]),
+        edge_from=np.concatenate([position[heap.edge_from[kept_edges]], retainers, added_position]),
+        edge_to=np.concatenate([position[heap.edge_to[kept_edges]], added_position, added_targets]),
+        edge_name=np.concatenate([heap.edge_name[kept_edges], rng.integers(0, len(EDGE_NAMES), 2 * added_count)]),
+        stacks=heap.stacks)
+
+    modified_sites = heap.node_trace[modified]
+    removed_sites = heap.node_trace[removed]
+    code_evolutions = (
+        _hunks(heap.stacks, np.concatenate([added_sites, _hot_sites(modified_sites, hunk_count)]), "modified", rng)
+        + _hunks(heap.stacks, _hot_sites(removed_sites, hunk_count), "base", rng))
+    return modified_heap, code_evolutions
+
+
+def generate_runtime_pair(directory: str, node_count: int, seed: int = 0, **changes) -> Dict[str, str]:
+    """
+    Writes a baseline runtime, a modified runtime and their code evolution into a directory.
+
+    Files are named after the generator version, node count, seed and changes and reused if
+    they exist, so repeated benchmark runs only generate each heap once.
+
+    :param directory: Directory of the files.
+    :param node_count: Number of nodes of the baseline runtime.
+    :param seed: Seed of the baseline heap, the changes use `seed + 1`.
+    :param changes: Fractions and hunk count passed to `mutate_heap`.
+    :return: Paths of the "baseline", "modified" and "code_evolution" files.
+    """
+    suffix = "".join(f"-{key}{value}" for key, value in sorted(changes.items()))
+    prefix = os.path.join(directory, f"synthetic-v{GENERATOR_VERSION}-{node_count}-{seed}{suffix}")
+    paths = {"baseline": f"{prefix}-baseline.json", "modified": f"{prefix}-modified.json",
+             "code_evolution": f"{prefix}-code-evolution.json"}
+    if all(os.path.exists(path) for path in paths.values()):
+        return paths
+
+    os.makedirs(directory, exist_ok=True)
+    baseline = generate_heap(node_count, seed)
+    modified, code_evolutions = mutate_heap(baseline, seed + 1, **changes)
+    baseline.write(paths["baseline"] + ".tmp")
+    modified.write(paths["modified"] + ".tmp")
+    with open(paths["code_evolution"] + ".tmp", 'w') as f:
+        json.dump(code_evolutions, f)
+    # Renamed last, so an interrupted generation is not mistaken for a complete one
+    for path in paths.values():
+        os.replace(path + ".tmp", path)
+    return paths
+
+
+def _hot_sites(sites: np.ndarray, count: int) -> np.ndarray:
+    """The `count` stacks allocating most of the given nodes."""
+    sites = sites[sites >= 0]
+    if not len(sites):
+        return sites
+    values, counts = np.unique(sites, return_counts=True)
+    return values[np.argsort(-counts, kind="stable")[:count]]
+
+
+def _hunks(stacks: List[dict], sites: np.ndarray, source: str, rng: np.random.Generator) -> List[dict]:
+    modification_types = ("modify", "insert") if source == "modified" else ("modify", "delete")
+    hunks = []
+    for site in dict.fromkeys(sites.tolist()):
+        stack = stacks[site]
+        line = stack["lineNumber"]
+        hunks.append({"fileId": stack["scriptName"], "modificationType": str(rng.choice(modification_types)),
+                      "modificationSource": source,
+                      "codeChangeSpan": {"lineStart": max(1, line - int(rng.integers(0, 5))),
+                                         "lineEnd": line + int(rng.integers(0, 5)),
+                                         "columnStart": 0, "columnEnd": 120}})
+    return hunks
@@ -0,0 +1,67 @@
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes a string table as one UTF-8 byte blob and the offsets of its entries.
+
+    :param strings: The strings to encode.
+    """
+    encoded = [value.encode("utf-8", "surrogatepass") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """
+    Decodes a string table created by `encode_strings`.
+
+    :param blob: UTF-8 byte blob.
+    :param offsets: Start offset of every entry followed by the total length.
+    """
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[start:end].decode("utf-8", "surrogatepass") for start, end in zip(bounds, bounds[1:])]
+
+
+def write_arrays(directory: str, arrays: Dict[str, np.ndarray]):
+    """
+    Writes each array as `<name>.npy` into the directory.
+
+    :param directory: Existing target directory.
+    :param arrays: Arrays by name.
+    """
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+
+def read_arrays(directory: str, names: Iterable[str], mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Reads arrays written by `write_arrays`.
+
+    :param directory: Directory containing the `.npy` files.
+    :param names: Names of the arrays to read.
+    :param mmap: Memory-map the files read-only instead of loading them.
+    """
+    mmap_mode = "r" if mmap else None
+    return {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in names
+    }
+
+
+def directory_size(directory: str) -> int:
+    """Sums the size of all files below the directory."""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return total
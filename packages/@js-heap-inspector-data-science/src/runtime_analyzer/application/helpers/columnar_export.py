@@ -0,0 +1,162 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from .result_writer import COLUMNAR_FORMATS, MATCHING_CATEGORIES
+from ..reporter.matching.matching_aggregation import RuntimeAccessColumns
+from ..services.matching.contracts.differentiation_algorithm import DifferentiationResult
+from ...domain.models import CodeLinkContainer, CausalPair, Runtime, SubgraphResultArrays
+
+# Optional dependency, imported on first use: pyarrow starts threads on import, which the
+# processes forked for concurrent stages and batch workers should not inherit
+pa = None
+
+SIDES = ("baseline", "modified")
+
+
+def write_columnar(directory: str, baseline_runtime: Runtime, modified_runtime: Runtime,
+                   matching_result: DifferentiationResult, code_links: CodeLinkContainer,
+                   file_format: str = "parquet") -> List[str]:
+    """
+    Writes one table per result category into a directory, as Parquet or Arrow IPC files named
+    `<category>.parquet` or `<category>.arrow`. See `columnar_tables` for the columns.
+
+    :param directory: Directory of the tables, created if missing.
+    :param baseline_runtime: The baseline runtime of the comparison.
+    :param modified_runtime: The modified runtime of the comparison.
+    :param matching_result: Result of the matching stage.
+    :param code_links: Result of the code link stage.
+    :param file_format: "parquet" or "arrow".
+    :return: Paths of the written files.
+    """
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format '{file_format}'")
+    _import_pyarrow()
+    tables = columnar_tables(baseline_runtime, modified_runtime, matching_result, code_links)
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(directory, f"{name}.{file_format}")
+        if file_format == "parquet":
+            pa.parquet.write_table(table, path)
+        else:
+            with pa.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+        paths.append(path)
+    return paths
+
+
+def columnar_tables(baseline_runtime: Runtime, modified_runtime: Runtime, matching_result: DifferentiationResult,
+                    code_links: CodeLinkContainer) -> Dict[str, "pa.Table"]:
+    """
+    Builds one Arrow table per result category, with dictionary encoded strings.
+
+    The matching categories hold one row per node of a subgraph result with "group_id" (position of
+    the result in its category), "side", "node_id" and "similarity_score" (null outside "modified").
+    "regressions" and "improvements" hold one row per causal pair with "node_id", the code evolution
+    ("file_id", "modification_type", "modification_source", the span) and "confidence".
+    "unmappable_regressions" and "unmappable_improvements" hold one "node_id" per row.
+
+    Every table joins "node_type", "read_counter", "write_counter" and "size" of the node in its
+    runtime (modified for regressions, baseline for improvements), resolved like
+    `Runtime.get_node_by_id`. They are null for ids without a node, the counters also for nodes
+    without energy.
+
+    :param baseline_runtime: The baseline runtime of the comparison.
+    :param modified_runtime: The modified runtime of the comparison.
+    :param matching_result: Result of the matching stage.
+    :param code_links: Result of the code link stage.
+    """
+    _import_pyarrow()
+    columns = {"baseline": RuntimeAccessColumns(baseline_runtime), "modified": RuntimeAccessColumns(modified_runtime)}
+    indexed = matching_result.to_indexed(columns["baseline"].graph, columns["modified"].graph)
+    tables = {category: _matching_table(getattr(indexed, category), columns) for category in MATCHING_CATEGORIES}
+    for category, side in (("regressions", "modified"), ("improvements", "baseline")):
+        tables[category] = _causal_pair_table(getattr(code_links, category), columns[side])
+        node_ids = getattr(code_links, f"unmappable_{category}")
+        tables[f"unmappable_{category}"] = pa.table({
+            "node_id": _encoded_strings(node_ids),
+            **_node_columns(columns[side], columns[side].indices_of(node_ids, missing_ok=True)),
+        })
+    return tables
+
+
+def _import_pyarrow():
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("The columnar export requires the pyarrow package") from None
+        pa = pyarrow
+
+
+def _matching_table(results: SubgraphResultArrays, columns: Dict[str, RuntimeAccessColumns]) -> "pa.Table":
+    similarity_score = None if results.similarity_score is None else np.asarray(results.similarity_score)
+
+    parts = []
+    for position, side in enumerate(SIDES):
+        side_columns = columns[side]
+        indices = getattr(results, f"{side}_indices")
+        node_id = _dictionary(side_columns.graph.node_id[indices], side_columns.graph.strings)
+        resolved = side_columns.resolve(indices, missing_ok=True)
+        group_lengths = np.diff(getattr(results, f"{side}_offsets"))
+
+        group_id = np.repeat(np.arange(len(group_lengths), dtype=np.int32), group_lengths)
+        parts.append(pa.table({
+            "group_id": group_id,
+            "side": pa.DictionaryArray.from_arrays(np.full(len(group_id), position, dtype=np.int8), list(SIDES)),
+            "node_id": node_id,
+            "similarity_score": pa.nulls(len(group_id), pa.float64()) if similarity_score is None
+            else pa.array(similarity_score[group_id], type=pa.float64()),
+            **_node_columns(side_columns, resolved),
+        }))
+    # The dictionaries of both runtimes are merged, so every column has one dictionary
+    return pa.concat_tables(parts).unify_dictionaries().combine_chunks()
+
+
+def _causal_pair_table(pairs: List[CausalPair], columns: RuntimeAccessColumns) -> "pa.Table":
+    evolutions = [pair.code_evolution for pair in pairs]
+    spans = [evolution.codeChangeSpan for evolution in evolutions]
+    node_ids = [pair.node_id for pair in pairs]
+    return pa.table({
+        "node_id": _encoded_strings(node_ids),
+        "file_id": _encoded_strings([evolution.fileId for evolution in evolutions]),
+        "modification_type": _encoded_strings([evolution.modificationType for evolution in evolutions]),
+        "modification_source": _encoded_strings([evolution.modificationSource for evolution in evolutions]),
+        "line_start": pa.array([span.lineStart for span in spans], type=pa.int32()),
+        "line_end": pa.array([span.lineEnd for span in spans], type=pa.int32()),
+        "column_start": pa.array([span.columnStart for span in spans], type=pa.int32()),
+        "column_end": pa.array([span.columnEnd for span in spans], type=pa.int32()),
+        "confidence": _encoded_strings([pair.confidence for pair in pairs]),
+        **_node_columns(columns, columns.indices_of(node_ids, missing_ok=True)),
+    })
+
+
+def _node_columns(columns: RuntimeAccessColumns, resolved: np.ndarray) -> Dict[str, "pa.Array"]:
+    """Type and energy counters of resolved node indices, null for -1 and the counters of nodes without energy."""
+    graph = columns.graph
+    missing = resolved < 0
+    nodes = np.where(missing, 0, resolved)
+    no_energy = missing | ~graph.energy_mask[nodes].astype(bool)
+    return {
+        "node_type": _dictionary(graph.node_type[nodes], graph.strings, missing),
+        "read_counter": pa.array(graph.energy_read_counter[nodes], mask=no_energy, type=pa.int64()),
+        "write_counter": pa.array(graph.energy_write_counter[nodes], mask=no_energy, type=pa.int64()),
+        "size": pa.array(graph.energy_size[nodes], mask=no_energy, type=pa.int64()),
+    }
+
+
+def _dictionary(refs: np.ndarray, strings: List[str], mask: np.ndarray = None) -> "pa.DictionaryArray":
+    """Dictionary array of string references, with only the referenced strings as dictionary."""
+    unique_refs, codes = np.unique(refs, return_inverse=True)
+    dictionary = pa.array([strings[ref] for ref in unique_refs.tolist()], type=pa.string())
+    return pa.DictionaryArray.from_arrays(pa.array(codes.reshape(-1).astype(np.int32), mask=mask), dictionary)
+
+
+def _encoded_strings(values: List[str]) -> "pa.DictionaryArray":
+    return pa.array(values, type=pa.string()).dictionary_encode()
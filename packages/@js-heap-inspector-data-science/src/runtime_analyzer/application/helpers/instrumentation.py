@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Receives the name of a running loop, the number of finished items and the total (None if unknown)
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+ProgressReport = Callable[[int], None]
+
+
+class Instrumentation:
+    """
+    Receives stage timings, counters and progress of an analysis.
+
+    Instrumented code fetches the active instance with `current_instrumentation()`,
+    wraps stages in `stage`, adds to counters with `count` and reports the progress
+    of long loops through the callable returned by `progress`. This base class
+    records nothing: stages do not measure, and `progress` returns None, so loops
+    skip reporting with a single check.
+    """
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measures the enclosed block as a stage; stages may be nested."""
+        yield
+
+    def count(self, name: str, value: int = 1):
+        """Adds to a counter."""
+
+    def progress(self, name: str, total: Optional[int] = None) -> Optional[ProgressReport]:
+        """
+        Returns a callable taking the number of finished items of a loop, or None if
+        progress is not reported. Loops report the total once they are done, which is
+        never rate limited.
+
+        :param name: Name of the loop.
+        :param total: Number of items, None if unknown.
+        """
+        return None
+
+
+class Profiler(Instrumentation):
+    """
+    Records every stage with its monotonic duration, CPU time, peak RSS and (with
+    `trace_memory`) the tracemalloc delta and peak, as well as all counters. The
+    recording can be written as a Chrome trace (`chrome://tracing`, Perfetto).
+
+    Progress is passed to `progress_callback` at most once per `progress_interval`
+    seconds per loop, and always for the last item.
+    """
+
+    enabled = True
+
+    def __init__(self, progress_callback: Optional[ProgressCallback] = None, progress_interval: float = 1.0,
+                 trace_memory: bool = False):
+        """
+        :param progress_callback: Receives the progress of long loops. None disables progress reporting.
+        :param progress_interval: Minimum number of seconds between two reports of a loop.
+        :param trace_memory: Trace Python allocations per stage with tracemalloc (slows down allocations).
+        """
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self._counter_events: List[Dict[str, Any]] = []
+        self._open: List[Dict[str, Any]] = []
+        self._origin_ns = time.perf_counter_ns()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        record: Dict[str, Any] = {"name": name, "depth": len(self._open)}
+        if tracemalloc.is_tracing():
+            # The peak is global, so open stages keep the peak seen so far before it is reset
+            self._fold_traced_peak()
+            tracemalloc.reset_peak()
+            record["traced_start"] = record["traced_peak"] = tracemalloc.get_traced_memory()[0]
+
+        self._open.append(record)
+        record["start_ns"] = time.perf_counter_ns()
+        cpu_start_ns = time.process_time_ns()
+        try:
+            yield
+        finally:
+            record["duration_ns"] = time.perf_counter_ns() - record["start_ns"]
+            record["cpu_ns"] = time.process_time_ns() - cpu_start_ns
+            record["peak_rss_bytes"] = _peak_rss_bytes()
+            if "traced_start" in record and tracemalloc.is_tracing():
+                self._fold_traced_peak()
+                traced_start = record.pop("traced_start")
+                record["traced_delta_bytes"] = tracemalloc.get_traced_memory()[0] - traced_start
+                record["traced_peak_bytes"] = record.pop("traced_peak") - traced_start
+            self._open.pop()
+            self.stages.append(record)
+            if started_tracing:
+                tracemalloc.stop()
+
+    def count(self, name: str, value: int = 1):
+        total = self.counters.get(name, 0) + value
+        self.counters[name] = total
+        self._counter_events.append({"name": name, "ts_ns": time.perf_counter_ns(), "value": total})
+
+    def progress(self, name: str, total: Optional[int] = None) -> Optional[ProgressReport]:
+        if self.progress_callback is None:
+            return None
+
+        callback, interval = self.progress_callback, self.progress_interval
+        next_report = time.monotonic()
+
+        def report(done: int):
+            nonlocal next_report
+            now = time.monotonic()
+            if now >= next_report or done == total:
+                next_report = now + interval
+                callback(name, done, total)
+
+        return report
+
+    def summary(self) -> Dict[str, Any]:
+        """Stages in order of completion (nested ones first) and the counter totals."""
+        stages = []
+        for record in self.stages:
+            stage = {"name": record["name"], "depth": record["depth"],
+                     "start_seconds": (record["start_ns"] - self._origin_ns) / 1e9,
+                     "duration_seconds": record["duration_ns"] / 1e9,
+                     "cpu_seconds": record["cpu_ns"] / 1e9}
+            for key in ("peak_rss_bytes", "traced_delta_bytes", "traced_peak_bytes"):
+                if record.get(key) is not None:
+                    stage[key] = record[key]
+            stages.append(stage)
+        return {"stages": stages, "counters": dict(self.counters)}
+
+    def trace(self) -> Dict[str, Any]:
+        """Stages as complete ("X") and counters as counter ("C") events of the Chrome trace event format."""
+        pid, tid = os.getpid(), threading.get_ident()
+        events = []
+        for stage in self.summary()["stages"]:
+            args = {key: value for key, value in stage.items()
+                    if key not in ("name", "depth", "start_seconds", "duration_seconds")}
+            events.append({"name": stage["name"], "cat": "stage", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": stage["start_seconds"] * 1e6, "dur": stage["duration_seconds"] * 1e6,
+                           "args": args})
+        for event in self._counter_events:
+            events.append({"name": event["name"], "cat": "counter", "ph": "C", "pid": pid,
+                           "ts": (event["ts_ns"] - self._origin_ns) / 1e3, "args": {"value": event["value"]}})
+        events.sort(key=lambda event: event["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": dict(self.counters)}}
+
+    def write_trace(self, path: str):
+        """Writes the Chrome trace as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.trace(), f)
+
+    def _fold_traced_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._open:
+            if "traced_peak" in record:
+                record["traced_peak"] = max(record["traced_peak"], peak)
+
+
+def print_progress(name: str, done: int, total: Optional[int]):
+    """Progress callback printing one status line per report."""
+    if total:
+        print(f"{name} Status: {(done / total) * 100:.2f}%")
+    else:
+        print(f"{name} Status: {done}")
+
+
+_NO_INSTRUMENTATION = Instrumentation()
+_current: ContextVar[Instrumentation] = ContextVar("instrumentation", default=_NO_INSTRUMENTATION)
+
+
+def current_instrumentation() -> Instrumentation:
+    """The instrumentation activated by `use_instrumentation`, a recording-free one otherwise."""
+    return _current.get()
+
+
+@contextmanager
+def use_instrumentation(instrumentation: Optional[Instrumentation]) -> Iterator[Instrumentation]:
+    """
+    Activates the instrumentation for the enclosed block. None keeps the active one.
+
+    :param instrumentation: Instrumentation receiving stages, counters and progress.
+    """
+    if instrumentation is None:
+        yield current_instrumentation()
+        return
+
+    token = _current.set(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        _current.reset(token)
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
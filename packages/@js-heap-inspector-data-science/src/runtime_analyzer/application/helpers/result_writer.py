@@ -0,0 +1,211 @@
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+from ..services.matching.contracts.differentiation_algorithm import DifferentiationResult
+from ...domain.models import CodeLinkContainer
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency, only required for zstd compression
+    zstandard = None
+
+MATCHING_CATEGORIES = ("matched", "modified", "added_node_ids", "removed_node_ids")
+CAUSAL_PAIR_CATEGORIES = ("regressions", "improvements")
+UNMAPPABLE_CATEGORIES = ("unmappable_regressions", "unmappable_improvements")
+COMPRESSIONS = ("gzip", "zstd")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+_COMPACT_SEPARATORS = (",", ":")
+
+
+def compression_of(path: str) -> Optional[str]:
+    """
+    Compression implied by the file extension (`.gz` or `.zst`), None for other files.
+
+    :param path: Path of the file.
+    """
+    return next((compression for extension, compression in _EXTENSIONS.items() if path.endswith(extension)), None)
+
+
+def with_compression_extension(path: str, compression: Optional[str]) -> str:
+    """
+    Appends the file extension of the compression (`.gz` or `.zst`) unless the path already ends with it.
+
+    :param path: Path of the file.
+    :param compression: "gzip", "zstd" or None to keep the path.
+    """
+    if compression is None or compression_of(path) == compression:
+        return path
+    extension = next(extension for extension, known in _EXTENSIONS.items() if known == compression)
+    return path + extension
+
+
+@contextmanager
+def open_output(path: Optional[str], compression: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    Opens a text file for writing, compressed with gzip or zstd. Without a path, yields stdout.
+
+    :param path: Path of the file, None for stdout.
+    :param compression: "gzip", "zstd" or None for the compression implied by the file extension.
+    """
+    if path is None:
+        yield sys.stdout
+        return
+
+    compression = compression or compression_of(path)
+    if compression == "gzip":
+        with gzip.open(path, 'wt', encoding="utf-8", compresslevel=6) as f:
+            yield f
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        with open(path, 'wb') as raw, zstandard.ZstdCompressor().stream_writer(raw) as compressed, \
+                io.TextIOWrapper(compressed, encoding="utf-8") as f:
+            yield f
+    elif compression is None:
+        with open(path, 'w') as f:
+            yield f
+    else:
+        raise ValueError(f"Unsupported compression '{compression}'")
+
+
+@contextmanager
+def open_input(path: str) -> Iterator[TextIO]:
+    """
+    Opens a text file written by `open_output`, decompressing it according to its extension.
+
+    :param path: Path of the file.
+    """
+    compression = compression_of(path)
+    if compression == "gzip":
+        with gzip.open(path, 'rt', encoding="utf-8") as f:
+            yield f
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd decompression requires the zstandard package")
+        with open(path, 'rb') as raw, zstandard.ZstdDecompressor().stream_reader(raw) as decompressed, \
+                io.TextIOWrapper(decompressed, encoding="utf-8") as f:
+            yield f
+    else:
+        with open(path, 'r') as f:
+            yield f
+
+
+def write_json(stream: TextIO, time_tracking: dict, matching_result: DifferentiationResult, code_links: CodeLinkContainer,
+               indent: Optional[int] = None):
+    """
+    Writes the comparison result as one JSON document with the keys "time_tracking", "matching" and
+    "causal_links", serializing one subgraph result or causal pair at a time. With an indent, the
+    output is identical to `json.dump` of the dumped models; without, it is compact.
+
+    :param stream: Text stream to write to.
+    :param time_tracking: Time tracking of the comparison.
+    :param matching_result: Result of the matching stage.
+    :param code_links: Result of the code link stage.
+    :param indent: Number of spaces per nesting level, None for compact output.
+    """
+    document = {
+        "time_tracking": time_tracking,
+        "matching": {category: _iter_results(matching_result, category) for category in MATCHING_CATEGORIES},
+        "causal_links": _code_link_lists(code_links),
+    }
+    _write_value(stream, document, indent, 0)
+
+
+def write_ndjson(stream: TextIO, time_tracking: dict, matching_result: DifferentiationResult,
+                 code_links: CodeLinkContainer):
+    """
+    Writes the comparison result as newline delimited JSON with one record per line: the time
+    tracking first, then every subgraph result, causal pair and unmappable node. The "record"
+    field of a record names the list it belongs to in the JSON document of `write_json`.
+
+    :param stream: Text stream to write to.
+    :param time_tracking: Time tracking of the comparison.
+    :param matching_result: Result of the matching stage.
+    :param code_links: Result of the code link stage.
+    """
+    _write_record(stream, {"record": "time_tracking", **time_tracking})
+    for category in MATCHING_CATEGORIES:
+        for result in _iter_results(matching_result, category):
+            _write_record(stream, {"record": category, **result})
+    for category, values in _code_link_lists(code_links).items():
+        for value in values:
+            _write_record(stream, {"record": category, **(value if isinstance(value, dict) else {"node_id": value})})
+
+
+def read_ndjson(stream: TextIO) -> Dict[str, Any]:
+    """
+    Reassembles the JSON document of `write_json` from records written by `write_ndjson`.
+
+    :param stream: Text stream to read from.
+    """
+    document: Dict[str, Any] = {
+        "time_tracking": {},
+        "matching": {category: [] for category in MATCHING_CATEGORIES},
+        "causal_links": {category: [] for category in CAUSAL_PAIR_CATEGORIES + UNMAPPABLE_CATEGORIES},
+    }
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        category = record.pop("record")
+        if category == "time_tracking":
+            document["time_tracking"] = record
+        elif category in MATCHING_CATEGORIES:
+            document["matching"][category].append(record)
+        elif category in UNMAPPABLE_CATEGORIES:
+            document["causal_links"][category].append(record["node_id"])
+        else:
+            document["causal_links"][category].append(record)
+    return document
+
+
+def _iter_results(matching_result: DifferentiationResult, category: str) -> Iterator[Dict[str, Any]]:
+    return matching_result.iter_dump(category)
+
+
+def _code_link_lists(code_links: CodeLinkContainer) -> Dict[str, Iterable]:
+    lists: Dict[str, Iterable] = {category: (pair.model_dump() for pair in getattr(code_links, category))
+                                  for category in CAUSAL_PAIR_CATEGORIES}
+    lists.update((category, iter(getattr(code_links, category))) for category in UNMAPPABLE_CATEGORIES)
+    return lists
+
+
+def _write_record(stream: TextIO, record: Dict[str, Any]):
+    stream.write(json.dumps(record, separators=_COMPACT_SEPARATORS))
+    stream.write("\n")
+
+
+def _write_value(stream: TextIO, value: Any, indent: Optional[int], level: int):
+    """Writes dicts and iterators element by element, everything else with `json.dumps`."""
+    if isinstance(value, dict):
+        _write_container(stream, "{", "}", ((json.dumps(key), item) for key, item in value.items()), indent, level)
+    elif isinstance(value, Iterator):
+        _write_container(stream, "[", "]", ((None, item) for item in value), indent, level)
+    elif indent is None:
+        stream.write(json.dumps(value, separators=_COMPACT_SEPARATORS))
+    else:
+        # Nested lines are indented relative to the current level
+        stream.write(json.dumps(value, indent=indent).replace("\n", "\n" + " " * (indent * level)))
+
+
+def _write_container(stream: TextIO, opening: str, closing: str, items: Iterator, indent: Optional[int], level: int):
+    inner = "" if indent is None else "\n" + " " * (indent * (level + 1))
+    separator = ":" if indent is None else ": "
+    empty = True
+    for key, item in items:
+        stream.write((opening if empty else ",") + inner)
+        empty = False
+        if key is not None:
+            stream.write(key + separator)
+        _write_value(stream, item, indent, level + 1)
+
+    if empty:
+        stream.write(opening + closing)
+    else:
+        stream.write(("" if indent is None else "\n" + " " * (indent * level)) + closing)
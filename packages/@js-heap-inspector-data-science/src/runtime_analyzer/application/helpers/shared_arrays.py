@@ -0,0 +1,97 @@
+import sys
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Picklable description of shared arrays: name -> (shared memory name, shape, dtype)
+SharedArrayDescriptor = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class SharedArrays:
+    """
+    Copies named arrays into shared memory so worker processes can attach to them
+    without pickling.
+
+    The owner unlinks the shared memory on `close`. Use it as a context manager.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        :param arrays: Arrays by name.
+        """
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.descriptor: SharedArrayDescriptor = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                # Shared memory blocks must not be empty
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                self.descriptor[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def detach(self):
+        """
+        Hands the shared memory over to another process: closes it here without unlinking.
+        The receiver becomes the owner, see `take_shared_arrays`.
+        """
+        for block in self._blocks:
+            block.close()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_shared_arrays(descriptor: SharedArrayDescriptor) -> Tuple[Dict[str, np.ndarray],
+                                                                     List[shared_memory.SharedMemory]]:
+    """
+    Attaches to arrays shared by `SharedArrays`.
+
+    Returns the arrays by name and the attached blocks, which have to stay referenced
+    as long as the arrays are used.
+
+    :param descriptor: Descriptor of the shared arrays.
+    """
+    # Only the owner may unlink the blocks (tracking can be disabled since Python 3.13)
+    options = {"track": False} if sys.version_info >= (3, 13) else {}
+
+    arrays: Dict[str, np.ndarray] = {}
+    blocks: List[shared_memory.SharedMemory] = []
+    for name, (block_name, shape, dtype) in descriptor.items():
+        block = shared_memory.SharedMemory(name=block_name, **options)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+def take_shared_arrays(descriptor: SharedArrayDescriptor) -> Dict[str, np.ndarray]:
+    """
+    Takes over arrays detached by another process (see `SharedArrays.detach`): copies
+    them into private memory and unlinks the shared memory.
+
+    :param descriptor: Descriptor of the shared arrays.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (block_name, shape, dtype) in descriptor.items():
+        # Attached with tracking, so unlinking also unregisters the block of the creator
+        block = shared_memory.SharedMemory(name=block_name)
+        try:
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+    return arrays
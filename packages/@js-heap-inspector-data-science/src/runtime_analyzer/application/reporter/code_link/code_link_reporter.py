@@ -1,15 +1,42 @@
-from typing import List, Dict
+import io
+from typing import Iterator, List, Dict, Optional, TextIO
 
 from runtime_analyzer.application.helpers.energy import get_nodes_energy_for_access_metric
+from runtime_analyzer.application.reporter.report_sidecars import ReportSidecars
 from runtime_analyzer.domain.models import Runtime, CodeLinkContainer, CausalPair
 
 
 class CodeLinkReporter:
-    def __init__(self, baseline_runtime: Runtime, modified_runtime: Runtime):
+    def __init__(self, baseline_runtime: Runtime, modified_runtime: Runtime, rank_by_retained_size: bool = False,
+                 top_retainers: int = 20):
+        """
+        Args:
+            baseline_runtime: The baseline Runtime domain model.
+            modified_runtime: The modified Runtime domain model.
+            rank_by_retained_size: Adds the causal pairs with the largest retained size (bytes kept
+                alive via the dominator tree) per file to the report.
+            top_retainers: Number of ranked causal pairs per file.
+        """
         self.baseline_runtime = baseline_runtime
         self.modified_runtime = modified_runtime
+        self.rank_by_retained_size = rank_by_retained_size
+        self.top_retainers = top_retainers
 
     def report(self, container: CodeLinkContainer) -> str:
+        output = io.StringIO()
+        self.write(output, container)
+        return output.getvalue()
+
+    def write(self, stream: TextIO, container: CodeLinkContainer, sidecars: Optional[ReportSidecars] = None):
+        """
+        Writes the report to a stream, one file at a time.
+
+        Args:
+            stream: Text stream to write to.
+            container: Result of the code link stage.
+            sidecars: Sidecar files receiving every causal pair, shown by paginated tables per file.
+                Without, the report only holds the summary tables.
+        """
         # Grouping by fileId
         grouped_by_file: Dict[str, Dict[str, List[CausalPair]]] = {}
 
@@ -25,13 +52,14 @@ class CodeLinkReporter:
                 grouped_by_file[file_id] = {"regressions": [], "improvements": []}
             grouped_by_file[file_id]["improvements"].append(improvement)
 
-        html_output = self._generate_html_header()
+        stream.write(self._generate_html_header())
 
         for file_id, pairs in grouped_by_file.items():
-            html_output += self._generate_file_report(file_id, pairs["regressions"], pairs["improvements"])
+            stream.write(self._generate_file_report(file_id, pairs["regressions"], pairs["improvements"]))
+            if sidecars is not None:
+                stream.write(self._generate_pairs_details(sidecars, pairs["regressions"], pairs["improvements"]))
 
-        html_output += "</body></html>"
-        return html_output
+        stream.write("</body></html>")
 
     def _generate_html_header(self) -> str:
         return """
@@ -74,6 +102,7 @@ class CodeLinkReporter:
 
         regressions_table = self._generate_pairs_table(regressions, "regression")
         improvements_table = self._generate_pairs_table(improvements, "improvement")
+        retainers_table = self._generate_retainers_table(regressions, improvements) if self.rank_by_retained_size else ""
 
         report = f"""
         <div class="file-header">
@@ -107,7 +136,7 @@ class CodeLinkReporter:
                 </tr>
             </tbody>
         </table>
-
+{retainers_table}
         <h3>Modified ({len(regressions)})</h3>
         {regressions_table}
 
@@ -116,6 +145,52 @@ class CodeLinkReporter:
         """
         return report
 
+    def _generate_retainers_table(self, regressions: List[CausalPair], improvements: List[CausalPair]) -> str:
+        modified_tree = self.modified_runtime.to_dominator_tree()
+        baseline_tree = self.baseline_runtime.to_dominator_tree()
+
+        ranked = []
+        for source, pairs, tree in (("Modified", regressions, modified_tree), ("Baseline", improvements, baseline_tree)):
+            for p in pairs:
+                index = tree.graph.node_index.get(p.node_id)
+                if index is not None and index < tree.graph.node_count:
+                    ranked.append((int(tree.retained_size[index]), int(tree.shallow_size[index]), source, p, tree))
+        # Largest retained size first, ties keep the order of the pairs
+        ranked.sort(key=lambda entry: -entry[0])
+
+        rows = ""
+        for retained_size, shallow_size, source, p, tree in ranked[:self.top_retainers]:
+            node_type = tree.graph.strings[tree.graph.node_type[tree.graph.node_index[p.node_id]]]
+            rows += f"""
+                <tr>
+                    <td>{source}</td>
+                    <td>{p.node_id}</td>
+                    <td>{node_type}</td>
+                    <td>{p.confidence}</td>
+                    <td>{retained_size}</td>
+                    <td>{shallow_size}</td>
+                </tr>
+            """
+
+        return f"""
+        <h3>Top Retainers</h3>
+        <table>
+            <thead>
+                <tr>
+                    <th>Source</th>
+                    <th>Node</th>
+                    <th>Type</th>
+                    <th>Confidence</th>
+                    <th>Retained Size</th>
+                    <th>Shallow Size</th>
+                </tr>
+            </thead>
+            <tbody>
+                {rows}
+            </tbody>
+        </table>
+        """
+
     def _generate_pairs_table(self, pairs: List[CausalPair], source: str) -> str:
         if not pairs:
             return "<p>None found.</p>"
@@ -204,3 +279,22 @@ class CodeLinkReporter:
             </tbody>
         </table>
         """
+
+    def _generate_pairs_details(self, sidecars: ReportSidecars, regressions: List[CausalPair],
+                                improvements: List[CausalPair]) -> str:
+        columns = ["Node", "Type", "Confidence", "Modification Type", "Span", "Read Counter", "Write Counter",
+                   "Size"]
+        return (sidecars.table("Modified Causal Pairs", columns, self._pair_rows(regressions, self.modified_runtime))
+                + sidecars.table("Baseline Causal Pairs", columns,
+                                 self._pair_rows(improvements, self.baseline_runtime)))
+
+    @staticmethod
+    def _pair_rows(pairs: List[CausalPair], runtime: Runtime) -> Iterator[list]:
+        for p in pairs:
+            node = runtime.get_node_by_id(p.node_id)
+            span = p.code_evolution.codeChangeSpan
+            energy = node.energy
+            yield [p.node_id, node.type, p.confidence, p.code_evolution.modificationType,
+                   f"L{span.lineStart}:{span.columnStart} - L{span.lineEnd}:{span.columnEnd}",
+                   energy.readCounter if energy else 0, energy.writeCounter if energy else 0,
+                   energy.size if energy else 0]
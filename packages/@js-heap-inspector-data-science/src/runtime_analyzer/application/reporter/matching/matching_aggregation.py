@@ -0,0 +1,199 @@
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from runtime_analyzer.application.helpers.result_writer import MATCHING_CATEGORIES
+from runtime_analyzer.application.services.matching.contracts.differentiation_algorithm import DifferentiationResult
+from runtime_analyzer.domain.models import Runtime, SubgraphResultArrays
+
+# Rows of the access metric columns, summed like `get_nodes_energy_for_access_metric`
+ACCESS_METRICS = ("read_counter", "write_counter", "read_size", "write_size")
+
+
+class RuntimeAccessColumns:
+    """
+    Access metrics, size and type of every node index of a runtime as NumPy columns.
+
+    Node indices are resolved the way `Runtime.get_node_by_id` resolves ids: a duplicate
+    id refers to its last node, and ids without a node (phantom nodes) cannot be resolved.
+    """
+
+    def __init__(self, runtime: Runtime):
+        graph = runtime.to_columnar()
+        node_count = graph.node_count
+        self.graph = graph
+
+        has_energy = graph.energy_mask
+        read_counter = np.where(has_energy, graph.energy_read_counter, 0)
+        write_counter = np.where(has_energy, graph.energy_write_counter, 0)
+        size = np.where(has_energy, graph.energy_size, 0)
+
+        # Phantom nodes carry no attributes
+        self.metrics = np.zeros((len(ACCESS_METRICS), graph.id_count), dtype=np.int64)
+        self.metrics[0, :node_count] = read_counter
+        self.metrics[1, :node_count] = write_counter
+        self.metrics[2, :node_count] = read_counter * size
+        self.metrics[3, :node_count] = size + write_counter * size
+        self.size = np.zeros(graph.id_count, dtype=np.int64)
+        self.size[:node_count] = size
+        self.node_type = graph.node_type[:node_count]
+
+        # Equal ids share their string reference, so the last node per reference resolves an id
+        last_node = np.full(len(graph.strings), -1, dtype=np.int64)
+        np.maximum.at(last_node, graph.node_id[:node_count], np.arange(node_count, dtype=np.int64))
+        self._resolved = last_node[graph.node_id]
+
+    def resolve(self, indices: np.ndarray, missing_ok: bool = False) -> np.ndarray:
+        """
+        Maps node indices to the index of the node their id resolves to.
+
+        Args:
+            indices: Node indices, including phantom nodes.
+            missing_ok: Maps ids without a node to -1 instead of raising a ValueError.
+        """
+        resolved = self._resolved[indices]
+        missing = np.flatnonzero(resolved < 0)
+        if len(missing) and not missing_ok:
+            raise ValueError(f"Node with id {self.graph.node_ids[int(indices[missing[0]])]} not found")
+        return resolved
+
+    def indices_of(self, node_ids: List[str], missing_ok: bool = False) -> np.ndarray:
+        """Node indices of ids, resolved like `resolve`."""
+        node_index = self.graph.node_index
+        indices = np.fromiter((node_index.get(node_id, -1) for node_id in node_ids), dtype=np.int64,
+                              count=len(node_ids))
+        unknown = indices < 0
+        if unknown.any():
+            if not missing_ok:
+                raise ValueError(f"Node with id {node_ids[int(np.flatnonzero(unknown)[0])]} not found")
+            return np.where(unknown, -1, self.resolve(np.where(unknown, 0, indices), missing_ok=True))
+        return self.resolve(indices, missing_ok)
+
+
+class SideAggregation:
+    """
+    Aggregates of the nodes one runtime contributes to the groups of a matching result.
+
+    All categories are reduced together: per group with `np.add.reduceat` over the
+    concatenated node indices, per category over the group sums, and per category and
+    node type with one `np.bincount`.
+    """
+
+    def __init__(self, columns: RuntimeAccessColumns, group_offsets: np.ndarray, indices: np.ndarray,
+                 category_groups: Sequence[int]):
+        """
+        Args:
+            columns: Columns of the runtime.
+            group_offsets: Start of the nodes of every group in `indices`, followed by the total count.
+            indices: Resolved node indices of all groups of all categories, in category order.
+            category_groups: Number of groups per category.
+        """
+        category_offsets = np.zeros(len(category_groups) + 1, dtype=np.int64)
+        np.cumsum(category_groups, out=category_offsets[1:])
+
+        self.group_sums = _segment_sums(columns.metrics[:, indices], group_offsets)
+        self.group_node_counts = np.diff(group_offsets)
+        self.category_sums = _segment_sums(self.group_sums, category_offsets)
+        self.category_node_counts = np.diff(group_offsets[category_offsets])
+        self.category_group_offsets = category_offsets
+
+        # One key per category and node type
+        group_lengths = np.diff(group_offsets)
+        node_category = np.repeat(np.repeat(np.arange(len(category_groups)), category_groups), group_lengths)
+        types, type_of_node = np.unique(columns.node_type[indices], return_inverse=True)
+        keys = node_category * len(types) + type_of_node.reshape(-1)
+        shape = (len(category_groups), len(types))
+        counts = np.bincount(keys, minlength=shape[0] * shape[1]).reshape(shape)
+        # Sizes are summed as float64, exact for totals below 2^53
+        sizes = np.bincount(keys, weights=columns.size[indices], minlength=shape[0] * shape[1]).reshape(shape)
+
+        strings = columns.graph.strings
+        self.node_analytics: List[Dict[str, Dict[str, int]]] = []
+        for category in range(len(category_groups)):
+            self.node_analytics.append({
+                strings[int(types[type_index])]: {"count": int(counts[category, type_index]),
+                                                  "total_size": int(sizes[category, type_index])}
+                for type_index in np.flatnonzero(counts[category]).tolist()
+            })
+
+
+class MatchingAggregation:
+    """Access metrics and node analytics of all groups of a matching result, computed in one pass per runtime."""
+
+    def __init__(self, baseline: RuntimeAccessColumns, modified: RuntimeAccessColumns,
+                 matching_result: DifferentiationResult):
+        indexed = matching_result.to_indexed(baseline.graph, modified.graph)
+        results = [getattr(indexed, category) for category in MATCHING_CATEGORIES]
+        category_groups = [len(category_results) for category_results in results]
+        self.baseline = SideAggregation(baseline, *_gather(results, baseline, "baseline"), category_groups)
+        self.modified = SideAggregation(modified, *_gather(results, modified, "modified"), category_groups)
+
+    def category_totals(self, category: str) -> Dict[str, int]:
+        """Summed access metrics of a category with the keys of MatchingReporterAccessCountResult."""
+        position = MATCHING_CATEGORIES.index(category)
+        totals = {}
+        for side_name, side in (("baseline", self.baseline), ("modified", self.modified)):
+            totals.update((f"{side_name}_{metric}", int(side.category_sums[row, position]))
+                          for row, metric in enumerate(ACCESS_METRICS))
+        return totals
+
+    def group_totals(self, category: str) -> List[Dict[str, Any]]:
+        """Summed access metrics of every group of a category."""
+        position = MATCHING_CATEGORIES.index(category)
+        start, end = self.baseline.category_group_offsets[position:position + 2].tolist()
+        groups = []
+        for group in range(start, end):
+            totals = {}
+            for side_name, side in (("baseline", self.baseline), ("modified", self.modified)):
+                totals.update((f"{side_name}_{metric}", int(side.group_sums[row, group]))
+                              for row, metric in enumerate(ACCESS_METRICS))
+            groups.append(totals)
+        return groups
+
+    def iter_group_rows(self, category: str, block_size: int = 4096) -> Iterator[List[int]]:
+        """
+        Rows of every group of a category: the group index, the node counts of both runtimes and the
+        access metrics in the column order of the report, interleaving baseline and modified.
+        """
+        position = MATCHING_CATEGORIES.index(category)
+        start, end = self.baseline.category_group_offsets[position:position + 2].tolist()
+        # Converted block by block, so the rows of large categories are never all held as lists
+        for block_start in range(start, end, block_size):
+            block = slice(block_start, min(block_start + block_size, end))
+            columns = [np.arange(block.start - start, block.stop - start),
+                       self.baseline.group_node_counts[block], self.modified.group_node_counts[block]]
+            for row in range(len(ACCESS_METRICS)):
+                columns += [self.baseline.group_sums[row, block], self.modified.group_sums[row, block]]
+            yield from np.stack(columns, axis=1).tolist()
+
+    def node_count(self, category: str, side: str) -> int:
+        """Number of node ids a runtime contributes to a category."""
+        return int(getattr(self, side).category_node_counts[MATCHING_CATEGORIES.index(category)])
+
+    def node_analytics(self, category: str, side: str) -> Dict[str, Dict[str, int]]:
+        """Count and total size per node type of the nodes a runtime contributes to a category."""
+        return getattr(self, side).node_analytics[MATCHING_CATEGORIES.index(category)]
+
+
+def _gather(results: List[SubgraphResultArrays], columns: RuntimeAccessColumns, side: str) -> tuple:
+    """Concatenates the resolved node indices of one runtime over all groups of all categories."""
+    offsets, indices = [np.zeros(1, dtype=np.int64)], []
+    total = 0
+    for category_results in results:
+        category_offsets = getattr(category_results, f"{side}_offsets")
+        category_indices = columns.resolve(getattr(category_results, f"{side}_indices"))
+        offsets.append(category_offsets[1:] + total)
+        indices.append(category_indices)
+        total += len(category_indices)
+    return np.concatenate(offsets), np.concatenate(indices).astype(np.int64, copy=False)
+
+
+def _segment_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Sums the columns of `values` within every segment `offsets[i]:offsets[i + 1]`; empty segments sum to 0."""
+    sums = np.zeros((values.shape[0], len(offsets) - 1), dtype=values.dtype)
+    starts = offsets[:-1]
+    non_empty = np.flatnonzero(np.diff(offsets) > 0)
+    if len(non_empty):
+        # Empty segments in between have no values, so every reduction ends at the next non-empty start
+        sums[:, non_empty] = np.add.reduceat(values, starts[non_empty], axis=1)
+    return sums
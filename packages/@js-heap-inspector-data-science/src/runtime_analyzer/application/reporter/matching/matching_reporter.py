@@ -1,8 +1,12 @@
-from typing import List, Dict, Any
+import io
+from typing import List, Dict, Any, Optional, Tuple, TextIO
 
 
-from runtime_analyzer.application.helpers import get_nodes_total_energy_difference_for_access_metric
-from runtime_analyzer.application.helpers.energy import get_nodes_energy_for_access_metric
+from runtime_analyzer.application.helpers.result_writer import MATCHING_CATEGORIES
+from runtime_analyzer.application.reporter.matching.matching_aggregation import MatchingAggregation, \
+    RuntimeAccessColumns
+from runtime_analyzer.application.reporter.report_sidecars import ReportSidecars
+from runtime_analyzer.application.services.matching.contracts.differentiation_algorithm import DifferentiationResult
 from runtime_analyzer.domain.models import MatchingResult, MatchSubgraphResult, ModificationSubgraphResult, \
     DeltaSubgraphResult, Runtime, MatchingReporterAccessCountResult
 from runtime_analyzer.domain.models import Node
@@ -12,61 +16,74 @@ class MatchingReporter:
     def __init__(self, baseline_runtime: Runtime, modified_runtime: Runtime):
         self.baseline_runtime = baseline_runtime
         self.modified_runtime = modified_runtime
+        self._columns: Optional[Tuple[RuntimeAccessColumns, RuntimeAccessColumns]] = None
 
-    def report(self, matching_result: MatchingResult) -> str:
-        return self.present_total_access_count_as_html(matching_result)
+    def report(self, matching_result: DifferentiationResult) -> str:
+        output = io.StringIO()
+        self.write(output, matching_result)
+        return output.getvalue()
 
-    def present_total_access_count_as_html(self, matching_result: MatchingResult):
-        matched_elements_access_count = self.analyze_matched_elements_access_count(matching_result.matched)
-        modified_elements_access_count = self.analyze_modified_elements_access_count(matching_result.modified)
-        added_elements_access_count = self.analyze_added_elements_access_count(matching_result.added_node_ids)
-        removed_elements_access_count = self.analyze_removed_elements_access_count(matching_result.removed_node_ids)
+    def write(self, stream: TextIO, matching_result: DifferentiationResult, sidecars: Optional[ReportSidecars] = None):
+        """
+        Writes the report to a stream, section by section.
+
+        Args:
+            stream: Text stream to write to.
+            matching_result: Result of the matching stage.
+            sidecars: Sidecar files receiving the access metrics of every group, shown by paginated
+                tables below the summary. Without, the report only holds the summary tables.
+        """
+        aggregation = self.aggregate(matching_result)
+        stream.write(self._present_aggregation_as_html(aggregation))
+        if sidecars is None:
+            return
 
-        total_matched = self.get_total_access_count(matched_elements_access_count)
-        total_modified = self.get_total_access_count(modified_elements_access_count)
-        total_added = self.get_total_access_count(added_elements_access_count)
-        total_removed = self.get_total_access_count(removed_elements_access_count)
+        columns = ["Group", "Nodes (Baseline)", "Nodes (Modified)", "Read Counter Baseline",
+                   "Read Counter Modified", "Write Counter Baseline", "Write Counter Modified",
+                   "Read Size Baseline", "Read Size Modified", "Write Size Baseline", "Write Size Modified"]
+        for category, title in zip(MATCHING_CATEGORIES, ("Matched", "Modified", "Added", "Removed")):
+            stream.write(sidecars.table(f"{title} Groups", columns, aggregation.iter_group_rows(category)))
 
-        node_count_matched_baseline = sum(len(m.nodes_baseline_id) for m in matching_result.matched)
-        node_count_matched_modified = sum(len(m.nodes_modified_id) for m in matching_result.matched)
+    def present_total_access_count_as_html(self, matching_result: DifferentiationResult):
+        return self._present_aggregation_as_html(self.aggregate(matching_result))
 
-        node_count_modified_baseline = sum(len(m.nodes_baseline_id) for m in matching_result.modified)
-        node_count_modified_modified = sum(len(m.nodes_modified_id) for m in matching_result.modified)
+    def _present_aggregation_as_html(self, aggregation: MatchingAggregation) -> str:
+        total_matched = MatchingReporterAccessCountResult(**aggregation.category_totals("matched"))
+        total_modified = MatchingReporterAccessCountResult(**aggregation.category_totals("modified"))
+        total_added = MatchingReporterAccessCountResult(**aggregation.category_totals("added_node_ids"))
+        total_removed = MatchingReporterAccessCountResult(**aggregation.category_totals("removed_node_ids"))
 
-        node_count_added_baseline = sum(len(m.nodes_baseline_id) for m in matching_result.added_node_ids)
-        node_count_added_modified = sum(len(m.nodes_modified_id) for m in matching_result.added_node_ids)
+        node_count_matched_baseline = aggregation.node_count("matched", "baseline")
+        node_count_matched_modified = aggregation.node_count("matched", "modified")
 
-        node_count_removed_baseline = sum(len(m.nodes_baseline_id) for m in matching_result.removed_node_ids)
-        node_count_removed_modified = sum(len(m.nodes_modified_id) for m in matching_result.removed_node_ids)
+        node_count_modified_baseline = aggregation.node_count("modified", "baseline")
+        node_count_modified_modified = aggregation.node_count("modified", "modified")
 
-        matched_node_ids_baseline = [node_id for m in matching_result.matched for node_id in m.nodes_baseline_id]
-        matched_node_ids_modified = [node_id for m in matching_result.matched for node_id in m.nodes_modified_id]
-        modified_node_ids_baseline = [node_id for m in matching_result.modified for node_id in m.nodes_baseline_id]
-        modified_node_ids_modified = [node_id for m in matching_result.modified for node_id in m.nodes_modified_id]
-        added_node_ids_baseline = [node_id for m in matching_result.added_node_ids for node_id in m.nodes_baseline_id]
-        added_node_ids_modified = [node_id for m in matching_result.added_node_ids for node_id in m.nodes_modified_id]
-        removed_node_ids_baseline = [node_id for m in matching_result.removed_node_ids for node_id in m.nodes_baseline_id]
-        removed_node_ids_modified = [node_id for m in matching_result.removed_node_ids for node_id in m.nodes_modified_id]
+        node_count_added_baseline = aggregation.node_count("added_node_ids", "baseline")
+        node_count_added_modified = aggregation.node_count("added_node_ids", "modified")
+
+        node_count_removed_baseline = aggregation.node_count("removed_node_ids", "baseline")
+        node_count_removed_modified = aggregation.node_count("removed_node_ids", "modified")
 
         matched_analytics_html = self._present_node_analytics_as_html(
             "Matched Elements Analytics",
-            self._get_node_analytics(matched_node_ids_baseline, self.baseline_runtime),
-            self._get_node_analytics(matched_node_ids_modified, self.modified_runtime)
+            aggregation.node_analytics("matched", "baseline"),
+            aggregation.node_analytics("matched", "modified")
         )
         modified_analytics_html = self._present_node_analytics_as_html(
             "Modified Elements Analytics",
-            self._get_node_analytics(modified_node_ids_baseline, self.baseline_runtime),
-            self._get_node_analytics(modified_node_ids_modified, self.modified_runtime)
+            aggregation.node_analytics("modified", "baseline"),
+            aggregation.node_analytics("modified", "modified")
         )
         added_analytics_html = self._present_node_analytics_as_html(
             "Added Elements Analytics",
-            self._get_node_analytics(added_node_ids_baseline, self.baseline_runtime),
-            self._get_node_analytics(added_node_ids_modified, self.modified_runtime)
+            aggregation.node_analytics("added_node_ids", "baseline"),
+            aggregation.node_analytics("added_node_ids", "modified")
         )
         removed_analytics_html = self._present_node_analytics_as_html(
             "Removed Elements Analytics",
-            self._get_node_analytics(removed_node_ids_baseline, self.baseline_runtime),
-            self._get_node_analytics(removed_node_ids_modified, self.modified_runtime)
+            aggregation.node_analytics("removed_node_ids", "baseline"),
+            aggregation.node_analytics("removed_node_ids", "modified")
         )
 
         return f"""
@@ -159,17 +176,6 @@ class MatchingReporter:
         {removed_analytics_html}
         """
 
-    def _get_node_analytics(self, node_ids: List[str], runtime: Runtime) -> Dict[str, Dict[str, Any]]:
-        analytics = {}
-        for node_id in node_ids:
-            node = runtime.get_node_by_id(node_id)
-            if node.type not in analytics:
-                analytics[node.type] = {"count": 0, "total_size": 0}
-            analytics[node.type]["count"] += 1
-            if node.energy:
-                analytics[node.type]["total_size"] += node.energy.size
-        return analytics
-
     def _present_node_analytics_as_html(self, title: str, baseline_analytics: Dict[str, Dict[str, Any]],
                                        modified_analytics: Dict[str, Dict[str, Any]]) -> str:
         all_types = sorted(set(baseline_analytics.keys()) | set(modified_analytics.keys()))
@@ -227,110 +233,35 @@ class MatchingReporter:
         
         return total
 
+    def aggregate(self, matching_result: DifferentiationResult) -> MatchingAggregation:
+        """Aggregates the access metrics and node analytics of all groups in one pass per runtime."""
+        if self._columns is None:
+            self._columns = (RuntimeAccessColumns(self.baseline_runtime), RuntimeAccessColumns(self.modified_runtime))
+        return MatchingAggregation(*self._columns, matching_result)
+
     def analyze_matched_elements_access_count(self, matched_elements: List[MatchSubgraphResult]) -> dict[
         int, MatchingReporterAccessCountResult]:
-        subgraphs: dict[int, MatchingReporterAccessCountResult] = {}
-
-        for index, match in enumerate(matched_elements):
-            # negative values indicate an improvement
-            baseline_nodes = self.get_nodes_from_baseline(match.nodes_baseline_id)
-            (baseline_read_counter, baseline_write_counter, baseline_read_size,
-             baseline_write_size) = get_nodes_energy_for_access_metric(baseline_nodes)
-
-            modified_nodes = self.get_nodes_from_modified(match.nodes_modified_id)
-            (modified_read_counter, modified_write_counter, modified_read_size,
-             modified_write_size) = get_nodes_energy_for_access_metric(modified_nodes)
-
-            subgraphs[index] = MatchingReporterAccessCountResult(
-                baseline_read_counter=baseline_read_counter,
-                baseline_write_counter=baseline_write_counter,
-                baseline_read_size=baseline_read_size,
-                baseline_write_size=baseline_write_size,
-                modified_read_counter=modified_read_counter,
-                modified_write_counter=modified_write_counter,
-                modified_read_size=modified_read_size,
-                modified_write_size=modified_write_size
-            )
-
-        return subgraphs
+        return self._analyze_access_count("matched", matched_elements)
 
     def analyze_modified_elements_access_count(self, modified_elements: List[ModificationSubgraphResult]) -> dict[
         int, MatchingReporterAccessCountResult]:
-        subgraphs: dict[int, MatchingReporterAccessCountResult] = {}
-
-        for index, modification in enumerate(modified_elements):
-            baseline_nodes = self.get_nodes_from_baseline(modification.nodes_baseline_id)
-            (baseline_read_counter, baseline_write_counter, baseline_read_size,
-             baseline_write_size) = get_nodes_energy_for_access_metric(baseline_nodes)
-
-            modified_nodes = self.get_nodes_from_modified(modification.nodes_modified_id)
-            (modified_read_counter, modified_write_counter, modified_read_size,
-             modified_write_size) = get_nodes_energy_for_access_metric(modified_nodes)
-
-            subgraphs[index] = MatchingReporterAccessCountResult(
-                baseline_read_counter=baseline_read_counter,
-                baseline_write_counter=baseline_write_counter,
-                baseline_read_size=baseline_read_size,
-                baseline_write_size=baseline_write_size,
-                modified_read_counter=modified_read_counter,
-                modified_write_counter=modified_write_counter,
-                modified_read_size=modified_read_size,
-                modified_write_size=modified_write_size
-            )
-
-        return subgraphs
+        return self._analyze_access_count("modified", modified_elements)
 
     def analyze_added_elements_access_count(self, added_elements: List[DeltaSubgraphResult]) -> dict[
         int, MatchingReporterAccessCountResult]:
-        subgraphs: dict[int, MatchingReporterAccessCountResult] = {}
-
-        for index, addition in enumerate(added_elements):
-            baseline_nodes = self.get_nodes_from_baseline(addition.nodes_baseline_id)
-            (baseline_read_counter, baseline_write_counter, baseline_read_size,
-             baseline_write_size) = get_nodes_energy_for_access_metric(baseline_nodes)
-
-            modified_nodes = self.get_nodes_from_modified(addition.nodes_modified_id)
-            (modified_read_counter, modified_write_counter, modified_read_size,
-             modified_write_size) = get_nodes_energy_for_access_metric(modified_nodes)
-
-            subgraphs[index] = MatchingReporterAccessCountResult(
-                baseline_read_counter=baseline_read_counter,
-                baseline_write_counter=baseline_write_counter,
-                baseline_read_size=baseline_read_size,
-                baseline_write_size=baseline_write_size,
-                modified_read_counter=modified_read_counter,
-                modified_write_counter=modified_write_counter,
-                modified_read_size=modified_read_size,
-                modified_write_size=modified_write_size
-            )
-
-        return subgraphs
+        return self._analyze_access_count("added_node_ids", added_elements)
 
     def analyze_removed_elements_access_count(self, removed_elements: List[DeltaSubgraphResult]) -> dict[
         int, MatchingReporterAccessCountResult]:
-        subgraphs: dict[int, MatchingReporterAccessCountResult] = {}
-
-        for index, removal in enumerate(removed_elements):
-            baseline_nodes = self.get_nodes_from_baseline(removal.nodes_baseline_id)
-            (baseline_read_counter, baseline_write_counter, baseline_read_size,
-             baseline_write_size) = get_nodes_energy_for_access_metric(baseline_nodes)
-
-            modified_nodes = self.get_nodes_from_modified(removal.nodes_modified_id)
-            (modified_read_counter, modified_write_counter, modified_read_size,
-             modified_write_size) = get_nodes_energy_for_access_metric(modified_nodes)
-
-            subgraphs[index] = MatchingReporterAccessCountResult(
-                baseline_read_counter=baseline_read_counter,
-                baseline_write_counter=baseline_write_counter,
-                baseline_read_size=baseline_read_size,
-                baseline_write_size=baseline_write_size,
-                modified_read_counter=modified_read_counter,
-                modified_write_counter=modified_write_counter,
-                modified_read_size=modified_read_size,
-                modified_write_size=modified_write_size
-            )
-
-        return subgraphs
+        return self._analyze_access_count("removed_node_ids", removed_elements)
+
+    def _analyze_access_count(self, category: str, elements: list) -> dict[int, MatchingReporterAccessCountResult]:
+        # negative differences between modified and baseline indicate an improvement
+        results = {name: [] for name in MATCHING_CATEGORIES}
+        results[category] = elements
+        aggregation = self.aggregate(MatchingResult.model_construct(**results))
+        return {index: MatchingReporterAccessCountResult(**totals)
+                for index, totals in enumerate(aggregation.group_totals(category))}
 
     def get_nodes_from_baseline(self, node_ids: list[str]) -> list[Node]:
         return [self.baseline_runtime.get_node_by_id(node_id) for node_id in node_ids]
@@ -0,0 +1,134 @@
+import html
+import json
+import os
+from typing import Any, Iterable, List, Sequence
+
+# Loads the chunks of a detail table on demand and shows one chunk per page. Chunks are
+# JSONP scripts, so reports opened from the file system can load them without a server.
+_VIEWER_SCRIPT = """
+        <script>
+        (function () {
+            var tables = {};
+            window.reportChunkLoaded = function (id, chunk, rows) {
+                var table = tables[id];
+                if (table && table.page === chunk) {
+                    table.rows = rows;
+                    render(table);
+                }
+            };
+            function render(table) {
+                var body = document.createElement("tbody");
+                table.rows.forEach(function (row) {
+                    var tr = body.insertRow();
+                    row.forEach(function (value) { tr.insertCell().textContent = value; });
+                });
+                table.element.querySelector("table").replaceChild(body, table.element.querySelector("tbody"));
+                table.element.querySelector(".page").textContent =
+                    "Page " + (table.page + 1) + " of " + table.chunks + " (" + table.rowCount + " rows)";
+            }
+            function load(table, page) {
+                if (page < 0 || page >= table.chunks) return;
+                table.page = page;
+                table.element.querySelector(".page").textContent = "Loading page " + (page + 1) + "…";
+                var script = document.createElement("script");
+                script.src = encodeURIComponent(table.directory) + "/" + table.id + "-" + page + ".js";
+                script.onload = function () { script.remove(); };
+                script.onerror = function () {
+                    script.remove();
+                    table.element.querySelector(".page").textContent = "Could not load " + script.src;
+                };
+                document.head.appendChild(script);
+            }
+            window.reportTable = function (id, directory, chunks, rowCount) {
+                var element = document.getElementById(id);
+                var table = {id: id, directory: directory, chunks: chunks, rowCount: rowCount, element: element,
+                             page: -1, rows: []};
+                tables[id] = table;
+                element.querySelector(".previous").onclick = function () { load(table, table.page - 1); };
+                element.querySelector(".next").onclick = function () { load(table, table.page + 1); };
+                // Nothing is loaded before the details are opened
+                element.addEventListener("toggle", function () {
+                    if (element.open && table.page < 0) load(table, 0);
+                });
+            };
+        })();
+        </script>
+"""
+
+
+class ReportSidecars:
+    """
+    Detail tables of an HTML report, with their rows split into chunk files next to the report.
+
+    Rows are written to `<report>-data/<table>-<chunk>.js` while they are produced, so neither
+    the report nor the process holds all of them. The report only contains a collapsed,
+    paginated viewer per table that loads one chunk per page when it is opened.
+    """
+
+    def __init__(self, report_path: str, chunk_rows: int = 1000):
+        """
+        :param report_path: Path of the HTML report.
+        :param chunk_rows: Number of rows per chunk file and viewer page.
+        """
+        self.directory = f"{os.path.splitext(report_path)[0]}-data"
+        self.chunk_rows = max(1, chunk_rows)
+        self._tables = 0
+        self._viewer_written = False
+        os.makedirs(self.directory, exist_ok=True)
+        # Chunks of a previous report would otherwise stay next to the new ones
+        for name in os.listdir(self.directory):
+            if name.startswith("detail-") and name.endswith(".js"):
+                os.remove(os.path.join(self.directory, name))
+
+    def table(self, title: str, columns: Sequence[str], rows: Iterable[List[Any]]) -> str:
+        """
+        Writes the rows of a detail table into chunk files and returns the HTML of its viewer.
+
+        :param title: Title shown on the collapsed table.
+        :param columns: Column headers.
+        :param rows: Rows of JSON serializable cell values.
+        """
+        table_id = f"detail-{self._tables}"
+        self._tables += 1
+
+        chunks, row_count, chunk = 0, 0, []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.chunk_rows:
+                self._write_chunk(table_id, chunks, chunk)
+                chunks, row_count, chunk = chunks + 1, row_count + len(chunk), []
+        if chunk:
+            self._write_chunk(table_id, chunks, chunk)
+            chunks, row_count = chunks + 1, row_count + len(chunk)
+        if not row_count:
+            return ""
+
+        viewer = "" if self._viewer_written else _VIEWER_SCRIPT
+        self._viewer_written = True
+        headers = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        directory = _script_literal(os.path.basename(self.directory))
+        return f"""{viewer}
+        <details id="{table_id}">
+            <summary>{html.escape(title)} ({row_count})</summary>
+            <button class="previous">Previous</button>
+            <span class="page"></span>
+            <button class="next">Next</button>
+            <table>
+                <thead><tr>{headers}</tr></thead>
+                <tbody></tbody>
+            </table>
+        </details>
+        <script>reportTable("{table_id}", {directory}, {chunks}, {row_count});</script>
+        """
+
+    def _write_chunk(self, table_id: str, chunk_index: int, rows: List[List[Any]]):
+        path = os.path.join(self.directory, f"{table_id}-{chunk_index}.js")
+        with open(path, 'w') as f:
+            f.write(f'reportChunkLoaded("{table_id}", {chunk_index}, ')
+            f.write(_script_literal(rows))
+            f.write(");\n")
+
+
+def _script_literal(value: Any) -> str:
+    """JSON of a value that can be embedded in a script element; "</" would end the element."""
+    return json.dumps(value, separators=(",", ":")).replace("</", "<\\/")
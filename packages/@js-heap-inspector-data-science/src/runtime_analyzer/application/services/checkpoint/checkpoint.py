@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ....domain.models import Runtime, ColumnarRuntime, SubgraphPartition, IndexedMatchingResult, \
+    SubgraphResultArrays, ModificationSubgraphResult, CodeLinkContainer, CausalPair, CodeEvolution
+from ..matching.contracts.differentiation_algorithm import DifferentiationResult
+from ...helpers.array_store import encode_strings, decode_strings, write_arrays, read_arrays
+
+# Bump whenever the persisted layout of a stage output changes
+SCHEMA_VERSION = 1
+
+_MANIFEST_FILE = "manifest.json"
+_PARTITION_COLUMNS = ("center_index", "node_offsets", "node_indices", "edge_offsets", "edge_indices")
+_RESULT_COLUMNS = ("baseline_offsets", "baseline_indices", "modified_offsets", "modified_indices")
+_LINK_LISTS = ("regressions", "improvements", "unmappable_regressions", "unmappable_improvements")
+
+
+class CheckpointService:
+    """
+    Persists the output of every stage of a comparison, so an interrupted or repeated run
+    resumes after the last finished stage.
+
+    Every stage output is stored under a key that hashes the keys of its inputs together
+    with the algorithm and parameters of the stage: subgraphs depend on the runtime
+    content, the matching result on the subgraphs of both runtimes, and the code links
+    on the matching result and the code evolutions. Changing the parameters of a stage
+    therefore only invalidates that stage and the ones after it.
+
+    Outputs are stored as `.npy` index arrays into the runtimes (see SubgraphPartition
+    and IndexedMatchingResult) next to a small JSON manifest.
+    """
+
+    def __init__(self, checkpoint_dir: str):
+        """
+        Args:
+            checkpoint_dir: Directory holding the stage outputs. Created if missing.
+        """
+        self.checkpoint_dir = checkpoint_dir
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    @staticmethod
+    def runtime_key(runtime: Runtime) -> str:
+        """Content hash of a runtime, computed from its columnar representation."""
+        columnar = runtime.to_columnar()
+        digest = hashlib.sha256(f"runtime-v{SCHEMA_VERSION}:{columnar.node_count}".encode())
+        for name in ColumnarRuntime.COLUMNS:
+            column = np.ascontiguousarray(getattr(columnar, name))
+            digest.update(f"{name}:{column.dtype.str}:{column.shape}".encode())
+            digest.update(column.data)
+        for array in encode_strings(columnar.strings):
+            digest.update(array.data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def stage_key(stage: str, inputs: Sequence[str], algorithm: type, params: Optional[dict] = None) -> str:
+        """
+        Key of a stage output.
+
+        Args:
+            stage: Name of the stage.
+            inputs: Keys of the stage inputs.
+            algorithm: Algorithm class of the stage.
+            params: Parameters of the algorithm.
+        """
+        description = {
+            "stage": stage,
+            "schema_version": SCHEMA_VERSION,
+            "inputs": list(inputs),
+            "algorithm": f"{algorithm.__module__}.{algorithm.__qualname__}",
+            "params": params or {},
+        }
+        encoded = json.dumps(description, sort_keys=True, default=repr)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def load_subgraphs(self, key: str, runtime: Runtime) -> Optional[SubgraphPartition]:
+        """Loads the subgraphs of a runtime, None if they were not stored."""
+        entry = self._read("subgraphs", key, _PARTITION_COLUMNS)
+        if entry is None:
+            return None
+        return SubgraphPartition(runtime, **entry[1])
+
+    def save_subgraphs(self, key: str, runtime: Runtime, subgraphs):
+        """Stores the subgraphs of a runtime, given as SubgraphPartition or list of Subgraphs."""
+        if not isinstance(subgraphs, SubgraphPartition):
+            subgraphs = SubgraphPartition.from_subgraphs(runtime, subgraphs)
+        self._write("subgraphs", key, {name: getattr(subgraphs, name) for name in _PARTITION_COLUMNS})
+
+    def load_matching(self, key: str, baseline: Runtime, modified: Runtime) -> Optional[IndexedMatchingResult]:
+        """Loads a matching result of both runtimes, None if it was not stored."""
+        names = [f"{category}.{column}" for category, _ in IndexedMatchingResult.CATEGORIES
+                 for column in _RESULT_COLUMNS]
+        names.append("modified.similarity_score")
+        entry = self._read("matching", key, names)
+        if entry is None:
+            return None
+
+        manifest, arrays = entry
+        ids = (baseline.to_columnar().node_ids, modified.to_columnar().node_ids)
+        categories = {}
+        for category, result_type in IndexedMatchingResult.CATEGORIES:
+            columns = [arrays[f"{category}.{column}"] for column in _RESULT_COLUMNS]
+            similarity_score = arrays["modified.similarity_score"] \
+                if result_type is ModificationSubgraphResult and manifest["has_similarity_score"] else None
+            categories[category] = SubgraphResultArrays(result_type, *ids, *columns, similarity_score=similarity_score)
+        return IndexedMatchingResult(**categories)
+
+    def save_matching(self, key: str, baseline: Runtime, modified: Runtime, result: DifferentiationResult):
+        """Stores a matching result of both runtimes, given as IndexedMatchingResult or MatchingResult."""
+        result = result.to_indexed(baseline.to_columnar(), modified.to_columnar())
+        arrays = {}
+        for category, _ in IndexedMatchingResult.CATEGORIES:
+            results = getattr(result, category)
+            arrays.update((f"{category}.{column}", getattr(results, column)) for column in _RESULT_COLUMNS)
+        similarity_score = result.modified.similarity_score
+        arrays["modified.similarity_score"] = np.empty(0, dtype=np.float64) \
+            if similarity_score is None else similarity_score
+        self._write("matching", key, arrays, {"has_similarity_score": similarity_score is not None})
+
+    def load_code_links(self, key: str) -> Optional[CodeLinkContainer]:
+        """Loads a code link container, None if it was not stored."""
+        entry = self._read("code_link", key, ("node_ids_blob", "node_ids_offsets", "evolution", "confidence"),
+                           mmap=False)
+        if entry is None:
+            return None
+
+        manifest, arrays = entry
+        node_ids = decode_strings(arrays["node_ids_blob"], arrays["node_ids_offsets"])
+        evolutions = [CodeEvolution.model_validate(evolution) for evolution in manifest["evolutions"]]
+        confidences = manifest["confidences"]
+        pair_evolutions, pair_confidences = arrays["evolution"].tolist(), arrays["confidence"].tolist()
+
+        lists: Dict[str, list] = {}
+        start = 0
+        for name in _LINK_LISTS:
+            end = start + manifest["counts"][name]
+            if name.startswith("unmappable_"):
+                lists[name] = node_ids[start:end]
+            else:
+                lists[name] = [CausalPair.model_construct(node_id=node_ids[i],
+                                                          code_evolution=evolutions[pair_evolutions[i]],
+                                                          confidence=confidences[pair_confidences[i]])
+                               for i in range(start, end)]
+            start = end
+        return CodeLinkContainer.model_construct(**lists)
+
+    def save_code_links(self, key: str, links: CodeLinkContainer):
+        """Stores a code link container."""
+        node_ids: List[str] = []
+        evolution_positions: Dict[int, int] = {}
+        evolutions: List[Dict[str, Any]] = []
+        confidences: List[str] = []
+        pair_evolutions: List[int] = []
+        pair_confidences: List[int] = []
+
+        for pair in links.regressions + links.improvements:
+            node_ids.append(pair.node_id)
+            # Pairs share the evolution models of the code evolution lists
+            position = evolution_positions.get(id(pair.code_evolution))
+            if position is None:
+                position = evolution_positions[id(pair.code_evolution)] = len(evolutions)
+                evolutions.append(pair.code_evolution.model_dump())
+            pair_evolutions.append(position)
+            if pair.confidence not in confidences:
+                confidences.append(pair.confidence)
+            pair_confidences.append(confidences.index(pair.confidence))
+        node_ids.extend(links.unmappable_regressions)
+        node_ids.extend(links.unmappable_improvements)
+
+        blob, offsets = encode_strings(node_ids)
+        arrays = {
+            "node_ids_blob": blob,
+            "node_ids_offsets": offsets,
+            "evolution": np.asarray(pair_evolutions, dtype=np.int32),
+            "confidence": np.asarray(pair_confidences, dtype=np.uint8),
+        }
+        manifest = {
+            "counts": {name: len(getattr(links, name)) for name in _LINK_LISTS},
+            "evolutions": evolutions,
+            "confidences": confidences,
+        }
+        self._write("code_link", key, arrays, manifest)
+
+    def _read(self, stage: str, key: str, names: Sequence[str],
+              mmap: bool = True) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """Reads the manifest and arrays of a stage output. Broken outputs are dropped."""
+        entry_dir = os.path.join(self.checkpoint_dir, f"{stage}-{key}")
+        manifest_path = os.path.join(entry_dir, _MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("schema_version") != SCHEMA_VERSION:
+                raise ValueError("Schema version mismatch")
+            return manifest, read_arrays(entry_dir, names, mmap=mmap)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def _write(self, stage: str, key: str, arrays: Dict[str, np.ndarray], manifest: Optional[dict] = None):
+        entry_dir = os.path.join(self.checkpoint_dir, f"{stage}-{key}")
+        if os.path.isdir(entry_dir):
+            return
+
+        # Write into a temporary directory first, so an interrupted run never leaves a partial output
+        temp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.checkpoint_dir)
+        try:
+            write_arrays(temp_dir, arrays)
+            with open(os.path.join(temp_dir, _MANIFEST_FILE), 'w') as f:
+                json.dump({"schema_version": SCHEMA_VERSION, **(manifest or {})}, f)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Another run stored the same output in the meantime
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
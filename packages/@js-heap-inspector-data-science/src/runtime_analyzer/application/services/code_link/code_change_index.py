@@ -0,0 +1,103 @@
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple, Union
+
+from ....domain.models import CodeEvolution, Stack
+
+# Position inside a file: a line, or a (line, column) pair if columns are considered
+Position = Union[int, Tuple[int, int]]
+
+
+class _FileIntervals:
+    """
+    Code changes of one file as sorted elementary segments.
+
+    The boundaries of all spans split the file into segments. Every segment stores the
+    earliest change covering it, so a lookup is a single binary search.
+    """
+
+    def __init__(self, spans: List[Tuple[Position, Position, CodeEvolution]]):
+        """
+        Args:
+            spans: (start, exclusive end, change) in order of precedence.
+        """
+        self.boundaries: List[Position] = sorted({point for start, end, _ in spans if start < end
+                                                  for point in (start, end)})
+        self.owners: List[Optional[CodeEvolution]] = [None] * max(0, len(self.boundaries) - 1)
+
+        # Earlier changes win: paint every segment once, skipping painted ones (union-find)
+        skip = list(range(len(self.owners) + 1))
+
+        def next_unpainted(i: int) -> int:
+            root = i
+            while skip[root] != root:
+                root = skip[root]
+            while skip[i] != root:
+                skip[i], i = root, skip[i]
+            return root
+
+        for start, end, change in spans:
+            if start >= end:
+                continue
+            segment = next_unpainted(bisect_right(self.boundaries, start) - 1)
+            last = bisect_right(self.boundaries, end) - 1
+            while segment < last:
+                self.owners[segment] = change
+                skip[segment] = segment + 1
+                segment = next_unpainted(segment + 1)
+
+    def lookup(self, position: Position) -> Optional[CodeEvolution]:
+        segment = bisect_right(self.boundaries, position) - 1
+        if 0 <= segment < len(self.owners):
+            return self.owners[segment]
+        return None
+
+
+class CodeChangeIndex:
+    """
+    Per-file interval index over the code changes of one context.
+
+    A stack frame matches a change if the change's fileId is part of the frame's script
+    name and the frame's line lies within the change span. Files are checked in order
+    of their first appearance and changes of a file in list order; the first match wins.
+    Script names are resolved to the matching files once, so each frame lookup is a
+    binary search per matching file.
+    """
+
+    def __init__(self, code_changes: List[CodeEvolution], use_column_span: bool = False):
+        """
+        Args:
+            code_changes: Code changes of the context.
+            use_column_span: Also require the frame column to lie within the span, i.e.
+                (lineStart, columnStart) <= (line, column) <= (lineEnd, columnEnd).
+        """
+        self.use_column_span = use_column_span
+
+        spans_by_file: Dict[str, List[Tuple[Position, Position, CodeEvolution]]] = {}
+        for change in code_changes:
+            span = change.codeChangeSpan
+            if use_column_span:
+                start, end = (span.lineStart, span.columnStart), (span.lineEnd, span.columnEnd + 1)
+            else:
+                start, end = span.lineStart, span.lineEnd + 1
+            spans_by_file.setdefault(change.fileId, []).append((start, end, change))
+
+        self.file_ids: List[str] = list(spans_by_file)
+        self._files = [_FileIntervals(spans_by_file[file_id]) for file_id in self.file_ids]
+        self._script_files: Dict[str, List[_FileIntervals]] = {}
+
+    def files_for_script(self, script_name: str) -> List[_FileIntervals]:
+        """Files whose fileId is contained in the script name, in file order."""
+        files = self._script_files.get(script_name)
+        if files is None:
+            files = [intervals for file_id, intervals in zip(self.file_ids, self._files) if file_id in script_name]
+            self._script_files[script_name] = files
+        return files
+
+    def match(self, frame: Stack) -> Optional[CodeEvolution]:
+        """Returns the first code change intersecting the stack frame."""
+        position = (frame.lineNumber, frame.columnNumber) if self.use_column_span else frame.lineNumber
+        for intervals in self.files_for_script(frame.scriptName):
+            change = intervals.lookup(position)
+            if change is not None:
+                return change
+        return None
@@ -1,13 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import List
-from .....domain.models import MatchingResult, CodeLinkContainer, CodeEvolution, Runtime
+from .....domain.models import CodeLinkContainer, CodeEvolution, Runtime
+from ...matching.contracts.differentiation_algorithm import DifferentiationResult
 
 class CodeLinkAlgorithm(ABC):
     """
     Abstract base class for code link algorithms.
     """
 
-    def __init__(self, matching_result: MatchingResult, runtime_baseline: Runtime, code_changes_baseline: List[CodeEvolution], runtime_modified: Runtime, code_changes_modified: List[CodeEvolution], **kwargs):
+    def __init__(self, matching_result: DifferentiationResult, runtime_baseline: Runtime, code_changes_baseline: List[CodeEvolution], runtime_modified: Runtime, code_changes_modified: List[CodeEvolution], **kwargs):
         """
         Initializes the service with a specific matching algorithm.
         
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional
+
+from ....domain.models import CodeEvolution, ColumnarRuntime
+
+
+class DerivedLinkageIndex:
+    """
+    Nearest causally linked retainer of every node of a runtime (Derived Linkage).
+
+    A node inherits the code change of the closest linked node on its retainer chain,
+    at most `max_distance` retainer steps away. Among equally close linked nodes the
+    one a BFS over the retainer lists (in edge order) reaches first wins.
+
+    Instead of a BFS per node, the distance to the nearest linked node is propagated
+    once from all linked nodes along the edges. A node at distance d then finds its
+    winner by repeatedly stepping to its first retainer at distance d - 1. Linked
+    nodes can be added at any time, which only lowers distances downstream of them.
+    The number of nodes whose distance the propagation lowered is kept in `nodes_visited`.
+    """
+
+    def __init__(self, graph: ColumnarRuntime, links: List[Optional[CodeEvolution]], max_distance: int):
+        """
+        Args:
+            graph: Columnar runtime providing the adjacency.
+            links: Code change of every directly linked node index, None for the others.
+            max_distance: Maximum number of retainer steps to a linked node.
+        """
+        self.graph = graph
+        self.max_distance = max_distance
+        self.links = links
+
+        # Flat CSR adjacency as lists, which are faster to index from Python than arrays
+        self._out_offsets = graph.out_offsets.tolist()
+        self._successors = graph.edge_to[graph.out_edges].tolist()
+        self._in_offsets = graph.in_offsets.tolist()
+        self._retainers = graph.edge_from[graph.in_edges].tolist()
+
+        # Indices of node ids that occur more than once; links are shared by id
+        self._duplicate_indices: Dict[str, List[int]] = {}
+        if len(graph.node_index) != graph.id_count:
+            indices_by_id: Dict[str, List[int]] = {}
+            for index, node_id in enumerate(graph.node_ids):
+                indices_by_id.setdefault(node_id, []).append(index)
+            self._duplicate_indices = {node_id: indices for node_id, indices in indices_by_id.items()
+                                       if len(indices) > 1}
+
+        # Unreachable nodes keep a distance beyond max_distance
+        self._unreachable = max(max_distance, 0) + 1
+        self.nodes_visited = 0
+        self.distance = [self._unreachable] * graph.id_count
+        seeds = [index for index, link in enumerate(links) if link is not None]
+        for index in seeds:
+            self.distance[index] = 0
+        self._propagate(seeds)
+
+    def find(self, node_id: str) -> Optional[CodeEvolution]:
+        """Returns the code change inherited from the nearest linked retainer of the node."""
+        index = self.graph.node_index.get(node_id)
+        if index is None or self.distance[index] >= self._unreachable:
+            return None
+
+        distance, retainers, in_offsets = self.distance, self._retainers, self._in_offsets
+        while distance[index] > 0:
+            closer = distance[index] - 1
+            index = next(retainers[k] for k in range(in_offsets[index], in_offsets[index + 1])
+                         if distance[retainers[k]] == closer)
+        return self.links[index]
+
+    def add_link(self, node_id: str, link: CodeEvolution):
+        """Marks the node as linked, so nodes below it may inherit its code change."""
+        indices = self._duplicate_indices.get(node_id)
+        if indices is None:
+            index = self.graph.node_index.get(node_id)
+            indices = [] if index is None else [index]
+
+        for index in indices:
+            self.links[index] = link
+            self.distance[index] = 0
+        self._propagate(indices)
+
+    def _propagate(self, sources: List[int]):
+        """Lowers the distances reachable from the given nodes, level by level (decrease only)."""
+        distance, successors, out_offsets = self.distance, self._successors, self._out_offsets
+        frontier = sources
+        level = 0
+        while frontier and level < self.max_distance:
+            level += 1
+            next_frontier = []
+            for index in frontier:
+                for k in range(out_offsets[index], out_offsets[index + 1]):
+                    successor = successors[k]
+                    if level < distance[successor]:
+                        distance[successor] = level
+                        next_frontier.append(successor)
+            self.nodes_visited += len(next_frontier)
+            frontier = next_frontier
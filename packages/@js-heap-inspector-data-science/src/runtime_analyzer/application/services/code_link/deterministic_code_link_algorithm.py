@@ -1,7 +1,10 @@
 from typing import List, Dict, Optional
-from collections import deque
 from .contracts.code_link_algorithm import CodeLinkAlgorithm
-from ....domain.models import Stack, Node, Edge, CodeEvolution, CodeLinkContainer, CausalPair
+from ...helpers.instrumentation import current_instrumentation
+from .code_change_index import CodeChangeIndex
+from .derived_linkage import DerivedLinkageIndex
+from .stack_trace_resolver import StackTraceResolver
+from ....domain.models import CodeEvolution, CodeLinkContainer, CausalPair, ColumnarRuntime
 
 
 class DeterministicLinkage(CodeLinkAlgorithm):
@@ -9,18 +12,17 @@ class DeterministicLinkage(CodeLinkAlgorithm):
     Implements the deterministic linkage strategy defined in Thesis Section 3.3.2.
     """
 
-    def __init__(self, *args, max_distance: int = 10, **kwargs):
+    def __init__(self, *args, max_distance: int = 10, use_column_span: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
         self.max_distance = max_distance
-        self.bl_stack_map = {s.id: s for s in self.runtime_baseline.stacks}
-        self.mod_stack_map = {s.id: s for s in self.runtime_modified.stacks}
+        self.use_column_span = use_column_span
 
-        self.bl_node_map = {n.id: n for n in self.runtime_baseline.nodes}
-        self.mod_node_map = {n.id: n for n in self.runtime_modified.nodes}
-
-        # Build reverse edge maps for retainer search (Phase 2)
-        self.mod_reverse_edges = self._build_reverse_edges(self.runtime_modified.edges)
-        self.bl_reverse_edges = self._build_reverse_edges(self.runtime_baseline.edges)
+        # Columnar graphs provide the reverse CSR adjacency for the retainer search (Phase 2) and
+        # the allocation traces, so the node models are never built
+        self.mod_graph = self.runtime_modified.to_columnar()
+        self.bl_graph = self.runtime_baseline.to_columnar()
+        self.bl_trace_map = self._trace_map(self.bl_graph)
+        self.mod_trace_map = self._trace_map(self.mod_graph)
 
         # Pre-filter code changes into contexts
         self.context_regression = [
@@ -32,21 +34,16 @@ class DeterministicLinkage(CodeLinkAlgorithm):
             if c.modificationSource == 'base'
         ]
 
-        # Optimization Caches
-        self._frame_match_cache = {}  # (id(code_changes), sid) -> CodeEvolution
-        self._trace_result_cache = {}  # (id(code_changes), trace_id) -> CodeEvolution
-        self._grouped_changes_cache = {} # id(code_changes) -> List[Tuple[fileId, List[CodeEvolution]]]
-
-    def _build_reverse_edges(self, edges: List[Edge]) -> Dict[str, List[str]]:
-        """Maps toNodeId -> list of fromNodeIds."""
-        rev = {}
-        for edge in edges:
-            if edge.toNodeId not in rev:
-                rev[edge.toNodeId] = []
-            rev[edge.toNodeId].append(edge.fromNodeId)
-        return rev
+        # Stack traces are resolved once per runtime and context (named, so keys stay stable)
+        self.mod_stack_resolver = StackTraceResolver(self.runtime_modified.stacks)
+        self.mod_stack_resolver.add_context(
+            "regression", CodeChangeIndex(self.context_regression, use_column_span=use_column_span))
+        self.bl_stack_resolver = StackTraceResolver(self.runtime_baseline.stacks)
+        self.bl_stack_resolver.add_context(
+            "improvement", CodeChangeIndex(self.context_improvement, use_column_span=use_column_span))
 
     def link(self) -> CodeLinkContainer:
+        instrumentation = current_instrumentation()
         regressions: List[CausalPair] = []
         improvements: List[CausalPair] = []
         unmappable_regressions: List[str] = []
@@ -54,194 +51,148 @@ class DeterministicLinkage(CodeLinkAlgorithm):
 
         # --- Phase 1: Direct Linkage ---
         print("Starting Phase 1: Direct Linkage")
-        # 1. Analyze Added Nodes (Regressions)
-        # Input: S_delta (added) and S_modified
-        unmapped_regression_nodes: List[str] = []
-        unmapped_improvement_nodes: List[str] = []
-
-        # Collect all modified/added node IDs from the Modified Runtime
-        target_mod_ids = []
-        for res in self.matching_result.added_node_ids:
-            target_mod_ids.extend(res.nodes_modified_id)
-        for res in self.matching_result.modified:
-            target_mod_ids.extend(res.nodes_modified_id)
-
-        for index, node_id in enumerate(target_mod_ids):
-            if index % 500 == 0:
-                print(f"Direct Linkage Modified/Added from Modified Phase 1 Status: {(index/len(target_mod_ids))*100:.2f}%")
-            node = self.mod_node_map.get(node_id)
-            if not node:
-                continue
-
-            link = self._sl_verify(node, self.context_regression, self.mod_stack_map)
-            if link:
-                regressions.append(CausalPair(node_id=node.id, code_evolution=link, confidence='Direct'))
-            else:
-                unmapped_regression_nodes.append(node.id)
-
-
-        target_bl_ids = []
-        for res in self.matching_result.removed_node_ids:
-            target_bl_ids.extend(res.nodes_baseline_id)
-        for res in self.matching_result.modified:
-            target_bl_ids.extend(res.nodes_baseline_id)
-        
-        # 2. Analyze modified and removed nodes from Baseline Runtime (Improvements)
-        # Input: S_modified and S_baseline
-        for index, node_id in enumerate(target_bl_ids):
-            if index % 500 == 0:
-                print(f"Direct Linkage Modified/Removed from Baseline Phase 1 Status: {(index/len(target_bl_ids))*100:.2f}%")
-            node = self.bl_node_map.get(node_id)
-            if not node:
-                continue
-                
-            link = self._sl_verify(node, self.context_improvement, self.bl_stack_map)
-            if link:
-                improvements.append(CausalPair(node_id=node.id, code_evolution=link, confidence='Direct'))
-            else:
-                unmapped_improvement_nodes.append(node.id)
+        with instrumentation.stage("code_link.direct"):
+            # 1. Analyze Added Nodes (Regressions)
+            # Input: S_delta (added) and S_modified
+            unmapped_regression_nodes: List[str] = []
+            unmapped_improvement_nodes: List[str] = []
+
+            # Collect all modified/added node IDs from the Modified Runtime
+            target_mod_ids = []
+            for res in self.matching_result.added_node_ids:
+                target_mod_ids.extend(res.nodes_modified_id)
+            for res in self.matching_result.modified:
+                target_mod_ids.extend(res.nodes_modified_id)
+
+            report = instrumentation.progress("Direct Linkage Modified/Added from Modified Phase 1", len(target_mod_ids))
+            for index, node_id in enumerate(target_mod_ids):
+                if report:
+                    report(index)
+                if node_id not in self.mod_trace_map:
+                    continue
+
+                link = self._sl_verify(self.mod_trace_map[node_id], self.mod_stack_resolver, "regression")
+                if link:
+                    regressions.append(CausalPair(node_id=node_id, code_evolution=link, confidence='Direct'))
+                else:
+                    unmapped_regression_nodes.append(node_id)
+            if report:
+                report(len(target_mod_ids))
+
+            target_bl_ids = []
+            for res in self.matching_result.removed_node_ids:
+                target_bl_ids.extend(res.nodes_baseline_id)
+            for res in self.matching_result.modified:
+                target_bl_ids.extend(res.nodes_baseline_id)
+
+            # 2. Analyze modified and removed nodes from Baseline Runtime (Improvements)
+            # Input: S_modified and S_baseline
+            report = instrumentation.progress("Direct Linkage Modified/Removed from Baseline Phase 1", len(target_bl_ids))
+            for index, node_id in enumerate(target_bl_ids):
+                if report:
+                    report(index)
+                if node_id not in self.bl_trace_map:
+                    continue
+
+                link = self._sl_verify(self.bl_trace_map[node_id], self.bl_stack_resolver, "improvement")
+                if link:
+                    improvements.append(CausalPair(node_id=node_id, code_evolution=link, confidence='Direct'))
+                else:
+                    unmapped_improvement_nodes.append(node_id)
+            if report:
+                report(len(target_bl_ids))
+
+            instrumentation.count("code_link.direct_links", len(regressions) + len(improvements))
 
         # --- Phase 2: Derived Linkage (Retainer Search)  ---
         print("Starting Phase 2: Derived Linkage")
-
-        # Build initial link maps for Phase 2 for O(1) lookups
-        regression_link_map = {pair.node_id: pair.code_evolution for pair in regressions}
-        improvement_link_map = {pair.node_id: pair.code_evolution for pair in improvements}
-
-        # Only applied to regressions (Modified Runtime) where Direct Link failed.
-        # Search Zone 1 & 2 for causal retainers.
-        for index, node_id in enumerate(unmapped_regression_nodes):
-            if index % 500 == 0:
-                print(f"Derived Linkage for Modified Phase 2 Status: {(index/len(unmapped_regression_nodes))*100:.2f}%")
-            derived_link = self._find_causal_retainer(self.mod_node_map, self.context_regression, self.mod_stack_map, node_id, regression_link_map, self.mod_reverse_edges)
-            if derived_link:
-                regressions.append(CausalPair(node_id=node_id, code_evolution=derived_link, confidence='Derived'))
-                regression_link_map[node_id] = derived_link
-            else:
-                unmappable_regressions.append(node_id)
-
-        for index, node_in in enumerate(unmapped_improvement_nodes):
-            if index % 500 == 0:
-                print(f"Derived Linkage for Baseline Phase 2 Status: {(index/len(unmapped_improvement_nodes))*100:.2f}%")
-            derived_link = self._find_causal_retainer(self.bl_node_map, self.context_improvement, self.bl_stack_map, node_in, improvement_link_map, self.bl_reverse_edges)
-            if derived_link:
-                improvements.append(CausalPair(node_id=node_in, code_evolution=derived_link, confidence='Derived'))
-                improvement_link_map[node_in] = derived_link
-            else:
-                unmappable_improvements.append(node_in)
+        with instrumentation.stage("code_link.derived"):
+            # Build initial link maps for Phase 2 for O(1) lookups
+            regression_link_map = {pair.node_id: pair.code_evolution for pair in regressions}
+            improvement_link_map = {pair.node_id: pair.code_evolution for pair in improvements}
+            direct_links = len(regressions) + len(improvements)
+
+            # Only applied to regressions (Modified Runtime) where Direct Link failed.
+            # Search Zone 1 & 2 for causal retainers.
+            regression_linkage = self._build_derived_linkage(
+                self.mod_graph, self.mod_trace_map, self.mod_stack_resolver, "regression",
+                regression_link_map) if unmapped_regression_nodes else None
+            if regression_linkage is not None:
+                report = instrumentation.progress("Derived Linkage for Modified Phase 2",
+                                                  len(unmapped_regression_nodes))
+                for index, node_id in enumerate(unmapped_regression_nodes):
+                    if report:
+                        report(index)
+                    derived_link = regression_linkage.find(node_id)
+                    if derived_link:
+                        regressions.append(CausalPair(node_id=node_id, code_evolution=derived_link,
+                                                      confidence='Derived'))
+                        regression_link_map[node_id] = derived_link
+                        regression_linkage.add_link(node_id, derived_link)
+                    else:
+                        unmappable_regressions.append(node_id)
+                if report:
+                    report(len(unmapped_regression_nodes))
+                instrumentation.count("code_link.bfs_nodes_visited", regression_linkage.nodes_visited)
+
+            improvement_linkage = self._build_derived_linkage(
+                self.bl_graph, self.bl_trace_map, self.bl_stack_resolver, "improvement",
+                improvement_link_map) if unmapped_improvement_nodes else None
+            if improvement_linkage is not None:
+                report = instrumentation.progress("Derived Linkage for Baseline Phase 2",
+                                                  len(unmapped_improvement_nodes))
+                for index, node_in in enumerate(unmapped_improvement_nodes):
+                    if report:
+                        report(index)
+                    derived_link = improvement_linkage.find(node_in)
+                    if derived_link:
+                        improvements.append(CausalPair(node_id=node_in, code_evolution=derived_link,
+                                                       confidence='Derived'))
+                        improvement_link_map[node_in] = derived_link
+                        improvement_linkage.add_link(node_in, derived_link)
+                    else:
+                        unmappable_improvements.append(node_in)
+                if report:
+                    report(len(unmapped_improvement_nodes))
+                instrumentation.count("code_link.bfs_nodes_visited", improvement_linkage.nodes_visited)
+
+            instrumentation.count("code_link.derived_links", len(regressions) + len(improvements) - direct_links)
+            for resolver in (self.mod_stack_resolver, self.bl_stack_resolver):
+                instrumentation.count("code_link.stack_trace_lookups", resolver.lookups)
+                instrumentation.count("code_link.stack_trace_context_resolutions", resolver.context_resolutions)
 
         return CodeLinkContainer(regressions=regressions, improvements=improvements, unmappable_regressions=unmappable_regressions, unmappable_improvements=unmappable_improvements)
 
-    def _sl_verify(self, node: Node, code_changes: List[CodeEvolution], stack_map: Dict[str, Stack]) -> Optional[
-        CodeEvolution]:
+    def _sl_verify(self, trace_id: Optional[str], stack_resolver: StackTraceResolver,
+                   context: str) -> Optional[CodeEvolution]:
         """
         Implementation of equation 3.35: SL_verify(S, E).
-        Checks if the allocation trace intersects with code change coordinates.
+        Checks if the allocation trace of a node intersects with code change coordinates.
         """
-        if not node.traceId:
+        if not trace_id:
             return None
-
-        # Optimization: Check if we have already processed this traceId for these code_changes and stack_map
-        cache_key = (id(code_changes), id(stack_map), node.traceId)
-        if cache_key in self._trace_result_cache:
-            return self._trace_result_cache[cache_key]
-
-        # Start with the allocation site
-        current_stack_id = node.traceId
-        trace_stack = deque([current_stack_id])
-        visited = {current_stack_id}
-
-        result = None
-        while trace_stack:
-            sid = trace_stack.popleft()
-
-            # Check intersection for this frame (using cache)
-            match = self._get_frame_match(sid, code_changes, stack_map)
-            if match:
-                result = match
-                break
-
-            stack_frame = stack_map.get(sid)
-            if not stack_frame:
-                continue
-
-            # Propagate up the stack (Assuming frameIds are parent/callers)
-            for parent_id in stack_frame.frameIds:
-                if parent_id in stack_map and parent_id not in visited:
-                    visited.add(parent_id)
-                    trace_stack.append(parent_id)
-
-        self._trace_result_cache[cache_key] = result
-        return result
-
-    def _get_frame_match(self, sid: str, code_changes: List[CodeEvolution], stack_map: Dict[str, Stack]) -> Optional[CodeEvolution]:
-        """Checks if a single stack frame matches any code change, with caching and file-based pre-filtering."""
-        cache_key = (id(code_changes), id(stack_map), sid)
-        if cache_key in self._frame_match_cache:
-            return self._frame_match_cache[cache_key]
-
-        frame = stack_map.get(sid)
-        if not frame:
-            self._frame_match_cache[cache_key] = None
-            return None
-
-        # Build grouped changes for this list if not already cached
-        if id(code_changes) not in self._grouped_changes_cache:
-            file_to_changes = {}
-            file_order = []
-            for c in code_changes:
-                if c.fileId not in file_to_changes:
-                    file_to_changes[c.fileId] = []
-                    file_order.append(c.fileId)
-                file_to_changes[c.fileId].append(c)
-            self._grouped_changes_cache[id(code_changes)] = [(fid, file_to_changes[fid]) for fid in file_order]
-
-        grouped = self._grouped_changes_cache[id(code_changes)]
-
-        match = None
-        for fileId, changes in grouped:
-            if fileId in frame.scriptName:
-                for change in changes:
-                    if change.codeChangeSpan.lineStart <= frame.lineNumber <= change.codeChangeSpan.lineEnd:
-                        match = change
-                        break
-            if match:
-                break
-
-        self._frame_match_cache[cache_key] = match
-        return match
-
-    def _find_causal_retainer(self, node_map: Dict[str, Node], code_changes: list[CodeEvolution], stack_map: dict[str, Stack], node_id: str, link_map: Dict[str, CodeEvolution], reverse_edges: Dict[str, List[str]]) -> Optional[CodeEvolution]:
+        return stack_resolver.resolve(trace_id, context)
+
+    @staticmethod
+    def _trace_map(graph: ColumnarRuntime) -> Dict[str, Optional[str]]:
+        """Allocation trace id per node id, of the last node for duplicate ids like `Runtime.get_node_by_id`."""
+        strings = graph.strings
+        count = graph.node_count
+        return {strings[node_id]: graph.string(trace_id)
+                for node_id, trace_id in zip(graph.node_id[:count].tolist(), graph.node_trace[:count].tolist())}
+
+    def _build_derived_linkage(self, graph: ColumnarRuntime, trace_map: Dict[str, Optional[str]],
+                               stack_resolver: StackTraceResolver, context: str,
+                               link_map: Dict[str, CodeEvolution]) -> DerivedLinkageIndex:
         """
-        Phase 2: Traverses graph topology to find a retainer linked to a code change.
+        Phase 2: Seeds the retainer search with every node that is causally linked, either by
+        Phase 1 or by its own stack trace.
         Search Space: Zone 1 (Intra-Subgraph) + Zone 2 (Neighborhood).
-        Optimized with deque and pre-built link_map.
         """
-        # BFS Queue: (current_node_id, distance)
-        queue = deque([(node_id, 0)])
-        visited = {node_id}
-
-        while queue:
-            curr, dist = queue.popleft()
-
-            # If this retainer is already causally linked, inherit the cause
-            if curr in link_map:
-                return link_map[curr]
-
-            # If the retainer is not linked, check the stack trace of that retainer if it matches with any of the changes
-            link = self._sl_verify(node_map.get(curr), code_changes, stack_map)
-            if link:
-                link_map[curr] = link
-                return link
-
-            if dist >= self.max_distance:
-                continue
-
-            # Get retainers (Reverse edges)
-            retainers = reverse_edges.get(curr, [])
-            for ret_id in retainers:
-                if ret_id not in visited:
-                    visited.add(ret_id)
-                    queue.append((ret_id, dist + 1))
-
-        return None
+        links = []
+        for node_id in graph.node_ids:
+            link = link_map.get(node_id)
+            if link is None:
+                link = self._sl_verify(trace_map.get(node_id), stack_resolver, context)
+            links.append(link)
+        return DerivedLinkageIndex(graph, links, self.max_distance)
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+
+from ....domain.models import CodeEvolution, Stack
+from .code_change_index import CodeChangeIndex
+
+
+class StackTraceResolver:
+    """
+    Resolves SL_verify (Thesis Eq. 3.35) for every stack of a runtime at once.
+
+    Starting from a stack, its frames are searched breadth-first along `frameIds`; the
+    first frame intersecting a code change wins. Instead of one search per trace, the
+    distance of every stack to the nearest matching frame is computed once by a reverse
+    BFS from all matching frames. A stack at distance d then takes the result of its
+    first frame at distance d - 1, which is the frame the forward search reaches first.
+    This also holds for cyclic frame references.
+
+    The frame structure is shared by all contexts (sets of code changes) registered
+    under a stable name; each context is resolved once on first use. `lookups` and
+    `context_resolutions` count the calls of `resolve` and the resolved contexts.
+    """
+
+    def __init__(self, stacks: List[Stack]):
+        """
+        Args:
+            stacks: Stacks of the runtime. Of stacks sharing an id, the last one is used.
+        """
+        self.stacks = stacks
+        self.stack_index: Dict[str, int] = {}
+        for index, stack in enumerate(stacks):
+            self.stack_index[stack.id] = index
+
+        # Callers (frameIds) per stack and the reverse direction, unknown ids are skipped
+        self._frames: List[List[int]] = [[] for _ in stacks]
+        self._callees: List[List[int]] = [[] for _ in stacks]
+        for index in self.stack_index.values():
+            for frame_id in stacks[index].frameIds:
+                frame = self.stack_index.get(frame_id)
+                if frame is not None:
+                    self._frames[index].append(frame)
+                    self._callees[frame].append(index)
+
+        self._change_indexes: Dict[str, CodeChangeIndex] = {}
+        self._resolved: Dict[str, List[Optional[CodeEvolution]]] = {}
+        self.lookups = 0
+        self.context_resolutions = 0
+
+    def add_context(self, name: str, change_index: CodeChangeIndex):
+        """Registers a set of code changes under a stable name."""
+        self._change_indexes[name] = change_index
+        self._resolved.pop(name, None)
+
+    def resolve(self, trace_id: str, context: str) -> Optional[CodeEvolution]:
+        """Returns the first code change of the context intersecting the trace."""
+        self.lookups += 1
+        index = self.stack_index.get(trace_id)
+        if index is None:
+            return None
+
+        resolved = self._resolved.get(context)
+        if resolved is None:
+            self.context_resolutions += 1
+            resolved = self._resolve_context(self._change_indexes[context])
+            self._resolved[context] = resolved
+        return resolved[index]
+
+    def _resolve_context(self, change_index: CodeChangeIndex) -> List[Optional[CodeEvolution]]:
+        resolved: List[Optional[CodeEvolution]] = [None] * len(self.stacks)
+        distance: List[int] = [-1] * len(self.stacks)
+
+        # Level 0: stacks whose own frame intersects a change
+        order = []
+        for index in self.stack_index.values():
+            match = change_index.match(self.stacks[index])
+            if match is not None:
+                resolved[index] = match
+                distance[index] = 0
+                order.append(index)
+
+        # Stacks in order of increasing distance, so every stack resolves after its frames
+        position = 0
+        while position < len(order):
+            frame = order[position]
+            position += 1
+            for callee in self._callees[frame]:
+                if distance[callee] < 0:
+                    distance[callee] = distance[frame] + 1
+                    order.append(callee)
+
+        for index in order:
+            if distance[index] > 0:
+                closer = distance[index] - 1
+                frame = next(frame for frame in self._frames[index] if distance[frame] == closer)
+                resolved[index] = resolved[frame]
+        return resolved
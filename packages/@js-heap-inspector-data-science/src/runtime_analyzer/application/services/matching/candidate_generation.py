@@ -0,0 +1,218 @@
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from ....domain.exceptions import UnsupportedAlgorithmError
+from .subgraph_features import SubgraphFeatures
+
+# Mersenne prime used by the MinHash permutations
+_MINHASH_PRIME = (1 << 31) - 1
+
+
+class CandidateGenerator:
+    """
+    Enumerates the (modified, baseline) subgraph pairs of the inexact matching phase
+    that can fall below the similarity threshold.
+
+    A differing center type costs at least `w_type` and a differing center value at
+    least `w_value`. Pairs are blocked on center type and/or value, so pairs whose lower
+    bound already reaches the threshold are never enumerated. This is lossless and used
+    by the "exact" mode. The "approximate" mode additionally requires pairs to collide in
+    a MinHash LSH index over the node type sets of the subgraphs, which skips pairs that
+    are unlikely to pass the topology (Jaccard) term.
+    """
+
+    MODES = ("exact", "approximate")
+
+    def __init__(self, threshold: float, w_type: float, w_value: float, w_topology: float, mode: str = "exact",
+                 block_size: int = 1 << 16, lsh_num_perm: int = 32, lsh_bands: int = 16, lsh_seed: int = 1):
+        """
+        Args:
+            threshold: Pairs need a distance below this value.
+            w_type: Weight of the center type distance.
+            w_value: Weight of the center value distance.
+            w_topology: Weight of the topology distance.
+            mode: "exact" or "approximate" candidate generation.
+            block_size: Maximum number of pairs yielded at once.
+            lsh_num_perm: Number of MinHash permutations (approximate mode).
+            lsh_bands: Number of LSH bands, has to divide `lsh_num_perm` (approximate mode).
+            lsh_seed: Seed of the MinHash permutations (approximate mode).
+        """
+        if mode not in self.MODES:
+            raise UnsupportedAlgorithmError(f"Candidate generation '{mode}' is not supported.")
+        if lsh_bands <= 0 or lsh_num_perm % lsh_bands != 0:
+            raise ValueError("lsh_bands has to divide lsh_num_perm")
+
+        self.threshold = threshold
+        self.w_type = w_type
+        self.w_value = w_value
+        self.w_topology = w_topology
+        self.mode = mode
+        self.block_size = max(1, block_size)
+        self.lsh_num_perm = lsh_num_perm
+        self.lsh_bands = lsh_bands
+        self.lsh_seed = lsh_seed
+
+    def generate(self, modified: SubgraphFeatures, baseline: SubgraphFeatures) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields chunks of candidate pairs as two aligned arrays of positions into the
+        modified and baseline features. Every pair is yielded at most once.
+        """
+        modified_signatures = self.signatures(modified)
+        baseline_signatures = self.signatures(baseline)
+        for block in self.blocks(modified, baseline):
+            yield from self.block_pairs(block, modified_signatures, baseline_signatures)
+
+    def signatures(self, features: SubgraphFeatures) -> Optional[np.ndarray]:
+        """MinHash signatures required by `block_pairs`, None in exact mode."""
+        return self._minhash_signatures(features) if self.mode == "approximate" else None
+
+    def block_pairs(self, block: Tuple[np.ndarray, np.ndarray, float], modified_signatures: Optional[np.ndarray],
+                    baseline_signatures: Optional[np.ndarray]) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields the candidate pairs of one block created by `blocks` in chunks."""
+        mod_positions, base_positions, lower_bound = block
+        if self.mode == "approximate" and self._lsh_can_prune(lower_bound):
+            yield from self._chunk_pairs(*self._lsh_pairs(mod_positions, base_positions, modified_signatures,
+                                                          baseline_signatures))
+        else:
+            yield from self.cartesian_chunks(mod_positions, base_positions)
+
+    def blocks(self, modified: SubgraphFeatures,
+               baseline: SubgraphFeatures) -> Iterator[Tuple[np.ndarray, np.ndarray, float]]:
+        """
+        Yields disjoint blocks of pairs (modified positions x baseline positions) that cover
+        every pair whose distance can fall below the threshold, together with the smallest
+        distance lower bound of the block.
+        """
+        all_modified = np.arange(len(modified), dtype=np.int64)
+        all_baseline = np.arange(len(baseline), dtype=np.int64)
+        if len(modified) == 0 or len(baseline) == 0:
+            return
+
+        # Negative weights invalidate the lower bounds, so nothing can be pruned
+        if min(self.w_type, self.w_value, self.w_topology) < 0:
+            yield all_modified, all_baseline, float("-inf")
+            return
+        if self._admits(True, True):
+            yield all_modified, all_baseline, self._lower_bound(False, False)
+            return
+
+        if self._admits(False, True):
+            # Same center type: value may differ
+            modified_groups = _group_positions(modified.center_type)
+            baseline_groups = _group_positions(baseline.center_type)
+            for key, mod_positions in modified_groups.items():
+                if key in baseline_groups:
+                    yield mod_positions, baseline_groups[key], self._lower_bound(False, False)
+        elif self._admits(False, False):
+            # Same center type and value
+            value_count = int(max(modified.center_value.max(), baseline.center_value.max())) + 1
+            modified_groups = _group_positions(modified.center_type.astype(np.int64) * value_count +
+                                               modified.center_value)
+            baseline_groups = _group_positions(baseline.center_type.astype(np.int64) * value_count +
+                                               baseline.center_value)
+            for key, mod_positions in modified_groups.items():
+                if key in baseline_groups:
+                    yield mod_positions, baseline_groups[key], self._lower_bound(False, False)
+
+        if self._admits(True, False):
+            # Same center value but a different type
+            modified_groups = _group_positions(modified.center_value)
+            baseline_groups = _group_positions(baseline.center_value)
+            for key, mod_positions in modified_groups.items():
+                if key not in baseline_groups:
+                    continue
+                base_positions = baseline_groups[key]
+                modified_by_type = _group_positions(modified.center_type[mod_positions])
+                baseline_by_type = _group_positions(baseline.center_type[base_positions])
+                for mod_type, mod_subset in modified_by_type.items():
+                    for base_type, base_subset in baseline_by_type.items():
+                        if mod_type != base_type:
+                            yield mod_positions[mod_subset], base_positions[base_subset], self._lower_bound(True, False)
+
+    def _lower_bound(self, type_differs: bool, value_differs: bool) -> float:
+        """Smallest possible distance of a pair, evaluated like the distance itself."""
+        dist_type = 1.0 if type_differs else 0.0
+        dist_value = 1.0 if value_differs else 0.0
+        return (dist_type * self.w_type) + (dist_value * self.w_value) + (0.0 * self.w_topology)
+
+    def _admits(self, type_differs: bool, value_differs: bool) -> bool:
+        return self._lower_bound(type_differs, value_differs) < self.threshold
+
+    def _lsh_can_prune(self, lower_bound: float) -> bool:
+        """Checks if a block requires a minimum Jaccard similarity above zero."""
+        if self.w_topology <= 0:
+            return False
+        max_topology_distance = (self.threshold - lower_bound) / self.w_topology
+        return max_topology_distance < 1.0
+
+    def cartesian_chunks(self, mod_positions: np.ndarray,
+                         base_positions: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields all pairs of the given positions in chunks of at most `block_size` pairs."""
+        if len(base_positions) > self.block_size:
+            for mod_position in mod_positions.tolist():
+                for start in range(0, len(base_positions), self.block_size):
+                    columns = base_positions[start:start + self.block_size]
+                    yield np.full(len(columns), mod_position, dtype=np.int64), columns
+            return
+
+        rows_per_chunk = max(1, self.block_size // max(1, len(base_positions)))
+        for start in range(0, len(mod_positions), rows_per_chunk):
+            rows = mod_positions[start:start + rows_per_chunk]
+            yield np.repeat(rows, len(base_positions)), np.tile(base_positions, len(rows))
+
+    def _chunk_pairs(self, mod_positions: np.ndarray,
+                     base_positions: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for start in range(0, len(mod_positions), self.block_size):
+            yield mod_positions[start:start + self.block_size], base_positions[start:start + self.block_size]
+
+    def _minhash_signatures(self, features: SubgraphFeatures) -> np.ndarray:
+        """MinHash signature (num_perm x subgraphs) of the node type set of every subgraph."""
+        rng = np.random.default_rng(self.lsh_seed)
+        a = rng.integers(1, _MINHASH_PRIME, size=(self.lsh_num_perm, 1), dtype=np.int64)
+        b = rng.integers(0, _MINHASH_PRIME, size=(self.lsh_num_perm, 1), dtype=np.int64)
+
+        signatures = np.full((self.lsh_num_perm, len(features)), _MINHASH_PRIME, dtype=np.int64)
+        sizes = np.diff(features.type_offsets)
+        non_empty = np.flatnonzero(sizes > 0)
+        if len(non_empty):
+            hashes = (a * features.type_members.astype(np.int64)[None, :] + b) % _MINHASH_PRIME
+            signatures[:, non_empty] = np.minimum.reduceat(hashes, features.type_offsets[:-1][non_empty], axis=1)
+        return signatures
+
+    def _lsh_pairs(self, mod_positions: np.ndarray, base_positions: np.ndarray, modified_signatures: np.ndarray,
+                   baseline_signatures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pairs of the block that share at least one LSH band bucket."""
+        rows = self.lsh_num_perm // self.lsh_bands
+        mod_count = len(mod_positions)
+        pair_keys = []
+
+        for band in range(self.lsh_bands):
+            band_rows = slice(band * rows, (band + 1) * rows)
+            band_values = np.concatenate([modified_signatures[band_rows][:, mod_positions],
+                                          baseline_signatures[band_rows][:, base_positions]], axis=1)
+            _, buckets = np.unique(band_values.T, axis=0, return_inverse=True)
+            buckets = buckets.reshape(-1)
+
+            mod_buckets = _group_positions(buckets[:mod_count])
+            base_buckets = _group_positions(buckets[mod_count:])
+            for bucket, mod_members in mod_buckets.items():
+                base_members = base_buckets.get(bucket)
+                if base_members is not None:
+                    pair_keys.append((np.repeat(mod_members, len(base_members)) * len(base_positions) +
+                                      np.tile(base_members, len(mod_members))))
+
+        if not pair_keys:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        keys = np.unique(np.concatenate(pair_keys))
+        return mod_positions[keys // len(base_positions)], base_positions[keys % len(base_positions)]
+
+
+def _group_positions(keys: np.ndarray) -> Dict[int, np.ndarray]:
+    """Groups positions by key. Positions keep their order within a group."""
+    order = np.argsort(keys, kind="stable")
+    unique_keys, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    return {key: order[start:end] for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist())}
@@ -0,0 +1,238 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...helpers.instrumentation import current_instrumentation
+from ...helpers.shared_arrays import SharedArrays, SharedArrayDescriptor, attach_shared_arrays
+from .candidate_generation import CandidateGenerator
+from .subgraph_distance import SubgraphDistance
+from .subgraph_features import SubgraphFeatures
+
+Block = Tuple[np.ndarray, np.ndarray, float]
+ScoredPairs = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# State of a worker process, set up once by `_init_worker`
+_worker: Dict[str, object] = {}
+
+
+class CandidateScorer:
+    """
+    Scores the candidate pairs of the inexact matching phase and keeps those below the
+    threshold.
+
+    With more than one worker the candidate blocks are sharded over a process pool.
+    Workers attach to the subgraph features in shared memory, so no subgraph is
+    pickled. The result does not depend on the number of workers: pairs are returned
+    sorted by (distance, modified position, baseline position).
+
+    With `top_k` only the best K pairs per modified subgraph are retained (ties broken
+    by baseline position), which bounds the memory by K per modified subgraph instead
+    of the number of pairs below the threshold. The modified subgraphs that lost
+    candidates are recorded in `last_truncated_rows`, the number of scored pairs in
+    `last_scored_pairs` and the number of pairs below the threshold before truncation in
+    `last_qualifying_pairs`.
+    """
+
+    def __init__(self, generator: CandidateGenerator, threshold: float, workers: int = 1,
+                 task_size: int = 1 << 20, top_k: Optional[int] = None):
+        """
+        Args:
+            generator: Generator of the candidate pairs.
+            threshold: Pairs need a distance below this value.
+            workers: Number of worker processes. 1 scores in the calling process.
+            task_size: Approximate number of pairs per task sent to a worker.
+            top_k: Number of candidates retained per modified subgraph. None retains all.
+        """
+        if top_k is not None and top_k <= 0:
+            raise ValueError("top_k has to be positive")
+
+        self.generator = generator
+        self.threshold = threshold
+        self.workers = workers
+        self.task_size = max(1, task_size)
+        self.top_k = top_k
+        self.last_truncated_rows = np.empty(0, dtype=np.int64)
+        self.last_scored_pairs = 0
+        self.last_qualifying_pairs = 0
+
+    def score(self, distance: SubgraphDistance) -> ScoredPairs:
+        """
+        Returns distances, modified positions and baseline positions of all candidate
+        pairs below the threshold, sorted by (distance, modified position, baseline position).
+        """
+        if self.workers > 1:
+            ((dists, mods, bases), truncated_rows), scored_pairs, qualifying_pairs = self._score_parallel(distance)
+        else:
+            ((dists, mods, bases), truncated_rows), scored_pairs, qualifying_pairs = self._score_serial(distance)
+        self.last_truncated_rows = truncated_rows
+        self.last_scored_pairs = scored_pairs
+        self.last_qualifying_pairs = qualifying_pairs
+
+        order = np.lexsort((bases, mods, dists))
+        return dists[order], mods[order], bases[order]
+
+    def _score_serial(self, distance: SubgraphDistance) -> Tuple[Tuple[ScoredPairs, np.ndarray], int, int]:
+        modified_signatures = self.generator.signatures(distance.modified)
+        baseline_signatures = self.generator.signatures(distance.baseline)
+
+        results = _CandidateAccumulator(self.top_k, self.task_size)
+        report = current_instrumentation().progress("Heuristic Matching Phase 2 Similarity (pairs scored)")
+        scored_pairs = qualifying_pairs = 0
+        for block in self.generator.blocks(distance.modified, distance.baseline):
+            for mod_positions, base_positions in self.generator.block_pairs(block, modified_signatures,
+                                                                           baseline_signatures):
+                if report:
+                    report(scored_pairs)
+                scored_pairs += len(mod_positions)
+                scored = _below_threshold(distance, mod_positions, base_positions, self.threshold)
+                qualifying_pairs += len(scored[0])
+                results.add(scored)
+        return results.result(), scored_pairs, qualifying_pairs
+
+    def _score_parallel(self, distance: SubgraphDistance) -> Tuple[Tuple[ScoredPairs, np.ndarray], int, int]:
+        arrays = {}
+        for side, features, bitmap in (("modified", distance.modified, distance.modified_bitmap),
+                                       ("baseline", distance.baseline, distance.baseline_bitmap)):
+            arrays[f"{side}_center_type"] = features.center_type
+            arrays[f"{side}_center_value"] = features.center_value
+            arrays[f"{side}_type_offsets"] = features.type_offsets
+            arrays[f"{side}_type_members"] = features.type_members
+            arrays[f"{side}_type_bitmap"] = bitmap
+            signatures = self.generator.signatures(features)
+            if signatures is not None:
+                arrays[f"{side}_signatures"] = signatures
+
+        tasks = self._tasks(distance)
+        results = _CandidateAccumulator(self.top_k, self.task_size)
+        with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(shared.descriptor, self.generator, distance.w_type, distance.w_value,
+                          distance.w_topology, self.threshold, self.top_k, self.task_size)) as executor:
+            futures = [executor.submit(_score_task, task) for task in tasks]
+            report = current_instrumentation().progress("Heuristic Matching Phase 2 Similarity", len(futures))
+            scored_pairs = qualifying_pairs = 0
+            for index, future in enumerate(as_completed(futures)):
+                (scored, truncated_rows), task_pairs, task_qualifying_pairs = future.result()
+                results.add(scored, truncated_rows)
+                scored_pairs += task_pairs
+                qualifying_pairs += task_qualifying_pairs
+                if report:
+                    report(index + 1)
+        return results.result(), scored_pairs, qualifying_pairs
+
+    def _tasks(self, distance: SubgraphDistance) -> List[List[Block]]:
+        """Groups the candidate blocks into tasks of about `task_size` pairs. Large blocks are split by rows."""
+        tasks: List[List[Block]] = []
+        current: List[Block] = []
+        current_size = 0
+        for mod_positions, base_positions, lower_bound in self.generator.blocks(distance.modified, distance.baseline):
+            rows_per_task = max(1, self.task_size // max(1, len(base_positions)))
+            for start in range(0, len(mod_positions), rows_per_task):
+                rows = mod_positions[start:start + rows_per_task]
+                current.append((rows, base_positions, lower_bound))
+                current_size += len(rows) * len(base_positions)
+                if current_size >= self.task_size:
+                    tasks.append(current)
+                    current, current_size = [], 0
+        if current:
+            tasks.append(current)
+        return tasks
+
+
+class _CandidateAccumulator:
+    """Collects scored pairs, retaining only the best `top_k` per modified subgraph if set."""
+
+    def __init__(self, top_k: Optional[int], compact_size: int):
+        self.top_k = top_k
+        self.compact_size = compact_size
+        self.compact_at = compact_size
+        self.parts: List[ScoredPairs] = []
+        self.pending = 0
+        self.truncated_rows: List[np.ndarray] = []
+
+    def add(self, scored: ScoredPairs, truncated_rows: Optional[np.ndarray] = None):
+        self.parts.append(scored)
+        self.pending += len(scored[0])
+        if truncated_rows is not None and len(truncated_rows):
+            self.truncated_rows.append(truncated_rows)
+        if self.top_k is not None and self.pending > self.compact_at:
+            self._compact()
+
+    def result(self) -> Tuple[ScoredPairs, np.ndarray]:
+        if self.top_k is not None:
+            self._compact()
+        truncated_rows = np.unique(np.concatenate(self.truncated_rows)) if self.truncated_rows else \
+            np.empty(0, dtype=np.int64)
+        return _concatenate(self.parts), truncated_rows
+
+    def _compact(self):
+        dists, mods, bases = _concatenate(self.parts)
+        order = np.lexsort((bases, dists, mods))
+        dists, mods, bases = dists[order], mods[order], bases[order]
+
+        # Rank of every pair within its modified subgraph
+        starts = np.flatnonzero(np.r_[True, mods[1:] != mods[:-1]]) if len(mods) else np.empty(0, dtype=np.int64)
+        counts = np.diff(np.append(starts, len(mods)))
+        rank = np.arange(len(mods)) - np.repeat(starts, counts)
+        keep = rank < self.top_k
+
+        if not keep.all():
+            self.truncated_rows.append(np.unique(mods[~keep]))
+        self.parts = [(dists[keep], mods[keep], bases[keep])]
+        self.pending = int(keep.sum())
+        # Retained pairs alone may exceed the compaction size, compact again once they doubled
+        self.compact_at = max(self.compact_size, 2 * self.pending)
+
+
+def _below_threshold(distance: SubgraphDistance, mod_positions: np.ndarray, base_positions: np.ndarray,
+                     threshold: float) -> ScoredPairs:
+    dist = distance.distances(mod_positions, base_positions)
+    keep = dist < threshold
+    return dist[keep], mod_positions[keep], base_positions[keep]
+
+
+def _concatenate(results: List[ScoredPairs]) -> ScoredPairs:
+    if not results:
+        return np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return tuple(np.concatenate(column) for column in zip(*results))
+
+
+def _init_worker(descriptor: SharedArrayDescriptor, generator: CandidateGenerator, w_type: float, w_value: float,
+                 w_topology: float, threshold: float, top_k: Optional[int], compact_size: int):
+    arrays, blocks = attach_shared_arrays(descriptor)
+
+    features = {}
+    for side in ("modified", "baseline"):
+        features[side] = SubgraphFeatures(arrays[f"{side}_center_type"], arrays[f"{side}_center_value"],
+                                          arrays[f"{side}_type_offsets"], arrays[f"{side}_type_members"],
+                                          type_bitmap=arrays[f"{side}_type_bitmap"])
+    type_words = arrays["modified_type_bitmap"].shape[1]
+
+    _worker.update(
+        blocks=blocks,
+        generator=generator,
+        threshold=threshold,
+        top_k=top_k,
+        compact_size=compact_size,
+        distance=SubgraphDistance(features["modified"], features["baseline"], type_words, w_type, w_value, w_topology),
+        modified_signatures=arrays.get("modified_signatures"),
+        baseline_signatures=arrays.get("baseline_signatures"),
+    )
+
+
+def _score_task(task: List[Block]) -> Tuple[Tuple[ScoredPairs, np.ndarray], int, int]:
+    generator: CandidateGenerator = _worker["generator"]
+    distance: SubgraphDistance = _worker["distance"]
+    modified_signatures: Optional[np.ndarray] = _worker["modified_signatures"]
+    baseline_signatures: Optional[np.ndarray] = _worker["baseline_signatures"]
+
+    results = _CandidateAccumulator(_worker["top_k"], _worker["compact_size"])
+    scored_pairs = qualifying_pairs = 0
+    for block in task:
+        for mod_positions, base_positions in generator.block_pairs(block, modified_signatures, baseline_signatures):
+            scored_pairs += len(mod_positions)
+            scored = _below_threshold(distance, mod_positions, base_positions, _worker["threshold"])
+            qualifying_pairs += len(scored[0])
+            results.add(scored)
+    return results.result(), scored_pairs, qualifying_pairs
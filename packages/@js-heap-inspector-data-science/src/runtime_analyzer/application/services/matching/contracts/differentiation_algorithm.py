@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List
-from .....domain.models import Runtime, MatchingResult, Subgraph
+from typing import Union
+from .....domain.models import Runtime, MatchingResult, IndexedMatchingResult
+from ...subgraph_creation.contracts.subgraph_algorithm import Subgraphs
+
+# Result of a matching algorithm. Both shapes provide the four categories as sequences of subgraph
+# results, `iter_dump` and `node_count` per category, `model_dump` and `to_indexed`.
+DifferentiationResult = Union[MatchingResult, IndexedMatchingResult]
 
 class MatchingAlgorithm(ABC):
     """
@@ -9,15 +14,15 @@ class MatchingAlgorithm(ABC):
     modifying, and identifying deltas between two heap runtimes.
     """
 
-    def __init__(self, runtime_baseline: Runtime, subgraphs_baseline: List[Subgraph], runtime_modified: Runtime, subgraphs_modified: List[Subgraph], **kwargs):
+    def __init__(self, runtime_baseline: Runtime, subgraphs_baseline: Subgraphs, runtime_modified: Runtime, subgraphs_modified: Subgraphs, **kwargs):
         """
         Initializes the service with a specific matching algorithm.
         
         Args:
             runtime_baseline: The baseline runtime for comparison.
-            subgraphs_baseline: List of subgraphs from the baseline runtime.
+            subgraphs_baseline: Subgraphs from the baseline runtime.
             runtime_modified: The modified runtime for comparison.
-            subgraphs_modified: List of subgraphs from the modified runtime.
+            subgraphs_modified: Subgraphs from the modified runtime.
         """
         self.runtime_baseline = runtime_baseline
         self.subgraphs_baseline = subgraphs_baseline
@@ -25,11 +30,11 @@ class MatchingAlgorithm(ABC):
         self.subgraphs_modified = subgraphs_modified
     
     @abstractmethod
-    def differentiate(self) -> MatchingResult:
+    def differentiate(self) -> DifferentiationResult:
         """
         Analyzes two runtimes and returns the matching results.
         
         Returns:
-            A MatchingResult containing matched, modified, added, and removed elements.
+            A DifferentiationResult containing matched, modified, added, and removed elements.
         """
         pass
@@ -1,7 +1,19 @@
-from typing import List
-from ....domain.models import Runtime, MatchingResult, Subgraph, MatchSubgraphResult, ModificationSubgraphResult, \
-    DeltaSubgraphResult, Node
-from .contracts.differentiation_algorithm import MatchingAlgorithm
+import hashlib
+import warnings
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from ...helpers.instrumentation import current_instrumentation
+from ....domain.models import Runtime, ColumnarRuntime, IndexedMatchingResult, Subgraph, SubgraphView, SubgraphResultArrays, \
+    MatchSubgraphResult, ModificationSubgraphResult, DeltaSubgraphResult, Node
+from .contracts.differentiation_algorithm import MatchingAlgorithm, DifferentiationResult
+from ..subgraph_creation.contracts.subgraph_algorithm import Subgraphs
+from .candidate_generation import CandidateGenerator
+from .candidate_scoring import CandidateScorer
+from .subgraph_distance import SubgraphDistance
+from .subgraph_features import FeatureVocabulary, SubgraphFeatures
 
 
 class HeuristicMatchingAlgorithm(MatchingAlgorithm):
@@ -16,119 +28,231 @@ class HeuristicMatchingAlgorithm(MatchingAlgorithm):
 
     def __init__(self,
                  runtime_baseline: Runtime,
-                 subgraphs_baseline: List[Subgraph],
+                 subgraphs_baseline: Subgraphs,
                  runtime_modified: Runtime,
-                 subgraphs_modified: List[Subgraph],
+                 subgraphs_modified: Subgraphs,
                  similarity_threshold: float = 0.3,
                  w_type: float = 0.5,
                  w_value: float = 0.35,
-                 w_topology: float = 0.1):
+                 w_topology: float = 0.1,
+                 candidate_generation: str = "exact",
+                 lsh_num_perm: int = 32,
+                 lsh_bands: int = 16,
+                 lsh_seed: int = 1,
+                 report_candidate_recall: bool = False,
+                 workers: int = 1,
+                 max_candidates_per_subgraph: Optional[int] = None):
+        """
+        Args:
+            candidate_generation: "exact" only prunes pairs that cannot reach the threshold,
+                "approximate" additionally requires a MinHash LSH collision of the node type sets.
+            lsh_num_perm: Number of MinHash permutations of the approximate candidate generation.
+            lsh_bands: Number of LSH bands of the approximate candidate generation.
+            lsh_seed: Seed of the MinHash permutations.
+            report_candidate_recall: Compares the candidates against all pairs and stores the
+                share of qualifying pairs that the candidate generation found, before truncation to
+                `max_candidates_per_subgraph`, in `candidate_recall`. Both pair counts are recorded
+                as the counters "matching.recall_generated_pairs" and "matching.recall_qualifying_pairs".
+                Scores all pairs, use for tuning only.
+            workers: Number of processes scoring the inexact matching candidates in parallel.
+            max_candidates_per_subgraph: Retains only the best K inexact matching candidates per
+                modified subgraph to bound memory. Truncation that may have changed the result is
+                reported in `truncation_affected_subgraphs` and by a RuntimeWarning. None retains all
+                candidates.
+        """
         super().__init__(runtime_baseline, subgraphs_baseline, runtime_modified, subgraphs_modified)
         self.threshold = similarity_threshold
         self.w_type = w_type
         self.w_value = w_value
         self.w_topology = w_topology
+        self.candidate_generator = CandidateGenerator(similarity_threshold, w_type, w_value, w_topology,
+                                                      mode=candidate_generation, lsh_num_perm=lsh_num_perm,
+                                                      lsh_bands=lsh_bands, lsh_seed=lsh_seed)
+        self.candidate_scorer = CandidateScorer(self.candidate_generator, similarity_threshold, workers=workers,
+                                                top_k=max_candidates_per_subgraph)
+        self.report_candidate_recall = report_candidate_recall
+        self.candidate_recall: Optional[float] = None
+        self.truncation_affected_subgraphs: List[str] = []
+
+    def differentiate(self) -> DifferentiationResult:
+        instrumentation = current_instrumentation()
 
-    def differentiate(self) -> MatchingResult:
         # Sets to keep track of matched IDs to ensure exclusivity
         matched_baseline_ids: set[str] = set()
         matched_modified_ids: set[str] = set()
 
-        matched_results: List[MatchSubgraphResult] = []
-        modified_results: List[ModificationSubgraphResult] = []
-        added_results: List[DeltaSubgraphResult] = []
-        removed_results: List[DeltaSubgraphResult] = []
+        # Results are collected as node index arrays (baseline, modified) per subgraph result
+        baseline_graph = self.runtime_baseline.to_columnar()
+        modified_graph = self.runtime_modified.to_columnar()
+        no_nodes = np.empty(0, dtype=np.int64)
 
-        # --- Phase 1: Exact Matching (Thesis Eq 3.8) ---
-
-        for index, mod_sg in enumerate(self.subgraphs_modified):
-            if index % 50 == 0:
-                print(f"Heuristic Matching Phase 1 Status: {(index/len(self.subgraphs_modified))*100:.2f}%")
-            best_exact_match = None
+        matched_results: Tuple[List[np.ndarray], List[np.ndarray]] = ([], [])
+        modified_results: Tuple[List[np.ndarray], List[np.ndarray]] = ([], [])
+        modified_similarities: List[float] = []
+        added_results: Tuple[List[np.ndarray], List[np.ndarray]] = ([], [])
+        removed_results: Tuple[List[np.ndarray], List[np.ndarray]] = ([], [])
 
+        # --- Phase 1: Exact Matching (Thesis Eq 3.8) ---
+        with instrumentation.stage("matching.exact"):
+            # Identical subgraphs share a fingerprint, so baseline subgraphs are indexed by it once
+            # and every modified subgraph only inspects its own bucket (in baseline order).
+            baseline_buckets: Dict[Tuple[int, int, bytes], List[Subgraph]] = defaultdict(list)
             for base_sg in self.subgraphs_baseline:
-                if base_sg.center_node_id in matched_baseline_ids:
-                    continue
-
-                if self._are_subgraphs_identical(mod_sg, base_sg):
-                    best_exact_match = base_sg
-                    break
-
-            if best_exact_match:
-                matched_baseline_ids.add(best_exact_match.center_node_id)
-                matched_modified_ids.add(mod_sg.center_node_id)
-                matched_results.append(MatchSubgraphResult(
-                    nodes_baseline_id=[n.id for n in best_exact_match.nodes],
-                    nodes_modified_id=[n.id for n in mod_sg.nodes]
-                ))
+                baseline_buckets[self._get_subgraph_fingerprint(base_sg)].append(base_sg)
+            # Position of the first possibly unmatched subgraph per bucket
+            bucket_cursors: Dict[Tuple[int, int, bytes], int] = defaultdict(int)
+
+            report = instrumentation.progress("Heuristic Matching Phase 1", len(self.subgraphs_modified))
+            comparisons = 0
+            for index, mod_sg in enumerate(self.subgraphs_modified):
+                if report:
+                    report(index)
+                best_exact_match = None
+
+                fingerprint = self._get_subgraph_fingerprint(mod_sg)
+                bucket = baseline_buckets.get(fingerprint)
+                if bucket:
+                    # Matched subgraphs stay matched, so the cursor only moves forward
+                    cursor = bucket_cursors[fingerprint]
+                    while cursor < len(bucket) and bucket[cursor].center_node_id in matched_baseline_ids:
+                        cursor += 1
+                    bucket_cursors[fingerprint] = cursor
+
+                    for position in range(cursor, len(bucket)):
+                        base_sg = bucket[position]
+                        if base_sg.center_node_id in matched_baseline_ids:
+                            continue
+
+                        # Guards against fingerprint collisions
+                        comparisons += 1
+                        if self._are_subgraphs_identical(mod_sg, base_sg):
+                            best_exact_match = base_sg
+                            break
+
+                if best_exact_match:
+                    matched_baseline_ids.add(best_exact_match.center_node_id)
+                    matched_modified_ids.add(mod_sg.center_node_id)
+                    matched_results[0].append(self._get_node_indices(best_exact_match, baseline_graph))
+                    matched_results[1].append(self._get_node_indices(mod_sg, modified_graph))
+            if report:
+                report(len(self.subgraphs_modified))
+
+            instrumentation.count("matching.exact_comparisons", comparisons)
+            instrumentation.count("matching.exact_matches", len(matched_results[0]))
 
         # --- Phase 2: Inexact Matching (Thesis Eq 3.11) ---
+        with instrumentation.stage("matching.inexact"):
+            unmatched_modified = [sg for sg in self.subgraphs_modified
+                                  if sg.center_node_id not in matched_modified_ids]
+            unmatched_baseline = [sg for sg in self.subgraphs_baseline
+                                  if sg.center_node_id not in matched_baseline_ids]
+
+            # Only pairs that can fall below the threshold are scored (see CandidateGenerator),
+            # in blocks of pairs over precomputed subgraph features
+            with instrumentation.stage("matching.features"):
+                vocabulary = FeatureVocabulary()
+                modified_features = SubgraphFeatures.from_subgraphs(unmatched_modified, vocabulary)
+                baseline_features = SubgraphFeatures.from_subgraphs(unmatched_baseline, vocabulary)
+                distance = SubgraphDistance(modified_features, baseline_features, vocabulary.type_words,
+                                            self.w_type, self.w_value, self.w_topology)
+
+            with instrumentation.stage("matching.scoring"):
+                candidate_dists, candidate_mods, candidate_bases = self.candidate_scorer.score(distance)
+            instrumentation.count("matching.pairs_scored", self.candidate_scorer.last_scored_pairs)
+            instrumentation.count("matching.candidates_kept", len(candidate_dists))
+
+            if self.report_candidate_recall:
+                generated = self.candidate_scorer.last_qualifying_pairs
+                qualifying = self._count_qualifying_pairs(distance)
+                self.candidate_recall = generated / qualifying if qualifying else 1.0
+                instrumentation.count("matching.recall_generated_pairs", generated)
+                instrumentation.count("matching.recall_qualifying_pairs", qualifying)
+
+            # Sorted by lowest distance (Greedy approach for "argmin"), ties in subgraph order
+            candidates = [(dist, unmatched_modified[mod_pos], unmatched_baseline[base_pos], 1.0 - dist)
+                          for dist, mod_pos, base_pos in zip(candidate_dists.tolist(), candidate_mods.tolist(),
+                                                             candidate_bases.tolist())]
+
+            report = instrumentation.progress("Heuristic Matching Phase 2 Distance", len(candidates))
+            for index, (dist, mod_sg, base_sg, similarity) in enumerate(candidates):
+                if report:
+                    report(index)
+                if (mod_sg.center_node_id in matched_modified_ids or
+                        base_sg.center_node_id in matched_baseline_ids):
+                    continue
 
-        unmatched_modified = [sg for sg in self.subgraphs_modified
-                              if sg.center_node_id not in matched_modified_ids]
-        unmatched_baseline = [sg for sg in self.subgraphs_baseline
-                              if sg.center_node_id not in matched_baseline_ids]
-
-        # Calculate pairwise distances
-        candidates = []
-        for index, mod_sg in enumerate(unmatched_modified):
-            if index % 50 == 0:
-                print(f"Heuristic Matching Phase 2 Similarity Status: {(index/len(unmatched_modified))*100:.2f}%")
-            for base_sg in unmatched_baseline:
-                dist = self._calculate_distance(mod_sg, base_sg)
-                if dist < self.threshold:
-                    # Score is inverse of distance for similarity
-                    similarity = 1.0 - dist
-                    candidates.append((dist, mod_sg, base_sg, similarity))
-
-        # Sort by lowest distance (Greedy approach for "argmin")
-        candidates.sort(key=lambda x: x[0])
-
-        for index, (dist, mod_sg, base_sg, similarity) in enumerate(candidates):
-            if index % 50 == 0:
-                print(f"Heuristic Matching Phase 2 Distance Status: {(index/len(candidates))*100:.2f}%")
-            if (mod_sg.center_node_id in matched_modified_ids or
-                    base_sg.center_node_id in matched_baseline_ids):
-                continue
-
-            matched_modified_ids.add(mod_sg.center_node_id)
-            matched_baseline_ids.add(base_sg.center_node_id)
-
-            modified_results.append(ModificationSubgraphResult(
-                nodes_baseline_id=[n.id for n in base_sg.nodes],
-                nodes_modified_id=[n.id for n in mod_sg.nodes],
-                similarity_score=similarity
-            ))
+                matched_modified_ids.add(mod_sg.center_node_id)
+                matched_baseline_ids.add(base_sg.center_node_id)
+
+                modified_results[0].append(self._get_node_indices(base_sg, baseline_graph))
+                modified_results[1].append(self._get_node_indices(mod_sg, modified_graph))
+                modified_similarities.append(similarity)
+            if report:
+                report(len(candidates))
+            instrumentation.count("matching.inexact_matches", len(modified_similarities))
+
+            # A truncated subgraph that is matched took one of its best candidates, just like without
+            # truncation. Only unmatched ones could have taken a dropped candidate instead.
+            self.truncation_affected_subgraphs = [
+                unmatched_modified[mod_pos].center_node_id
+                for mod_pos in self.candidate_scorer.last_truncated_rows.tolist()
+                if unmatched_modified[mod_pos].center_node_id not in matched_modified_ids
+            ]
+            if self.truncation_affected_subgraphs:
+                warnings.warn(f"Candidate truncation may have changed the assignment of "
+                              f"{len(self.truncation_affected_subgraphs)} subgraphs, increase "
+                              f"max_candidates_per_subgraph", RuntimeWarning, stacklevel=2)
 
         # --- Phase 3: Residual Classification (Thesis Eq 3.13 - 3.15) ---
-
-        # Identify Added (S_added)
-        for index, mod_sg in enumerate(self.subgraphs_modified):
-            if index % 50 == 0:
-                print(f"Heuristic Matching Phase 3 Added Status: {(index/len(self.subgraphs_modified))*100:.2f}%")
-            if mod_sg.center_node_id not in matched_modified_ids:
-                added_results.append(DeltaSubgraphResult(
-                    nodes_baseline_id=[],  # No baseline counterpart
-                    nodes_modified_id=[n.id for n in mod_sg.nodes]
-                ))
-
-        # Identify Removed (S_removed)
-        for index, base_sg in enumerate(self.subgraphs_baseline):
-            if index % 50 == 0:
-                print(f"Heuristic Matching Phase 3 Removed Status: {(index/len(self.subgraphs_baseline))*100:.2f}%")
-            if base_sg.center_node_id not in matched_baseline_ids:
-                removed_results.append(DeltaSubgraphResult(
-                    nodes_baseline_id=[n.id for n in base_sg.nodes],
-                    nodes_modified_id=[]  # No modified counterpart
-                ))
-
-        return MatchingResult(
-            matched=matched_results,
-            modified=modified_results,
-            added_node_ids=added_results,
-            removed_node_ids=removed_results
+        with instrumentation.stage("matching.residual"):
+            # Identify Added (S_added)
+            report = instrumentation.progress("Heuristic Matching Phase 3 Added", len(self.subgraphs_modified))
+            for index, mod_sg in enumerate(self.subgraphs_modified):
+                if report:
+                    report(index)
+                if mod_sg.center_node_id not in matched_modified_ids:
+                    added_results[0].append(no_nodes)  # No baseline counterpart
+                    added_results[1].append(self._get_node_indices(mod_sg, modified_graph))
+            if report:
+                report(len(self.subgraphs_modified))
+
+            # Identify Removed (S_removed)
+            report = instrumentation.progress("Heuristic Matching Phase 3 Removed", len(self.subgraphs_baseline))
+            for index, base_sg in enumerate(self.subgraphs_baseline):
+                if report:
+                    report(index)
+                if base_sg.center_node_id not in matched_baseline_ids:
+                    removed_results[0].append(self._get_node_indices(base_sg, baseline_graph))
+                    removed_results[1].append(no_nodes)  # No modified counterpart
+            if report:
+                report(len(self.subgraphs_baseline))
+
+        ids = (baseline_graph.node_ids, modified_graph.node_ids)
+        return IndexedMatchingResult(
+            matched=SubgraphResultArrays.from_index_lists(MatchSubgraphResult, *ids, *matched_results),
+            modified=SubgraphResultArrays.from_index_lists(ModificationSubgraphResult, *ids, *modified_results,
+                                                           similarity_score=modified_similarities),
+            added_node_ids=SubgraphResultArrays.from_index_lists(DeltaSubgraphResult, *ids, *added_results),
+            removed_node_ids=SubgraphResultArrays.from_index_lists(DeltaSubgraphResult, *ids, *removed_results)
         )
 
+    @staticmethod
+    def _get_node_indices(sg: Subgraph, graph: ColumnarRuntime) -> np.ndarray:
+        """Node indices of a subgraph; views already hold them, ids of other subgraphs are looked up."""
+        if isinstance(sg, SubgraphView):
+            return sg.node_indices
+        node_index = graph.node_index
+        return np.fromiter((node_index[n.id] for n in sg.nodes), dtype=np.int64, count=len(sg.nodes))
+
+    def _count_qualifying_pairs(self, distance: SubgraphDistance) -> int:
+        """Number of all pairs with a distance below the threshold, scored without candidate generation."""
+        qualifying = 0
+        all_modified = np.arange(len(distance.modified), dtype=np.int64)
+        all_baseline = np.arange(len(distance.baseline), dtype=np.int64)
+        for mod_positions, base_positions in self.candidate_generator.cartesian_chunks(all_modified, all_baseline):
+            qualifying += int(np.count_nonzero(distance.distances(mod_positions, base_positions) < self.threshold))
+        return qualifying
+
     def _are_subgraphs_identical(self, sg1: Subgraph, sg2: Subgraph) -> bool:
         """
         Checks for topological and semantic identity (Exact Match).
@@ -147,6 +271,15 @@ class HeuristicMatchingAlgorithm(MatchingAlgorithm):
 
         return sg1_sigs == sg2_sigs
 
+    def _get_subgraph_fingerprint(self, sg: Subgraph) -> Tuple[int, int, bytes]:
+        """
+        Canonical fingerprint of a subgraph for exact matching.
+        Identical subgraphs (see `_are_subgraphs_identical`) always share the same fingerprint.
+        """
+        signatures = sorted([self._get_node_signature(n) for n in sg.nodes])
+        digest = hashlib.blake2b("\0".join(signatures).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return len(sg.nodes), len(sg.edges), digest
+
     def _calculate_distance(self, sg1: Subgraph, sg2: Subgraph) -> float:
         """
         Calculates distance between two subgraphs.
@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ....domain.models import Subgraph
+
+
+class FeatureVocabulary:
+    """Shared mapping of node types and values to dense ids for both runtimes."""
+
+    def __init__(self):
+        self.type_ids: Dict[str, int] = {}
+        self.value_ids: Dict[Optional[str], int] = {}
+
+    def type_id(self, node_type: str) -> int:
+        return self.type_ids.setdefault(node_type, len(self.type_ids))
+
+    def value_id(self, value: Optional[str]) -> int:
+        return self.value_ids.setdefault(value, len(self.value_ids))
+
+    @property
+    def type_words(self) -> int:
+        """Number of 64 bit words of a type bitmap covering all known types."""
+        return max(1, (len(self.type_ids) + 63) // 64)
+
+
+class SubgraphFeatures:
+    """
+    Features of a list of subgraphs used by the inexact matching phase.
+
+    Per subgraph the center node type and value are held as ids, and the set of node
+    types of the whole subgraph as a sorted id array (CSR layout). For batched set
+    operations the type sets are also available as bitmaps.
+    """
+
+    def __init__(self, center_type: np.ndarray, center_value: np.ndarray, type_offsets: np.ndarray,
+                 type_members: np.ndarray, type_bitmap: Optional[np.ndarray] = None):
+        self.center_type = center_type
+        self.center_value = center_value
+        self.type_offsets = type_offsets
+        self.type_members = type_members
+        self.type_counts = np.diff(type_offsets)
+        self._type_bitmap = type_bitmap
+
+    def __len__(self) -> int:
+        return len(self.center_type)
+
+    def type_set(self, position: int) -> np.ndarray:
+        return self.type_members[self.type_offsets[position]:self.type_offsets[position + 1]]
+
+    def type_bitmap(self, words: int) -> np.ndarray:
+        """
+        Type sets as bitmaps of shape (subgraphs, words), bit `i` marking type id `i`.
+
+        Args:
+            words: Number of 64 bit words per bitmap. Has to cover all type ids of the
+                vocabulary, so features of both runtimes share the same layout.
+        """
+        if self._type_bitmap is None or self._type_bitmap.shape[1] != words:
+            bitmap = np.zeros((len(self), words), dtype=np.uint64)
+            rows = np.repeat(np.arange(len(self)), self.type_counts)
+            members = self.type_members.astype(np.uint64)
+            np.bitwise_or.at(bitmap, (rows, (members >> np.uint64(6)).astype(np.int64)),
+                             np.left_shift(np.uint64(1), members & np.uint64(63)))
+            self._type_bitmap = bitmap
+        return self._type_bitmap
+
+    @classmethod
+    def from_subgraphs(cls, subgraphs: List[Subgraph], vocabulary: FeatureVocabulary) -> "SubgraphFeatures":
+        count = len(subgraphs)
+        center_type = np.empty(count, dtype=np.int32)
+        center_value = np.empty(count, dtype=np.int32)
+        type_offsets = np.zeros(count + 1, dtype=np.int64)
+        type_members: List[int] = []
+
+        for position, sg in enumerate(subgraphs):
+            center = next(n for n in sg.nodes if n.id == sg.center_node_id)
+            center_type[position] = vocabulary.type_id(center.type)
+            center_value[position] = vocabulary.value_id(center.value)
+            type_members.extend(sorted({vocabulary.type_id(n.type) for n in sg.nodes}))
+            type_offsets[position + 1] = len(type_members)
+
+        return cls(center_type, center_value, type_offsets, np.asarray(type_members, dtype=np.int32))
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+
+from ....domain.models import Runtime, ColumnarRuntime
+from ...helpers.instrumentation import current_instrumentation
+from ...helpers.array_store import encode_strings, decode_strings, write_arrays, read_arrays, directory_size
+from ..runtime_parser.runtime_parser import RuntimeParserService
+
+# Bump whenever the persisted columns of ColumnarRuntime change
+SCHEMA_VERSION = 1
+
+_MANIFEST_FILE = "manifest.json"
+_HASH_INDEX_FILE = "hash-index.json"
+_STRING_COLUMNS = ("strings_blob", "strings_offsets")
+
+
+class RuntimeCacheService:
+    """
+    Persistent on-disk cache of parsed runtimes.
+
+    Entries are keyed by the content hash of the runtime file and the schema version, so
+    a changed file or an incompatible cache layout never hits a stale entry. Every entry
+    stores the columns of a ColumnarRuntime as `.npy` files plus its string table and is
+    loaded memory-mapped. The total size of the cache is bounded by evicting the least
+    recently used entries.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: Optional[int] = 4 * 1024 ** 3,
+                 parser: Optional[RuntimeParserService] = None):
+        """
+        Args:
+            cache_dir: Directory holding the cache entries. Created if missing.
+            max_size_bytes: Upper bound for the total cache size. None disables eviction.
+            parser: Parser used on cache misses.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.parser = parser or RuntimeParserService()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, path: str, streaming: bool = False, track_memory: bool = False) -> Runtime:
+        """
+        Returns the runtime stored at the given path, parsing it only on a cache miss. A cached
+        runtime is backed by its memory-mapped columns and builds nodes, edges and stacks on
+        first access.
+
+        Args:
+            path: Path to the runtime JSON file.
+            streaming: Use the incremental parser on a cache miss.
+            track_memory: Record the peak parsing memory in the parser's `last_peak_memory`.
+        """
+        key = self.key_for(path)
+
+        columnar = self.get(key)
+        if columnar is not None:
+            current_instrumentation().count("runtime_cache.hits")
+            return columnar.to_runtime()
+
+        current_instrumentation().count("runtime_cache.misses")
+        runtime = self.parser.parse_file(path, streaming=streaming, track_memory=track_memory)
+        self.put(key, runtime.to_columnar())
+        return runtime
+
+    def key_for(self, path: str) -> str:
+        """Cache key of a runtime file: its content hash combined with the schema version."""
+        return f"{self._content_hash(path)}-v{SCHEMA_VERSION}"
+
+    def get(self, key: str) -> Optional[ColumnarRuntime]:
+        """Loads a cached runtime and marks it as recently used. Broken entries are dropped."""
+        entry_dir = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry_dir, _MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get("schema_version") != SCHEMA_VERSION:
+                raise ValueError("Schema version mismatch")
+
+            arrays = read_arrays(entry_dir, ColumnarRuntime.COLUMNS + _STRING_COLUMNS)
+            strings = decode_strings(arrays.pop("strings_blob"), arrays.pop("strings_offsets"))
+            columnar = ColumnarRuntime(strings, manifest["node_count"], **arrays)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # The manifest modification time tracks the last access for LRU eviction
+        os.utime(manifest_path)
+        return columnar
+
+    def put(self, key: str, columnar: ColumnarRuntime):
+        """Stores a runtime under the given key and evicts old entries if the cache is too large."""
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry_dir):
+            return
+
+        # Write into a temporary directory first, so concurrent readers never see partial entries
+        temp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            strings_blob, strings_offsets = encode_strings(columnar.strings)
+            arrays = {name: getattr(columnar, name) for name in ColumnarRuntime.COLUMNS}
+            arrays["strings_blob"] = strings_blob
+            arrays["strings_offsets"] = strings_offsets
+            write_arrays(temp_dir, arrays)
+
+            with open(os.path.join(temp_dir, _MANIFEST_FILE), 'w') as f:
+                json.dump({"schema_version": SCHEMA_VERSION, "node_count": columnar.node_count}, f)
+
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry in the meantime
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self):
+        """Removes entries of other schema versions and the least recently used ones beyond the size bound."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir) or name.startswith(".tmp-"):
+                continue
+
+            manifest_path = os.path.join(entry_dir, _MANIFEST_FILE)
+            if not name.endswith(f"-v{SCHEMA_VERSION}") or not os.path.isfile(manifest_path):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+
+            entries.append((os.path.getmtime(manifest_path), directory_size(entry_dir), entry_dir))
+
+        if self.max_size_bytes is None:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+    def _content_hash(self, path: str) -> str:
+        """
+        Hashes the file content. Hashes are remembered per path, size and modification
+        time, so unchanged files are not re-read on every run.
+        """
+        stat = os.stat(path)
+        stat_key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        index = self._read_hash_index()
+        content_hash = index.get(stat_key)
+        if content_hash is not None:
+            return content_hash
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        # Only keep the latest hash per path
+        path_prefix = f"{os.path.abspath(path)}:"
+        index = {key: value for key, value in index.items() if not key.startswith(path_prefix)}
+        index[stat_key] = content_hash
+        self._write_hash_index(index)
+        return content_hash
+
+    def _read_hash_index(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.cache_dir, _HASH_INDEX_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_hash_index(self, index: Dict[str, str]):
+        index_path = os.path.join(self.cache_dir, _HASH_INDEX_FILE)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(temp_path, index_path)
@@ -0,0 +1,137 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from ....domain.models import Runtime, CodeLinkContainer, BatchComparison
+from ..matching.contracts.differentiation_algorithm import DifferentiationResult
+from ...helpers.instrumentation import current_instrumentation
+from .concurrent_stages import ConcurrentRuntimeStages
+from .runtime_causal_link import RuntimeCausalLinkService
+
+# Receives a finished comparison with both runtimes, the matching result, the code links and the time tracking
+ResultHandler = Callable[[BatchComparison, Runtime, Runtime, DifferentiationResult, CodeLinkContainer, dict], Any]
+
+# State of a worker process, inherited from the calling process by `_init_worker`
+_worker: Dict[str, Any] = {}
+
+
+class BatchComparisonService:
+    """
+    Runs many comparisons that share runtimes, e.g. one baseline against many candidates.
+
+    Every distinct runtime file is loaded and decomposed into subgraphs exactly once.
+    Comparisons run in manifest order in waves of `workers` comparisons: before a wave,
+    the runtimes it needs are loaded and their subgraphs generated (concurrently, see
+    ConcurrentRuntimeStages), then its comparisons run in forked worker processes that
+    inherit the loaded runtimes. A runtime is released after the last wave using it, so
+    only the runtimes of the current wave and those needed later are held in memory.
+    Comparisons may use worker processes themselves, e.g. for scoring matching candidates.
+
+    Forking is required for worker processes. Where it is not available, or with a single
+    worker, the comparisons run one after another in the calling process.
+    """
+
+    def __init__(self, causal_link_service: RuntimeCausalLinkService, load_runtime: Callable[[str], Runtime],
+                 workers: int = 1):
+        """
+        Args:
+            causal_link_service: Service comparing a pair of runtimes; its subgraph algorithm decomposes every runtime.
+            load_runtime: Loads the runtime stored at a path.
+            workers: Number of comparisons running at once.
+        """
+        self.causal_link_service = causal_link_service
+        self.load_runtime = load_runtime
+        self.workers = max(1, workers)
+
+    def run(self, comparisons: Sequence[BatchComparison], handle_result: ResultHandler) -> List[Any]:
+        """
+        Runs all comparisons. A failing comparison aborts the batch.
+
+        Args:
+            comparisons: The comparisons to run.
+            handle_result: Called with every finished comparison, in the process that ran it. Writing the
+                results there avoids sending them between processes.
+
+        Returns:
+            The return values of `handle_result` in the order of the comparisons. With worker
+            processes, they have to be picklable.
+        """
+        waves = [comparisons[start:start + self.workers] for start in range(0, len(comparisons), self.workers)]
+        last_wave = {}
+        for wave_index, wave in enumerate(waves):
+            for comparison in wave:
+                last_wave[_path_key(comparison.baseline)] = wave_index
+                last_wave[_path_key(comparison.modified)] = wave_index
+
+        instrumentation = current_instrumentation()
+        loaded: Dict[str, Tuple[Runtime, Any]] = {}
+        results = []
+        for wave_index, wave in enumerate(waves):
+            paths = {}
+            for comparison in wave:
+                for path in (comparison.baseline, comparison.modified):
+                    if _path_key(path) not in loaded:
+                        paths.setdefault(_path_key(path), path)
+
+            with instrumentation.stage("batch.load"):
+                runtimes = [self.load_runtime(path) for path in paths.values()]
+            with instrumentation.stage("batch.subgraph_generation"):
+                subgraphs = self._generate_subgraphs(runtimes)
+            instrumentation.count("batch.runtimes", len(runtimes))
+            loaded.update(zip(paths, zip(runtimes, subgraphs)))
+            del runtimes, subgraphs
+
+            with instrumentation.stage("batch.compare"):
+                results.extend(self._compare_wave(wave, loaded, handle_result))
+            instrumentation.count("batch.comparisons", len(wave))
+
+            for key in [key for key in loaded if last_wave[key] == wave_index]:
+                del loaded[key]
+        return results
+
+    def _generate_subgraphs(self, runtimes: List[Runtime]) -> list:
+        subgraph_algorithm = self.causal_link_service.subgraph_algorithm
+        if self.workers > 1 and len(runtimes) > 1:
+            return ConcurrentRuntimeStages(subgraph_algorithm).generate(runtimes)
+        return [subgraph_algorithm.generate(runtime) for runtime in runtimes]
+
+    def _compare_wave(self, wave: Sequence[BatchComparison], loaded: Dict[str, Tuple[Runtime, Any]],
+                      handle_result: ResultHandler) -> List[Any]:
+        _init_worker(self.causal_link_service, handle_result, list(wave), loaded)
+        try:
+            if len(wave) == 1 or not ConcurrentRuntimeStages.available():
+                return [_compare_task(position) for position in range(len(wave))]
+
+            # Unlike those of a multiprocessing pool, executor workers are not daemonic, so the
+            # matching can start worker processes of its own
+            with ProcessPoolExecutor(len(wave), mp_context=get_context("fork")) as executor:
+                return list(executor.map(_compare_task, range(len(wave))))
+        finally:
+            _worker.clear()
+
+
+def _path_key(path: str) -> str:
+    return os.path.realpath(path)
+
+
+def _init_worker(causal_link_service: RuntimeCausalLinkService, handle_result: ResultHandler,
+                 comparisons: List[BatchComparison], loaded: Dict[str, Tuple[Runtime, Any]]):
+    # Worker processes inherit this state by forking, so runtimes and subgraphs are never pickled
+    _worker["causal_link_service"] = causal_link_service
+    _worker["handle_result"] = handle_result
+    _worker["comparisons"] = comparisons
+    _worker["loaded"] = loaded
+
+
+def _compare_task(position: int) -> Any:
+    comparison: BatchComparison = _worker["comparisons"][position]
+    baseline, subgraphs_baseline = _worker["loaded"][_path_key(comparison.baseline)]
+    modified, subgraphs_modified = _worker["loaded"][_path_key(comparison.modified)]
+
+    print(f"Comparing {comparison.name}")
+    matching_result, code_links, time_tracking = _worker["causal_link_service"].compare(
+        baseline, comparison.code_evolution_baseline, modified, comparison.code_evolution_modified,
+        subgraphs_baseline=subgraphs_baseline, subgraphs_modified=subgraphs_modified
+    )
+    return _worker["handle_result"](comparison, baseline, modified, matching_result, code_links, time_tracking)
@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from multiprocessing import get_all_start_methods, get_context, resource_tracker
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ....domain.models import Runtime, ColumnarRuntime, SubgraphPartition
+from ...helpers.array_store import encode_strings, decode_strings
+from ...helpers.shared_arrays import SharedArrays, SharedArrayDescriptor, take_shared_arrays
+from ..subgraph_creation.contracts.subgraph_algorithm import SubgraphAlgorithm
+
+_STRING_COLUMNS = ("strings_blob", "strings_offsets")
+_PARTITION_COLUMNS = ("center_index", "node_offsets", "node_indices", "edge_offsets", "edge_indices")
+
+# State of a worker process, inherited from the calling process by `_init_worker`
+_worker: Dict[str, object] = {}
+
+
+class PendingSubgraphs:
+    """Subgraph generation running in worker processes, see `ConcurrentRuntimeStages.submit`."""
+
+    def __init__(self, results: list):
+        self._results = results
+
+    def collect(self, runtimes: Optional[Sequence[Runtime]] = None) -> List[SubgraphPartition]:
+        """
+        Waits for the workers and returns the subgraphs of every runtime.
+
+        Args:
+            runtimes: The runtimes in submission order, holding the same data the workers used.
+                The columnar runtime of each worker is attached to them. Without runtimes, every
+                partition refers to a runtime backed by the columns of its worker (its `runtime`),
+                which builds its domain models on first access.
+
+        Returns:
+            One SubgraphPartition per runtime.
+        """
+        partitions = []
+        for position in range(len(self._results)):
+            descriptor, node_count = self._results.pop(0).get()
+            runtime = runtimes[position] if runtimes is not None else None
+            partitions.append(_receive_partition(runtime, take_shared_arrays(descriptor), node_count))
+        return partitions
+
+    def release(self):
+        """Frees the shared memory of finished results that were not collected."""
+        for result in self._results:
+            if result.ready() and result.successful():
+                take_shared_arrays(result.get()[0])
+        self._results = []
+
+
+class ConcurrentRuntimeStages:
+    """
+    Runs the per-runtime stages of a comparison, loading a runtime and generating its
+    subgraphs, for several runtimes at once with one forked worker process per runtime.
+
+    Workers inherit the subgraph algorithm (and runtimes that are already loaded) from
+    the calling process and hand the subgraphs back as SubgraphPartition index arrays
+    in shared memory, together with the columnar runtime they were computed on. So no
+    domain model is pickled and the caller does not build the columnar representation
+    again. A runtime loaded by a worker is parsed only there: the caller receives a
+    runtime backed by the worker's columns.
+
+    Forking is required. Where it is not available, the stages run one after another
+    in the calling process.
+    """
+
+    def __init__(self, subgraph_algorithm: SubgraphAlgorithm, load_runtime: Optional[Callable[[str], Runtime]] = None):
+        """
+        Args:
+            subgraph_algorithm: Algorithm generating the subgraphs of every runtime.
+            load_runtime: Loads the runtime stored at a path, required for `submit`.
+        """
+        self.subgraph_algorithm = subgraph_algorithm
+        self.load_runtime = load_runtime
+
+    @staticmethod
+    def available() -> bool:
+        """Whether worker processes can be forked on this platform."""
+        return "fork" in get_all_start_methods()
+
+    def generate(self, runtimes: Sequence[Runtime]) -> List[SubgraphPartition]:
+        """
+        Generates the subgraphs of loaded runtimes concurrently.
+
+        Args:
+            runtimes: The runtimes to decompose.
+
+        Returns:
+            One SubgraphPartition per runtime.
+        """
+        if not self.available():
+            return [_as_partition(runtime, self.subgraph_algorithm.generate(runtime)) for runtime in runtimes]
+
+        with self._start(runtimes, [None] * len(runtimes)) as pending:
+            return pending.collect(runtimes)
+
+    @contextmanager
+    def submit(self, paths: Sequence[str]) -> Iterator[Optional[PendingSubgraphs]]:
+        """
+        Loads the runtimes stored at the given paths and generates their subgraphs in
+        worker processes, one per path. `PendingSubgraphs.collect` without arguments
+        returns the partitions together with the runtimes built from the workers' columns.
+
+        Workers still running when the block is left are terminated. Yields None if
+        workers cannot be forked; the caller then loads the runtimes itself.
+
+        Args:
+            paths: Paths of the runtime files.
+        """
+        if self.load_runtime is None:
+            raise ValueError("Loading runtimes in workers requires load_runtime")
+        if not self.available():
+            yield None
+            return
+
+        with self._start([], list(paths)) as pending:
+            yield pending
+
+    @contextmanager
+    def _start(self, runtimes: Sequence[Runtime], paths: Sequence[Optional[str]]) -> Iterator[PendingSubgraphs]:
+        # Workers share the resource tracker of this process, which owns the shared memory they hand over
+        resource_tracker.ensure_running()
+        pool = get_context("fork").Pool(max(1, len(paths)), _init_worker,
+                                        (self.subgraph_algorithm, self.load_runtime, list(runtimes)))
+        pending = PendingSubgraphs([pool.apply_async(_generate_task, (position, path))
+                                    for position, path in enumerate(paths)])
+        try:
+            yield pending
+            pool.close()
+        finally:
+            pool.terminate()
+            pending.release()
+
+
+def _init_worker(subgraph_algorithm: SubgraphAlgorithm, load_runtime: Optional[Callable[[str], Runtime]],
+                 runtimes: List[Runtime]):
+    # Arguments are inherited by forking, not pickled
+    _worker["subgraph_algorithm"] = subgraph_algorithm
+    _worker["load_runtime"] = load_runtime
+    _worker["runtimes"] = runtimes
+
+
+def _generate_task(position: int, path: Optional[str]) -> Tuple[SharedArrayDescriptor, int]:
+    runtime = _worker["runtimes"][position] if path is None else _worker["load_runtime"](path)
+    partition = _as_partition(runtime, _worker["subgraph_algorithm"].generate(runtime))
+    columnar = runtime.to_columnar()
+
+    arrays = {name: getattr(columnar, name) for name in ColumnarRuntime.COLUMNS}
+    arrays.update(zip(_STRING_COLUMNS, encode_strings(columnar.strings)))
+    arrays.update((name, getattr(partition, name)) for name in _PARTITION_COLUMNS)
+
+    # The calling process takes over the shared memory
+    shared = SharedArrays(arrays)
+    shared.detach()
+    return shared.descriptor, columnar.node_count
+
+
+def _as_partition(runtime: Runtime, subgraphs) -> SubgraphPartition:
+    if isinstance(subgraphs, SubgraphPartition):
+        return subgraphs
+    return SubgraphPartition.from_subgraphs(runtime, subgraphs)
+
+
+def _receive_partition(runtime: Optional[Runtime], arrays: dict, node_count: int) -> SubgraphPartition:
+    partition = {name: arrays.pop(name) for name in _PARTITION_COLUMNS}
+    strings = decode_strings(arrays.pop("strings_blob"), arrays.pop("strings_offsets"))
+    columnar = ColumnarRuntime(strings, node_count, **arrays)
+    if runtime is None:
+        runtime = Runtime.from_columnar(columnar)
+    else:
+        runtime.attach_columnar(columnar)
+    return SubgraphPartition(runtime, **partition)
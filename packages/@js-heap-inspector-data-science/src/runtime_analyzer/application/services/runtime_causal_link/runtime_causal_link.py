@@ -1,8 +1,10 @@
 import time
+from typing import List, Optional
 
-from ....domain.models import Runtime, MatchingResult, CodeLinkContainer, CodeEvolution
-from ..matching.contracts.differentiation_algorithm import MatchingAlgorithm
-from ..subgraph_creation.contracts.subgraph_algorithm import SubgraphAlgorithm
+from ...helpers.instrumentation import Instrumentation, current_instrumentation, use_instrumentation
+from ....domain.models import Runtime, CodeLinkContainer, CodeEvolution
+from ..matching.contracts.differentiation_algorithm import MatchingAlgorithm, DifferentiationResult
+from ..subgraph_creation.contracts.subgraph_algorithm import SubgraphAlgorithm, Subgraphs
 from ..code_link.contracts.code_link_algorithm import CodeLinkAlgorithm
 
 
@@ -20,7 +22,8 @@ class RuntimeCausalLinkService:
 
     def __init__(self, differentiation_algorithm: type[MatchingAlgorithm], subgraph_algorithm: type[SubgraphAlgorithm],
                  code_link_algorithm: type[CodeLinkAlgorithm], differentiation_params: dict = None,
-                 subgraph_params: dict = None, code_link_params: dict = None):
+                 subgraph_params: dict = None, code_link_params: dict = None, concurrent_stages: bool = False,
+                 instrumentation: Optional[Instrumentation] = None, checkpoint_dir: Optional[str] = None):
         """
         Initializes the service with a specific differentiation algorithm.
         
@@ -31,15 +34,29 @@ class RuntimeCausalLinkService:
             differentiation_params: Parameters for the differentiation algorithm.
             subgraph_params: Parameters for the subgraph algorithm.
             code_link_params: Parameters for the code link algorithm.
+            concurrent_stages: Generate the subgraphs of both runtimes concurrently in worker
+                processes (see ConcurrentRuntimeStages).
+            instrumentation: Receives stage timings, counters and progress of `compare` (see
+                Profiler). None uses the active instrumentation, which records nothing by default.
+            checkpoint_dir: Directory persisting the output of every stage (see CheckpointService).
+                Stages whose inputs and parameters did not change are loaded instead of run.
         """
         self.differentiation_algorithm = differentiation_algorithm
         self.subgraph_algorithm = subgraph_algorithm(**(subgraph_params or {}))
+        self.subgraph_params = subgraph_params or {}
         self.code_link_algorithm = code_link_algorithm
         self.differentiation_params = differentiation_params or {}
         self.code_link_params = code_link_params or {}
+        self.concurrent_stages = concurrent_stages
+        self.instrumentation = instrumentation
+        self.checkpoints = None
+        if checkpoint_dir:
+            from ..checkpoint.checkpoint import CheckpointService
+            self.checkpoints = CheckpointService(checkpoint_dir)
 
     def compare(self, baseline: Runtime, code_evolution_baseline: list[CodeEvolution], modified: Runtime,
-                code_evolution_modified: list[CodeEvolution]) -> tuple[MatchingResult, CodeLinkContainer, dict]:
+                code_evolution_modified: list[CodeEvolution], subgraphs_baseline: Optional[Subgraphs] = None,
+                subgraphs_modified: Optional[Subgraphs] = None) -> tuple[DifferentiationResult, CodeLinkContainer, dict]:
         """
         Executes the differentiation process between baseline and modified runtimes.
         
@@ -48,51 +65,126 @@ class RuntimeCausalLinkService:
             code_evolution_baseline: The list of code evolutions for the baseline runtime.
             modified: The modified Runtime domain model.
             code_evolution_modified: The list of code evolutions for the modified runtime.
+            subgraphs_baseline: Subgraphs of the baseline runtime if already generated, e.g. while parsing.
+            subgraphs_modified: Subgraphs of the modified runtime if already generated.
             
         Returns:
-            A tuple containing a MatchingResult object and a CodeLink object.
+            A tuple containing the DifferentiationResult, the CodeLinkContainer and the time tracking.
         """
         time_tracking = {}
 
-        time_tracking["subgraph_generation_start"] = time.time()
-        subgraphs_baseline = self.subgraph_algorithm.generate(baseline)
-        print(f"Generated subgraphs for baseline with length {subgraphs_baseline.__len__()}")
+        with use_instrumentation(self.instrumentation) as instrumentation:
+            time_tracking["subgraph_generation_start"] = time.time()
+            with instrumentation.stage("subgraph_generation"):
+                subgraph_keys = self._subgraph_keys([baseline, modified])
+                if subgraphs_baseline is None or subgraphs_modified is None:
+                    subgraphs_baseline, subgraphs_modified = self._generate_subgraphs([baseline, modified],
+                                                                                      subgraph_keys)
+                elif subgraph_keys:
+                    self.checkpoints.save_subgraphs(subgraph_keys[0], baseline, subgraphs_baseline)
+                    self.checkpoints.save_subgraphs(subgraph_keys[1], modified, subgraphs_modified)
+            instrumentation.count("subgraphs.baseline", len(subgraphs_baseline))
+            instrumentation.count("subgraphs.modified", len(subgraphs_modified))
+            print(f"Generated subgraphs for baseline with length {subgraphs_baseline.__len__()}")
+            print(f"Generated subgraphs for modified with length {subgraphs_modified.__len__()}")
+            time_tracking["subgraph_generation_end"] = time.time()
 
-        subgraphs_modified = self.subgraph_algorithm.generate(modified)
-        print(f"Generated subgraphs for modified with length {subgraphs_modified.__len__()}")
-        time_tracking["subgraph_generation_end"] = time.time()
+            time_tracking["differentiation_algorithm_start"] = time.time()
+            with instrumentation.stage("matching"):
+                matching_key = self.checkpoints.stage_key("matching", subgraph_keys, self.differentiation_algorithm,
+                                                          self.differentiation_params) if subgraph_keys else None
+                differentiation = self._load_checkpoint("matching", matching_key, self.checkpoints.load_matching,
+                                                        baseline, modified) if matching_key else None
+                if differentiation is None:
+                    instantiated_differentiation_algorithm = self.differentiation_algorithm(baseline,
+                                                                                            subgraphs_baseline,
+                                                                                            modified,
+                                                                                            subgraphs_modified,
+                                                                                            **self.differentiation_params)
+                    differentiation = instantiated_differentiation_algorithm.differentiate()
+                    if matching_key:
+                        self.checkpoints.save_matching(matching_key, baseline, modified, differentiation)
+            print(
+                f"Executed matching algorithm with following results: \n "
+                f"Matched: {differentiation.matched.__len__()}\n "
+                f"    Total Nodes: {differentiation.node_count('matched')}\n"
+                f"Modified: {differentiation.modified.__len__()}\n "
+                f"    Total Nodes: {differentiation.node_count('modified')}\n"
+                f"Added: {differentiation.added_node_ids.__len__()}\n "
+                f"    Total Nodes: {differentiation.node_count('added_node_ids')}\n"
+                f"Removed: {differentiation.removed_node_ids.__len__()}\n"
+                f"    Total Nodes: {differentiation.node_count('removed_node_ids')}\n"
+            )
+            time_tracking["differentiation_algorithm_end"] = time.time()
 
-        time_tracking["differentiation_algorithm_start"] = time.time()
-        instantiated_differentiation_algorithm = self.differentiation_algorithm(baseline,
-                                                                                subgraphs_baseline,
-                                                                                modified,
-                                                                                subgraphs_modified,
-                                                                                **self.differentiation_params)
-        differentiation = instantiated_differentiation_algorithm.differentiate()
-        print(
-            f"Executed matching algorithm with following results: \n "
-            f"Matched: {differentiation.matched.__len__()}\n "
-            f"    Total Nodes: {sum([len(matched.nodes_baseline_id) + len(matched.nodes_modified_id) for matched in differentiation.matched])}\n"
-            f"Modified: {differentiation.modified.__len__()}\n "
-            f"    Total Nodes: {sum([len(modified.nodes_baseline_id) + len(modified.nodes_modified_id) for modified in differentiation.modified])}\n"
-            f"Added: {differentiation.added_node_ids.__len__()}\n "
-            f"    Total Nodes: {sum([len(added.nodes_baseline_id) + len(added.nodes_modified_id) for added in differentiation.added_node_ids])}\n"
-            f"Removed: {differentiation.removed_node_ids.__len__()}\n"
-            f"    Total Nodes: {sum([len(removed.nodes_baseline_id) + len(removed.nodes_modified_id) for removed in differentiation.removed_node_ids])}\n"
-        )
-        time_tracking["differentiation_algorithm_end"] = time.time()
-
-        time_tracking["code_link_algorithm_start"] = time.time()
-        instantiated_code_link = self.code_link_algorithm(differentiation, baseline, code_evolution_baseline, modified,
-                                                          code_evolution_modified, **self.code_link_params)
-        links = instantiated_code_link.link()
-        print(
-            "Executed code link algorithm with following results: \n"
-            f"Regressions: {links.regressions.__len__()}\n"
-            f"Improvements: {links.improvements.__len__()}\n"
-            f"Unmappable Regressions: {links.unmappable_regressions.__len__()}\n"
-            f"Unmappable Improvements: {links.unmappable_improvements.__len__()}\n"
-        )
-        time_tracking["code_link_algorithm_end"] = time.time()
+            time_tracking["code_link_algorithm_start"] = time.time()
+            with instrumentation.stage("code_link"):
+                code_link_key = None
+                if matching_key:
+                    evolutions = [[evolution.model_dump() for evolution in evolutions]
+                                  for evolutions in (code_evolution_baseline, code_evolution_modified)]
+                    code_link_key = self.checkpoints.stage_key("code_link", [matching_key], self.code_link_algorithm,
+                                                               {"params": self.code_link_params,
+                                                                "code_evolutions": evolutions})
+                links = self._load_checkpoint("code_link", code_link_key,
+                                              self.checkpoints.load_code_links) if code_link_key else None
+                if links is None:
+                    instantiated_code_link = self.code_link_algorithm(differentiation, baseline,
+                                                                      code_evolution_baseline, modified,
+                                                                      code_evolution_modified, **self.code_link_params)
+                    links = instantiated_code_link.link()
+                    if code_link_key:
+                        self.checkpoints.save_code_links(code_link_key, links)
+            print(
+                "Executed code link algorithm with following results: \n"
+                f"Regressions: {links.regressions.__len__()}\n"
+                f"Improvements: {links.improvements.__len__()}\n"
+                f"Unmappable Regressions: {links.unmappable_regressions.__len__()}\n"
+                f"Unmappable Improvements: {links.unmappable_improvements.__len__()}\n"
+            )
+            time_tracking["code_link_algorithm_end"] = time.time()
 
         return differentiation, links, time_tracking
+
+    def _subgraph_keys(self, runtimes: List[Runtime]) -> Optional[List[str]]:
+        """Checkpoint keys of the subgraphs of every runtime, None without checkpoints."""
+        if self.checkpoints is None:
+            return None
+        return [self.checkpoints.stage_key("subgraphs", [self.checkpoints.runtime_key(runtime)],
+                                           type(self.subgraph_algorithm), self.subgraph_params)
+                for runtime in runtimes]
+
+    def _generate_subgraphs(self, runtimes: List[Runtime], keys: Optional[List[str]]) -> list:
+        """Generates the subgraphs of every runtime that are not stored as checkpoint."""
+        subgraphs = [None] * len(runtimes)
+        if keys:
+            for position, (runtime, key) in enumerate(zip(runtimes, keys)):
+                subgraphs[position] = self._load_checkpoint("subgraphs", key, self.checkpoints.load_subgraphs,
+                                                            runtime)
+
+        missing = [position for position, loaded in enumerate(subgraphs) if loaded is None]
+        if self.concurrent_stages and missing:
+            # Imported on use, multiprocessing adds to the startup of every run
+            from .concurrent_stages import ConcurrentRuntimeStages
+
+            generated = ConcurrentRuntimeStages(self.subgraph_algorithm).generate([runtimes[i] for i in missing])
+        else:
+            generated = [self.subgraph_algorithm.generate(runtimes[i]) for i in missing]
+
+        for position, runtime_subgraphs in zip(missing, generated):
+            subgraphs[position] = runtime_subgraphs
+            if keys:
+                self.checkpoints.save_subgraphs(keys[position], runtimes[position], runtime_subgraphs)
+        return subgraphs
+
+    @staticmethod
+    def _load_checkpoint(stage: str, key: str, load, *args):
+        """Loads a stage output with the given loader and counts checkpoint hits and misses."""
+        output = load(key, *args)
+        instrumentation = current_instrumentation()
+        if output is None:
+            instrumentation.count("checkpoint.misses")
+        else:
+            instrumentation.count("checkpoint.hits")
+            print(f"Loaded {stage} from checkpoint {key[:12]}")
+        return output
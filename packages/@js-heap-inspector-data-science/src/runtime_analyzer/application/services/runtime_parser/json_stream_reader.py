@@ -0,0 +1,126 @@
+import json
+from typing import Any, Iterator, TextIO, Tuple
+
+from ....domain.exceptions import ParsingError
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonStreamReader:
+    """
+    Incremental reader for a top-level JSON object.
+
+    Only a sliding window of the underlying text is kept in memory. Members whose value
+    is an array can be consumed element by element, so large collections (e.g. the nodes
+    of a runtime) never have to exist as one decoded list of dicts.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 20):
+        """
+        Args:
+            stream: Text file handle positioned at the start of the JSON document.
+            chunk_size: Number of characters read from the stream at once.
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def iter_members(self) -> Iterator[Tuple[str, bool]]:
+        """
+        Iterates over the members of the top-level object.
+
+        Yields tuples of (key, is_array). The caller has to consume the value before
+        advancing, either with `read_value` or, for arrays, with `iter_array`.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+            return
+
+        while True:
+            key = self._decode()
+            if not isinstance(key, str):
+                raise ParsingError("Invalid JSON input: expected an object key")
+            self._expect(":")
+            yield key, self._peek() == "["
+
+            separator = self._next_char()
+            if separator == "}":
+                break
+            if separator != ",":
+                raise ParsingError(f"Invalid JSON input: expected ',' or '}}' but found {separator!r}")
+
+    def iter_array(self) -> Iterator[Any]:
+        """Decodes the array at the current position one element at a time."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+
+        while True:
+            yield self._decode()
+            separator = self._next_char()
+            if separator == "]":
+                break
+            if separator != ",":
+                raise ParsingError(f"Invalid JSON input: expected ',' or ']' but found {separator!r}")
+
+    def read_value(self) -> Any:
+        """Decodes the complete value at the current position."""
+        return self._decode()
+
+    def _fill(self) -> bool:
+        """Reads the next chunk into the window and drops the consumed prefix."""
+        if self._eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer) or not self._fill():
+                return
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+        if self._position >= len(self._buffer):
+            raise ParsingError("Invalid JSON input: unexpected end of input")
+        return self._buffer[self._position]
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        self._position += 1
+        return char
+
+    def _expect(self, expected: str):
+        char = self._next_char()
+        if char != expected:
+            raise ParsingError(f"Invalid JSON input: expected {expected!r} but found {char!r}")
+
+    def _decode(self) -> Any:
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as e:
+                # The value may just be cut off by the end of the window
+                if self._fill():
+                    continue
+                raise ParsingError(f"Invalid JSON input: {str(e)}") from e
+
+            # A number at the end of the window may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._position = end
+            return value
@@ -1,8 +1,26 @@
 import json
-from ....domain.models import Runtime
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional, TextIO
+
+from pydantic import ValidationError
+
+from ....domain.models import Runtime, Node, Edge, Stack
 from ....domain.exceptions import ParsingError
+from .json_stream_reader import JsonStreamReader
+
+_STREAMED_COLLECTIONS = {
+    "nodes": Node,
+    "edges": Edge,
+    "stacks": Stack,
+}
+
 
 class RuntimeParserService:
+    def __init__(self):
+        # Peak traced memory in bytes of the last parse run with `track_memory` enabled
+        self.last_peak_memory: Optional[int] = None
+
     def parse(self, raw_input: str) -> Runtime:
         """
         Parses a raw string into the Runtime domain model.
@@ -18,3 +36,84 @@ class RuntimeParserService:
             return Runtime.model_validate(data)
         except Exception as e:
             raise ParsingError(f"Failed to parse runtime data: {str(e)}") from e
+
+    def parse_stream(self, stream: TextIO, chunk_size: int = 1 << 20, track_memory: bool = False) -> Runtime:
+        """
+        Parses a runtime from a file handle without loading the whole document.
+
+        The `nodes`, `edges` and `stacks` arrays are decoded and validated element by element,
+        so only the final domain model and a window of `chunk_size` characters are held in memory.
+
+        Args:
+            stream: Text file handle containing JSON matching the Runtime structure.
+            chunk_size: Number of characters read from the stream at once.
+            track_memory: Record the peak traced memory of the run in `last_peak_memory`.
+
+        Returns:
+            The parsed Runtime.
+        """
+        with self._memory_tracking(track_memory):
+            return self._parse_stream(stream, chunk_size)
+
+    def parse_file(self, path: str, streaming: bool = False, track_memory: bool = False) -> Runtime:
+        """
+        Parses the runtime stored at the given path.
+
+        Args:
+            path: Path to the runtime JSON file.
+            streaming: Use the incremental parser instead of loading the whole file.
+            track_memory: Record the peak traced memory of the run in `last_peak_memory`.
+        """
+        with open(path, 'r') as f:
+            if streaming:
+                return self.parse_stream(f, track_memory=track_memory)
+
+            with self._memory_tracking(track_memory):
+                return self.parse(f.read())
+
+    @contextmanager
+    def _memory_tracking(self, enabled: bool):
+        """Records the peak traced memory of the enclosed block in `last_peak_memory`."""
+        if not enabled:
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline_memory, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            self.last_peak_memory = peak_memory - baseline_memory
+            if started_tracing:
+                tracemalloc.stop()
+
+    def _parse_stream(self, stream: TextIO, chunk_size: int) -> Runtime:
+        reader = JsonStreamReader(stream, chunk_size)
+        collections = {}
+
+        try:
+            for key, is_array in reader.iter_members():
+                model = _STREAMED_COLLECTIONS.get(key)
+                if model is None:
+                    # Unknown members are ignored by the Runtime model as well
+                    reader.read_value()
+                    continue
+
+                if not is_array:
+                    # Let the Runtime validation report the malformed member
+                    collections[key] = reader.read_value()
+                    continue
+
+                collections[key] = [model.model_validate(item) for item in reader.iter_array()]
+        except ValidationError as e:
+            raise ParsingError(f"Failed to parse runtime data: {str(e)}") from e
+
+        try:
+            # Elements are already validated, so the Runtime only wraps them
+            return Runtime(**collections)
+        except Exception as e:
+            raise ParsingError(f"Failed to parse runtime data: {str(e)}") from e
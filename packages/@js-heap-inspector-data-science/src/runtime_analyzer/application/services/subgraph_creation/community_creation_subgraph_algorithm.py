@@ -1,29 +1,118 @@
-import networkx as nx
-from typing import List, Dict
-from ....domain.models import Runtime, Subgraph, Edge
-from .contracts.subgraph_algorithm import SubgraphAlgorithm
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from ....domain.exceptions import UnsupportedAlgorithmError
+from ....domain.models import Runtime, Subgraph, Edge, ColumnarRuntime, SubgraphPartition
+from ....domain.models.columnar_runtime import build_csr
+from .contracts.subgraph_algorithm import SubgraphAlgorithm, Subgraphs
+from .louvain import WeightedGraph, louvain_labels
 
 class CommunityDetectionSubgraphAlgorithm(SubgraphAlgorithm):
     """
-    Algorithm that partitions the heap into disjoint communities using 
+    Algorithm that partitions the heap into disjoint communities using
     Modularity-based clustering (Louvain method).
-    
+
     This aligns with the 'Clustering' strategy in Figure 3.2 for large graphs,
-    automatically identifying dense topological structures. 
+    automatically identifying dense topological structures.
     """
 
-    def __init__(self, resolution: float = 1.0, seed: int = 1):
+    BACKENDS = ("native", "networkx")
+
+    def __init__(self, resolution: float = 1.0, seed: int = 1, backend: str = "native"):
         """
         Args:
-            resolution: Controls the size of communities. 
+            resolution: Controls the size of communities.
                         Higher values (>1) lead to smaller, more numerous communities.
                         Lower values (<1) lead to fewer, larger communities.
             seed: Random seed for reproducibility.
+            backend: "native" runs Louvain on the CSR arrays of the runtime, "networkx"
+                     uses `networkx.community.louvain_communities` (requires networkx).
         """
+        if backend not in self.BACKENDS:
+            raise UnsupportedAlgorithmError(f"Community detection backend '{backend}' is not supported.")
         self.resolution = resolution
         self.seed = seed
+        self.backend = backend
+
+    def generate(self, runtime: Runtime) -> Subgraphs:
+        if self.backend == "networkx":
+            return self._generate_networkx(runtime)
+        return self.partition(runtime)
+
+    def partition(self, runtime: Runtime) -> SubgraphPartition:
+        """
+        Partitions the runtime into communities, held as index arrays.
+
+        The heap is treated as a simple undirected graph: parallel and reverse edges
+        collapse into one pair, represented by the last of these edges. Communities are
+        ordered by their first node, nodes and edges keep the runtime order. The center is
+        the node with the highest degree within its community (the first one on ties).
+        Phantom nodes (referenced by edges only) take part in the detection but are not
+        part of any subgraph.
+        """
+        graph = runtime.to_columnar()
+        pair_u, pair_v, pair_edge = self._undirected_pairs(graph)
+
+        # Duplicate node ids are represented by their first occurrence only
+        represented = np.zeros(graph.id_count, dtype=bool)
+        represented[np.fromiter(graph.node_index.values(), dtype=np.int64, count=len(graph.node_index))] = True
+        members = np.flatnonzero(represented[:graph.node_count])
+
+        labels = louvain_labels(WeightedGraph(graph.id_count, pair_u, pair_v, np.ones(len(pair_u))),
+                                resolution=self.resolution, seed=self.seed)
+
+        # Community edges and the degrees within each community, from one pass over the pairs
+        inner = labels[pair_u] == labels[pair_v]
+        inner_edges = pair_edge[inner]
+        inner_degrees = (np.bincount(pair_u[inner], minlength=graph.id_count) +
+                         np.bincount(pair_v[inner], minlength=graph.id_count))
+        edge_order = np.argsort(inner_edges, kind="stable")
+        inner_edges = inner_edges[edge_order]
+        edge_labels = labels[pair_u[inner]][edge_order]
+
+        # Only communities with nodes become subgraphs, numbered in order of their first node
+        member_labels = labels[members]
+        communities, subgraph_of = np.unique(member_labels, return_inverse=True)
+        count = len(communities)
+        subgraph_of_label = np.full(int(labels.max()) + 1 if len(labels) else 0, -1, dtype=np.int64)
+        subgraph_of_label[communities] = np.arange(count)
+
+        node_offsets, node_order = build_csr(subgraph_of, count)
+        node_indices = members[node_order]
+
+        edge_subgraphs = subgraph_of_label[edge_labels]
+        edge_indices = inner_edges[edge_subgraphs >= 0]
+        edge_offsets, edge_order = build_csr(edge_subgraphs[edge_subgraphs >= 0], count)
+        edge_indices = edge_indices[edge_order]
+
+        # select center node: highest degree within the community, first node on ties
+        by_degree = np.lexsort((node_indices, -inner_degrees[node_indices], subgraph_of[node_order]))
+        center_index = node_indices[by_degree[node_offsets[:-1]]] if count else np.empty(0, dtype=np.int64)
+
+        return SubgraphPartition(
+            runtime,
+            center_index=center_index.astype(np.int32),
+            node_offsets=node_offsets,
+            node_indices=node_indices.astype(np.int32),
+            edge_offsets=edge_offsets,
+            edge_indices=edge_indices.astype(np.int32),
+        )
+
+    @staticmethod
+    def _undirected_pairs(graph: ColumnarRuntime) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distinct undirected node pairs (self-loops included) and the last edge of each pair."""
+        low = np.minimum(graph.edge_from, graph.edge_to).astype(np.int64)
+        high = np.maximum(graph.edge_from, graph.edge_to).astype(np.int64)
+        keys = low * max(graph.id_count, 1) + high
+        # The first occurrence in reverse order is the last edge of a pair
+        _, reverse_first = np.unique(keys[::-1], return_index=True)
+        pair_edge = np.sort(graph.edge_count - 1 - reverse_first)
+        return low[pair_edge], high[pair_edge], pair_edge
+
+    def _generate_networkx(self, runtime: Runtime) -> List[Subgraph]:
+        import networkx as nx
 
-    def generate(self, runtime: Runtime) -> List[Subgraph]:
         if not runtime.nodes:
             return []
 
@@ -64,7 +153,7 @@ class CommunityDetectionSubgraphAlgorithm(SubgraphAlgorithm):
                     cluster_edges.append(edge_lookup[lookup_key])
 
             # select center node
-            # For communities, the most "central" node is usually the one with 
+            # For communities, the most "central" node is usually the one with
             # the highest degree (most connections) within the cluster.
             # This acts as the "Representative" for the group.
             if member_ids:
@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List
-from .....domain.models import Runtime, Subgraph
+from typing import List, Union
+from .....domain.models import Runtime, Subgraph, SubgraphPartition
+
+# Subgraphs of a runtime, as models or as a partition of its columnar representation.
+# Both are sequences of subgraphs, see SubgraphPartition.
+Subgraphs = Union[List[Subgraph], SubgraphPartition]
 
 class SubgraphAlgorithm(ABC):
     """
@@ -8,7 +12,7 @@ class SubgraphAlgorithm(ABC):
     """
     
     @abstractmethod
-    def generate(self, runtime: Runtime) -> List[Subgraph]:
+    def generate(self, runtime: Runtime) -> Subgraphs:
         """
         Generates a collection of subgraphs from the given runtime.
         
@@ -16,6 +20,6 @@ class SubgraphAlgorithm(ABC):
             runtime: The runtime to decompose into subgraphs.
             
         Returns:
-            A list of Subgraph objects.
+            A list of Subgraph objects or a SubgraphPartition.
         """
         pass
@@ -0,0 +1,95 @@
+import numpy as np
+
+from ....domain.models import Runtime, SubgraphPartition
+from ....domain.models.columnar_runtime import build_csr
+from .contracts.subgraph_algorithm import SubgraphAlgorithm, Subgraphs
+
+class DominatorTreeSubgraphAlgorithm(SubgraphAlgorithm):
+    """
+    Algorithm that partitions the heap along ownership: every subgraph is a piece
+    of the dominator tree, i.e. a node together with nodes it retains.
+
+    The dominator tree (see DominatorTree) is cut bottom-up: as long as a node and
+    its uncut dominated nodes hold at most `max_nodes` nodes they stay together,
+    otherwise all its children start subgraphs of their own. Nodes only dominated
+    by the virtual root always start a subgraph. The center is the top node of a
+    piece, which dominates all other nodes of its subgraph.
+    """
+
+    def __init__(self, max_nodes: int = 32):
+        """
+        Args:
+            max_nodes: Maximum number of nodes per subgraph.
+        """
+        if max_nodes < 1:
+            raise ValueError("max_nodes has to be at least 1")
+        self.max_nodes = max_nodes
+
+    def generate(self, runtime: Runtime) -> Subgraphs:
+        return self.partition(runtime)
+
+    def partition(self, runtime: Runtime) -> SubgraphPartition:
+        """
+        Partitions the runtime into dominator subtrees, held as index arrays.
+
+        Subgraphs are ordered by their center, nodes and edges keep the runtime order.
+        An edge is part of a subgraph if both its nodes are. Phantom nodes (referenced
+        by edges only) are not part of any subgraph and do not keep dominated nodes.
+        """
+        graph = runtime.to_columnar()
+        tree = runtime.to_dominator_tree()
+        node_count = graph.node_count
+        idom = tree.idom.tolist()
+        children_offsets, children = tree.children_csr()
+        children_offsets = children_offsets.tolist()
+        children = children.tolist()
+
+        # Cut bottom-up: a node keeps its children unless they would exceed max_nodes
+        top = bytearray(graph.id_count)
+        for k in range(children_offsets[-2], children_offsets[-1]):
+            top[children[k]] = 1
+        pending = [0] * graph.id_count
+        for node in tree.postorder.tolist():
+            start, end = children_offsets[node], children_offsets[node + 1]
+            if node >= node_count:
+                for k in range(start, end):
+                    top[children[k]] = 1
+                continue
+            size = 1
+            for k in range(start, end):
+                size += pending[children[k]]
+            if size > self.max_nodes:
+                for k in range(start, end):
+                    top[children[k]] = 1
+                size = 1
+            pending[node] = size
+
+        # Every node belongs to the piece of its nearest top node, dominators first
+        piece = list(range(graph.id_count))
+        for node in reversed(tree.postorder.tolist()):
+            if not top[node]:
+                piece[node] = piece[idom[node]]
+        piece = np.asarray(piece, dtype=np.int64)
+
+        # Pieces of real nodes become subgraphs, numbered by center
+        centers = np.flatnonzero(np.frombuffer(bytes(top), dtype=np.uint8)[:node_count])
+        subgraph_of_piece = np.full(graph.id_count, -1, dtype=np.int64)
+        subgraph_of_piece[centers] = np.arange(len(centers))
+
+        node_subgraphs = subgraph_of_piece[piece[:node_count]]
+        node_offsets, node_indices = build_csr(node_subgraphs, len(centers))
+
+        inner = piece[graph.edge_from] == piece[graph.edge_to]
+        edge_subgraphs = subgraph_of_piece[piece[graph.edge_from]]
+        inner &= edge_subgraphs >= 0
+        edge_positions = np.flatnonzero(inner)
+        edge_offsets, edge_order = build_csr(edge_subgraphs[edge_positions], len(centers))
+
+        return SubgraphPartition(
+            runtime,
+            center_index=centers.astype(np.int32),
+            node_offsets=node_offsets,
+            node_indices=node_indices,
+            edge_offsets=edge_offsets,
+            edge_indices=edge_positions[edge_order].astype(np.int32),
+        )
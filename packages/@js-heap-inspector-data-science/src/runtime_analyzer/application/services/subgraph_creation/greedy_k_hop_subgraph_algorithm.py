@@ -1,7 +1,10 @@
-from collections import deque, defaultdict
-from typing import List, Dict, Set
-from ....domain.models import Runtime, Subgraph, Edge
-from .contracts.subgraph_algorithm import SubgraphAlgorithm
+from typing import List, Tuple
+
+import numpy as np
+
+from ....domain.models import Runtime, ColumnarRuntime, SubgraphPartition
+from ....domain.models.columnar_runtime import build_csr
+from .contracts.subgraph_algorithm import SubgraphAlgorithm, Subgraphs
 
 class GreedyKHopSubgraphAlgorithm(SubgraphAlgorithm):
     """
@@ -16,72 +19,96 @@ class GreedyKHopSubgraphAlgorithm(SubgraphAlgorithm):
     def __init__(self, k: int = 3):
         self.k = k
 
-    def generate(self, runtime: Runtime) -> List[Subgraph]:
-        node_map = {node.id: node for node in runtime.nodes}
+    def generate(self, runtime: Runtime) -> Subgraphs:
+        # Subgraph models are only created when accessed
+        return self.partition(runtime)
 
-        # 1. Pre-map edges (Undirected graph context)
-        adj: Dict[str, List[Edge]] = defaultdict(list)
-        for edge in runtime.edges:
-            adj[edge.fromNodeId].append(edge)
-            adj[edge.toNodeId].append(edge)
+    def partition(self, runtime: Runtime) -> SubgraphPartition:
+        """Partitions the runtime into K-Hop clusters, held as index arrays."""
+        graph = runtime.to_columnar()
 
-        subgraphs = []
-        global_visited: Set[str] = set()
+        # 1. Pre-map edges (Undirected graph context)
+        # Incident edges of a node are its outgoing followed by its incoming edges (each in edge order).
+        incident_offsets, incident_edges, incident_neighbors = self._incident_csr(graph)
+        incident_offsets = incident_offsets.tolist()
+        incident_edges = incident_edges.tolist()
+        incident_neighbors = incident_neighbors.tolist()
+
+        global_visited = bytearray(graph.id_count)
+        # Cluster that collected an edge last, replaces a set of seen edges per cluster
+        edge_stamp = [-1] * graph.edge_count
+
+        center_index: List[int] = []
+        node_offsets: List[int] = [0]
+        node_indices: List[int] = []
+        edge_offsets: List[int] = [0]
+        edge_indices: List[int] = []
 
         # 2. Deterministic Order
         # It is crucial to process nodes in a deterministic order so the 
         # partitions are reproducible (RS3 - Result Quality & Practicality).
         # We prioritize 'Roots' or high-degree nodes if possible, or just ID.
-        sorted_nodes = sorted(runtime.nodes, key=lambda n: n.id)
+        node_ids = graph.node_ids
+        node_count = graph.node_count
+        sorted_indices = sorted(range(node_count), key=node_ids.__getitem__)
 
-        for start_node in sorted_nodes:
+        for start_index in sorted_indices:
             # OPTIMIZATION: If node is already part of a cluster, skip it.
-            if start_node.id in global_visited:
+            if global_visited[start_index]:
                 continue
 
-            # --- BFS for Cluster Creation ---
-            # This specific subgraph's local visited set
-            cluster_node_ids: Set[str] = {start_node.id}
-            cluster_edges: List[Edge] = []
-            seen_edge_ids: Set[int] = set()
-
-            queue = deque([(start_node.id, 0)])
+            # --- Level-wise BFS for Cluster Creation ---
+            cluster = len(center_index)
+            center_index.append(start_index)
+            node_indices.append(start_index)
 
             # Mark start node as globally visited immediately
-            global_visited.add(start_node.id)
-
-            while queue:
-                curr_id, dist = queue.popleft()
-
-                if dist >= self.k:
-                    continue
-
-                for edge in adj[curr_id]:
-                    neighbor_id = edge.fromNodeId if edge.toNodeId == curr_id else edge.toNodeId
-
-                    # Add edge to this subgraph (edges can technically be shared 
-                    # between clusters if they connect boundary nodes, but here we 
-                    # capture them for the current cluster context).
-                    if id(edge) not in seen_edge_ids:
-                        seen_edge_ids.add(id(edge))
-                        cluster_edges.append(edge)
-
-                    # If neighbor is NOT globally visited, we claim it for this cluster
-                    if neighbor_id not in global_visited:
-                        global_visited.add(neighbor_id)
-                        cluster_node_ids.add(neighbor_id)
-                        queue.append((neighbor_id, dist + 1))
-
-            # --- Assembly ---
-            subgraph_nodes = [
-                node_map[nid] for nid in cluster_node_ids
-                if nid in node_map
-            ]
-
-            subgraphs.append(Subgraph(
-                center_node_id=start_node.id,
-                nodes=subgraph_nodes,
-                edges=cluster_edges
-            ))
-
-        return subgraphs
\ No newline at end of file
+            global_visited[start_index] = 1
+
+            frontier = [start_index]
+            for _ in range(self.k):
+                next_frontier = []
+                for curr in frontier:
+                    for position in range(incident_offsets[curr], incident_offsets[curr + 1]):
+                        # Add edge to this subgraph (edges can technically be shared 
+                        # between clusters if they connect boundary nodes, but here we 
+                        # capture them for the current cluster context).
+                        edge_index = incident_edges[position]
+                        if edge_stamp[edge_index] != cluster:
+                            edge_stamp[edge_index] = cluster
+                            edge_indices.append(edge_index)
+
+                        # If neighbor is NOT globally visited, we claim it for this cluster
+                        neighbor = incident_neighbors[position]
+                        if not global_visited[neighbor]:
+                            global_visited[neighbor] = 1
+                            next_frontier.append(neighbor)
+                            # Phantom nodes (referenced by edges only) are traversed but not part of the subgraph
+                            if neighbor < node_count:
+                                node_indices.append(neighbor)
+                if not next_frontier:
+                    break
+                frontier = next_frontier
+
+            node_offsets.append(len(node_indices))
+            edge_offsets.append(len(edge_indices))
+
+        return SubgraphPartition(
+            runtime,
+            center_index=np.asarray(center_index, dtype=np.int32),
+            node_offsets=np.asarray(node_offsets, dtype=np.int64),
+            node_indices=np.asarray(node_indices, dtype=np.int32),
+            edge_offsets=np.asarray(edge_offsets, dtype=np.int64),
+            edge_indices=np.asarray(edge_indices, dtype=np.int32),
+        )
+
+    @staticmethod
+    def _incident_csr(graph: ColumnarRuntime) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Incident edges and the neighbor across each of them, grouped by node (CSR)."""
+        edge_positions = np.arange(graph.edge_count, dtype=np.int32)
+        # Outgoing entries come first, a stable sort keeps them before the incoming ones
+        owners = np.concatenate([graph.edge_from, graph.edge_to])
+        offsets, order = build_csr(owners, graph.id_count)
+        edges = np.concatenate([edge_positions, edge_positions])[order]
+        neighbors = np.concatenate([graph.edge_to, graph.edge_from])[order]
+        return offsets, edges, neighbors
@@ -0,0 +1,163 @@
+import random
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ....domain.models.columnar_runtime import build_csr
+
+
+class WeightedGraph:
+    """
+    Undirected weighted graph in CSR layout, one level of the Louvain method.
+
+    Every undirected pair is held once in `pair_u`/`pair_v`/`pair_weight` (self-loops
+    included) and in both directions in the CSR adjacency (self-loops excluded).
+    """
+
+    def __init__(self, node_count: int, pair_u: np.ndarray, pair_v: np.ndarray, pair_weight: np.ndarray):
+        self.node_count = node_count
+        self.pair_u = pair_u
+        self.pair_v = pair_v
+        self.pair_weight = pair_weight
+
+        # A self-loop adds its weight twice to the degree of its node
+        self.degrees = (np.bincount(pair_u, weights=pair_weight, minlength=node_count) +
+                        np.bincount(pair_v, weights=pair_weight, minlength=node_count))
+
+        proper = pair_u != pair_v
+        sources = np.concatenate([pair_u[proper], pair_v[proper]])
+        targets = np.concatenate([pair_v[proper], pair_u[proper]])
+        weights = np.concatenate([pair_weight[proper], pair_weight[proper]])
+        offsets, order = build_csr(sources, node_count)
+        self.offsets = offsets
+        self.neighbors = targets[order]
+        self.weights = weights[order]
+
+    @property
+    def size(self) -> float:
+        """Total edge weight."""
+        return float(self.pair_weight.sum())
+
+    def modularity(self, labels: np.ndarray, m: float, resolution: float) -> float:
+        """Modularity of the partition given by one community label per node."""
+        communities = int(labels.max()) + 1 if len(labels) else 0
+        inner = labels[self.pair_u] == labels[self.pair_v]
+        inner_weight = np.bincount(labels[self.pair_u[inner]], weights=self.pair_weight[inner], minlength=communities)
+        degree_sum = np.bincount(labels, weights=self.degrees, minlength=communities)
+        return float(np.sum(inner_weight / m - resolution * (degree_sum / (2 * m)) ** 2))
+
+    def aggregate(self, labels: np.ndarray) -> "WeightedGraph":
+        """Graph of the communities, inner edges become self-loops."""
+        communities = int(labels.max()) + 1
+        u, v = labels[self.pair_u], labels[self.pair_v]
+        keys = np.minimum(u, v).astype(np.int64) * communities + np.maximum(u, v)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=self.pair_weight, minlength=len(unique_keys))
+        return WeightedGraph(communities, unique_keys // communities, unique_keys % communities, weights)
+
+
+def louvain_labels(graph: WeightedGraph, resolution: float = 1.0, seed: Optional[int] = None,
+                   threshold: float = 1e-7) -> np.ndarray:
+    """
+    Louvain community detection (Blondel et al. 2008), following `networkx.community.louvain_communities`.
+
+    Every level moves nodes (in a seeded random order) to the neighboring community with
+    the highest modularity gain until no node improves anymore, then aggregates the
+    communities into nodes of the next level. Stops once a level gains at most `threshold`
+    modularity.
+
+    Args:
+        graph: Graph whose nodes are partitioned.
+        resolution: Higher values (>1) lead to smaller communities, lower values (<1) to larger ones.
+        seed: Seed of the node order.
+        threshold: Minimum modularity gain of a level.
+
+    Returns:
+        Community label per node. Labels are dense and numbered in order of their lowest node.
+    """
+    labels = np.arange(graph.node_count, dtype=np.int64)
+    m = graph.size
+    if m == 0:
+        return labels
+
+    rng = random.Random(seed)
+    modularity = graph.modularity(labels, m, resolution)
+    level_labels, _ = _move_nodes(graph, m, resolution, rng)
+    while True:
+        labels = level_labels[labels]
+        new_modularity = graph.modularity(level_labels, m, resolution)
+        if new_modularity - modularity <= threshold:
+            break
+        modularity = new_modularity
+        graph = graph.aggregate(level_labels)
+        level_labels, improvement = _move_nodes(graph, m, resolution, rng)
+        if not improvement:
+            break
+    return _relabel(labels)
+
+
+def _move_nodes(graph: WeightedGraph, m: float, resolution: float, rng: random.Random) -> Tuple[np.ndarray, bool]:
+    """Local moving phase of one level. Returns dense community labels and whether any node moved."""
+    gamma = resolution / 2
+    offsets = graph.offsets.tolist()
+    neighbors = graph.neighbors.tolist()
+    weights = graph.weights.tolist()
+    degrees = graph.degrees.tolist()
+
+    community = list(range(graph.node_count))
+    total_degree = list(degrees)
+    # Weight from the current node to each community, reset via the touched list
+    community_weight = [0.0] * graph.node_count
+    touched: List[int] = []
+
+    # Nodes are visited in a seeded random order. After a move, only the neighbors outside
+    # the new community are visited again (fast local moving), instead of repeated full passes.
+    queue = deque(range(graph.node_count))
+    rng.shuffle(queue)
+    queued = bytearray(b"\x01") * graph.node_count
+
+    improvement = False
+    while queue:
+        u = queue.popleft()
+        queued[u] = 0
+        start, end = offsets[u], offsets[u + 1]
+        for k in range(start, end):
+            c = community[neighbors[k]]
+            if community_weight[c] == 0.0:
+                touched.append(c)
+            community_weight[c] += weights[k]
+
+        # Gains are scaled by m**2 (see networkx), removing u from its community is the baseline
+        u_community = community[u]
+        degree = degrees[u]
+        total_degree[u_community] -= degree
+        best_gain = community_weight[u_community] * m - gamma * total_degree[u_community] * degree
+        best_community = u_community
+        for c in touched:
+            gain = community_weight[c] * m - gamma * total_degree[c] * degree
+            if gain > best_gain:
+                best_gain = gain
+                best_community = c
+            community_weight[c] = 0.0
+        touched.clear()
+        total_degree[best_community] += degree
+
+        if best_community != u_community:
+            community[u] = best_community
+            improvement = True
+            for k in range(start, end):
+                v = neighbors[k]
+                if not queued[v] and community[v] != best_community:
+                    queued[v] = 1
+                    queue.append(v)
+
+    return _relabel(np.asarray(community, dtype=np.int64)), improvement
+
+
+def _relabel(labels: np.ndarray) -> np.ndarray:
+    """Renumbers labels densely in order of their first node."""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(len(first))
+    return rank[inverse]
@@ -4,12 +4,20 @@ from .node import Node
 from .edge import Edge
 from .stack import Stack
 from .runtime import Runtime
+from .columnar_runtime import ColumnarRuntime
+from .dominator_tree import DominatorTree
 from .subgraph import Subgraph
+from .subgraph_view import SubgraphView
+from .subgraph_partition import SubgraphPartition
 from .differentiation import DeltaSubgraphResult, MatchSubgraphResult, ModificationSubgraphResult, MatchingResult
+from .indexed_matching_result import IndexedMatchingResult, SubgraphResultArrays
 from .code_evolution import CodeEvolution, CodeChangeSpan
 from .code_link import CausalPair, CodeLinkContainer
 from .matching_reporter import MatchingReporterAccessCountResult
+from .batch_comparison import BatchComparison
 
 __all__ = ["Amount", "CodeEvolution", "Energy", "SoftwareEnergyRecording", "Node", "Edge", "Stack", "Runtime",
-           "Subgraph", "EnergyMetric", "MatchingReporterAccessCountResult", "MatchingResult", "DeltaSubgraphResult",
-           "MatchSubgraphResult", "ModificationSubgraphResult", "CodeChangeSpan", "CausalPair", "CodeLinkContainer"]
+           "ColumnarRuntime", "DominatorTree", "Subgraph", "SubgraphView", "SubgraphPartition", "EnergyMetric", "MatchingReporterAccessCountResult",
+           "MatchingResult", "IndexedMatchingResult", "SubgraphResultArrays",
+           "DeltaSubgraphResult", "MatchSubgraphResult", "ModificationSubgraphResult", "CodeChangeSpan", "CausalPair",
+           "CodeLinkContainer", "BatchComparison"]
@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from .code_evolution import CodeEvolution
+
+
+class BatchComparison(BaseModel):
+    """One comparison of a batch, referencing both runtimes by the path of their file."""
+    name: str
+    baseline: str
+    modified: str
+    code_evolution_baseline: List[CodeEvolution] = []
+    code_evolution_modified: List[CodeEvolution] = []
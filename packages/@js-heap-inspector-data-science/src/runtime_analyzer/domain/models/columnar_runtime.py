@@ -0,0 +1,373 @@
+import math
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from .energy import EnergyMetric
+from .node import Node
+from .edge import Edge
+from .stack import Stack
+
+if TYPE_CHECKING:
+    from .runtime import Runtime
+
+# Marks an absent optional string (e.g. a node without value or trace)
+NO_STRING = -1
+
+_LIST_ADAPTERS: Dict[type, TypeAdapter] = {}
+
+
+class ColumnarRuntime:
+    """
+    Array-backed, integer-indexed representation of a Runtime.
+
+    Node ids are mapped to dense integers once. All string attributes are stored as
+    int32 references into one shared string table, all other attributes as NumPy
+    columns. Adjacency is held as forward (fromNode -> edges) and reverse
+    (toNode -> edges) CSR structures that preserve the order of the edge list.
+
+    Edges may reference node ids that do not exist in the node list. These phantom
+    nodes are appended after the `node_count` real nodes, so they take part in
+    traversals but carry no attributes.
+    """
+
+    # Names of the NumPy columns, e.g. used for persisting the runtime
+    COLUMNS = (
+        "node_id", "node_type", "node_value", "node_trace", "node_root",
+        "node_edge_offsets", "node_edge_ids",
+        "energy_mask", "energy_node_id", "energy_allocation_time",
+        "energy_read_counter", "energy_write_counter", "energy_size",
+        "edge_id", "edge_from", "edge_to", "edge_name",
+        "out_offsets", "out_edges", "in_offsets", "in_edges",
+        "stack_id", "stack_function_name", "stack_script_name", "stack_line_number", "stack_column_number",
+        "stack_frame_offsets", "stack_frame_ids",
+    )
+
+    def __init__(self, strings: List[str], node_count: int, **columns: np.ndarray):
+        """
+        Args:
+            strings: Shared string table referenced by all string columns.
+            node_count: Number of real nodes; ids beyond are phantom nodes referenced by edges.
+            **columns: One array for every name in `COLUMNS`.
+        """
+        missing = [name for name in self.COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Missing runtime columns: {', '.join(missing)}")
+
+        self.strings = strings
+        self.node_count = node_count
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+        self._node_ids: Optional[List[str]] = None
+        self._node_index: Optional[Dict[str, int]] = None
+
+    @property
+    def id_count(self) -> int:
+        """Number of node indices including phantom nodes."""
+        return len(self.node_id)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_from)
+
+    @property
+    def stack_count(self) -> int:
+        return len(self.stack_id)
+
+    @property
+    def node_ids(self) -> List[str]:
+        """Node id per node index, including phantom nodes."""
+        if self._node_ids is None:
+            strings = self.strings
+            self._node_ids = [strings[ref] for ref in self.node_id.tolist()]
+        return self._node_ids
+
+    @property
+    def node_index(self) -> Dict[str, int]:
+        """Maps node ids to node indices. Duplicate ids resolve to their first occurrence."""
+        if self._node_index is None:
+            index: Dict[str, int] = {}
+            for i, node_id in enumerate(self.node_ids):
+                index.setdefault(node_id, i)
+            self._node_index = index
+        return self._node_index
+
+    def string(self, ref: int) -> Optional[str]:
+        return None if ref == NO_STRING else self.strings[ref]
+
+    def out_edge_slice(self, index: int) -> np.ndarray:
+        """Edge indices leaving the node, in edge list order."""
+        return self.out_edges[self.out_offsets[index]:self.out_offsets[index + 1]]
+
+    def in_edge_slice(self, index: int) -> np.ndarray:
+        """Edge indices pointing to the node, in edge list order."""
+        return self.in_edges[self.in_offsets[index]:self.in_offsets[index + 1]]
+
+    def successors(self, index: int) -> np.ndarray:
+        return self.edge_to[self.out_edge_slice(index)]
+
+    def retainers(self, index: int) -> np.ndarray:
+        return self.edge_from[self.in_edge_slice(index)]
+
+    def node(self, index: int) -> Node:
+        """Materializes the domain model of a real node."""
+        if index >= self.node_count:
+            raise ValueError(f"Node with index {index} is not part of the runtime")
+
+        energy = None
+        if self.energy_mask[index]:
+            allocation_time = float(self.energy_allocation_time[index])
+            energy = EnergyMetric.model_construct(
+                nodeId=self.strings[self.energy_node_id[index]],
+                allocationTime=None if math.isnan(allocation_time) else allocation_time,
+                readCounter=int(self.energy_read_counter[index]),
+                writeCounter=int(self.energy_write_counter[index]),
+                size=int(self.energy_size[index]),
+            )
+
+        start, end = self.node_edge_offsets[index], self.node_edge_offsets[index + 1]
+        return Node.model_construct(
+            id=self.strings[self.node_id[index]],
+            edgeIds=[self.strings[ref] for ref in self.node_edge_ids[start:end].tolist()],
+            type=self.strings[self.node_type[index]],
+            energy=energy,
+            root=bool(self.node_root[index]),
+            value=self.string(int(self.node_value[index])),
+            traceId=self.string(int(self.node_trace[index])),
+        )
+
+    def edge(self, index: int) -> Edge:
+        """Materializes the domain model of an edge."""
+        return Edge.model_construct(
+            id=self.strings[self.edge_id[index]],
+            fromNodeId=self.node_ids[self.edge_from[index]],
+            toNodeId=self.node_ids[self.edge_to[index]],
+            name=self.strings[self.edge_name[index]],
+        )
+
+    def stack(self, index: int) -> Stack:
+        """Materializes the domain model of a stack frame."""
+        start, end = self.stack_frame_offsets[index], self.stack_frame_offsets[index + 1]
+        return Stack.model_construct(
+            id=self.strings[self.stack_id[index]],
+            frameIds=[self.strings[ref] for ref in self.stack_frame_ids[start:end].tolist()],
+            functionName=self.strings[self.stack_function_name[index]],
+            scriptName=self.strings[self.stack_script_name[index]],
+            lineNumber=int(self.stack_line_number[index]),
+            columnNumber=int(self.stack_column_number[index]),
+        )
+
+    def to_runtime(self) -> "Runtime":
+        """Returns a Runtime backed by these columns, which builds its domain models on first access."""
+        from .runtime import Runtime
+        return Runtime.from_columnar(self)
+
+    def materialize_nodes(self) -> List[Node]:
+        """Materializes the domain models of all real nodes, column by column."""
+        strings = self.strings
+        count = self.node_count
+
+        def column(refs: np.ndarray) -> List[Optional[str]]:
+            return [None if ref == NO_STRING else strings[ref] for ref in refs[:count].tolist()]
+
+        edge_ids = [strings[ref] for ref in self.node_edge_ids.tolist()]
+        offsets = self.node_edge_offsets.tolist()
+        energies = [None] * count
+        for index, node_id, allocation_time, read_counter, write_counter, size in zip(
+                np.flatnonzero(self.energy_mask[:count]).tolist(),
+                *(self._energy_column(name) for name in ("energy_node_id", "energy_allocation_time",
+                                                         "energy_read_counter", "energy_write_counter",
+                                                         "energy_size"))):
+            energies[index] = {"nodeId": strings[node_id],
+                               "allocationTime": None if math.isnan(allocation_time) else allocation_time,
+                               "readCounter": read_counter, "writeCounter": write_counter, "size": size}
+
+        nodes = [
+            {"id": node_id, "edgeIds": edge_ids[start:end], "type": node_type, "energy": energy, "root": root,
+             "value": value, "traceId": trace_id}
+            for node_id, start, end, node_type, energy, root, value, trace_id in zip(
+                column(self.node_id), offsets, offsets[1:], column(self.node_type), energies,
+                self.node_root[:count].tolist(), column(self.node_value), column(self.node_trace))
+        ]
+        return _validate_list(Node, nodes)
+
+    def materialize_edges(self) -> List[Edge]:
+        """Materializes the domain models of all edges, column by column."""
+        strings, node_ids = self.strings, self.node_ids
+        edges = [
+            {"id": strings[edge_id], "fromNodeId": node_ids[from_node], "toNodeId": node_ids[to_node],
+             "name": strings[name]}
+            for edge_id, from_node, to_node, name in zip(self.edge_id.tolist(), self.edge_from.tolist(),
+                                                         self.edge_to.tolist(), self.edge_name.tolist())
+        ]
+        return _validate_list(Edge, edges)
+
+    def materialize_stacks(self) -> List[Stack]:
+        """Materializes the domain models of all stack frames, column by column."""
+        strings = self.strings
+        frame_ids = [strings[ref] for ref in self.stack_frame_ids.tolist()]
+        offsets = self.stack_frame_offsets.tolist()
+        stacks = [
+            {"id": strings[stack_id], "frameIds": frame_ids[start:end], "functionName": strings[function_name],
+             "scriptName": strings[script_name], "lineNumber": line_number, "columnNumber": column_number}
+            for stack_id, start, end, function_name, script_name, line_number, column_number in zip(
+                self.stack_id.tolist(), offsets, offsets[1:], self.stack_function_name.tolist(),
+                self.stack_script_name.tolist(), self.stack_line_number.tolist(), self.stack_column_number.tolist())
+        ]
+        return _validate_list(Stack, stacks)
+
+    def _energy_column(self, name: str) -> list:
+        """Values of an energy column for the nodes with energy."""
+        return getattr(self, name)[:self.node_count][self.energy_mask[:self.node_count]].tolist()
+
+    @classmethod
+    def from_runtime(cls, runtime: "Runtime") -> "ColumnarRuntime":
+        """Builds the columnar representation of a pydantic Runtime."""
+        strings: List[str] = []
+        string_refs: Dict[str, int] = {}
+
+        def intern(value: Optional[str]) -> int:
+            if value is None:
+                return NO_STRING
+            ref = string_refs.get(value)
+            if ref is None:
+                ref = len(strings)
+                string_refs[value] = ref
+                strings.append(value)
+            return ref
+
+        # --- Nodes ---
+        node_count = len(runtime.nodes)
+        node_index: Dict[str, int] = {}
+        node_id = []
+        node_type = np.empty(node_count, dtype=np.int32)
+        node_value = np.empty(node_count, dtype=np.int32)
+        node_trace = np.empty(node_count, dtype=np.int32)
+        node_root = np.empty(node_count, dtype=np.bool_)
+        node_edge_offsets = np.zeros(node_count + 1, dtype=np.int64)
+        node_edge_ids = []
+
+        energy_mask = np.zeros(node_count, dtype=np.bool_)
+        energy_node_id = np.full(node_count, NO_STRING, dtype=np.int32)
+        energy_allocation_time = np.full(node_count, np.nan, dtype=np.float64)
+        energy_read_counter = np.zeros(node_count, dtype=np.int64)
+        energy_write_counter = np.zeros(node_count, dtype=np.int64)
+        energy_size = np.zeros(node_count, dtype=np.int64)
+
+        for i, node in enumerate(runtime.nodes):
+            node_index.setdefault(node.id, i)
+            node_id.append(intern(node.id))
+            node_type[i] = intern(node.type)
+            node_value[i] = intern(node.value)
+            node_trace[i] = intern(node.traceId)
+            node_root[i] = node.root
+            node_edge_ids.extend(intern(edge_id) for edge_id in node.edgeIds)
+            node_edge_offsets[i + 1] = len(node_edge_ids)
+
+            if node.energy is not None:
+                energy_mask[i] = True
+                energy_node_id[i] = intern(node.energy.nodeId)
+                if node.energy.allocationTime is not None:
+                    energy_allocation_time[i] = node.energy.allocationTime
+                energy_read_counter[i] = node.energy.readCounter
+                energy_write_counter[i] = node.energy.writeCounter
+                energy_size[i] = node.energy.size
+
+        # --- Edges (unknown endpoints become phantom nodes) ---
+        def node_ref(value: str) -> int:
+            index = node_index.get(value)
+            if index is None:
+                index = len(node_id)
+                node_index[value] = index
+                node_id.append(intern(value))
+            return index
+
+        edge_count = len(runtime.edges)
+        edge_id = np.empty(edge_count, dtype=np.int32)
+        edge_from = np.empty(edge_count, dtype=np.int32)
+        edge_to = np.empty(edge_count, dtype=np.int32)
+        edge_name = np.empty(edge_count, dtype=np.int32)
+        for i, edge in enumerate(runtime.edges):
+            edge_id[i] = intern(edge.id)
+            edge_from[i] = node_ref(edge.fromNodeId)
+            edge_to[i] = node_ref(edge.toNodeId)
+            edge_name[i] = intern(edge.name)
+
+        out_offsets, out_edges = build_csr(edge_from, len(node_id))
+        in_offsets, in_edges = build_csr(edge_to, len(node_id))
+
+        # --- Stacks ---
+        stack_count = len(runtime.stacks)
+        stack_id = np.empty(stack_count, dtype=np.int32)
+        stack_function_name = np.empty(stack_count, dtype=np.int32)
+        stack_script_name = np.empty(stack_count, dtype=np.int32)
+        stack_line_number = np.empty(stack_count, dtype=np.int64)
+        stack_column_number = np.empty(stack_count, dtype=np.int64)
+        stack_frame_offsets = np.zeros(stack_count + 1, dtype=np.int64)
+        stack_frame_ids = []
+        for i, stack in enumerate(runtime.stacks):
+            stack_id[i] = intern(stack.id)
+            stack_function_name[i] = intern(stack.functionName)
+            stack_script_name[i] = intern(stack.scriptName)
+            stack_line_number[i] = stack.lineNumber
+            stack_column_number[i] = stack.columnNumber
+            stack_frame_ids.extend(intern(frame_id) for frame_id in stack.frameIds)
+            stack_frame_offsets[i + 1] = len(stack_frame_ids)
+
+        columnar = cls(
+            strings,
+            node_count,
+            node_id=np.asarray(node_id, dtype=np.int32),
+            node_type=node_type,
+            node_value=node_value,
+            node_trace=node_trace,
+            node_root=node_root,
+            node_edge_offsets=node_edge_offsets,
+            node_edge_ids=np.asarray(node_edge_ids, dtype=np.int32),
+            energy_mask=energy_mask,
+            energy_node_id=energy_node_id,
+            energy_allocation_time=energy_allocation_time,
+            energy_read_counter=energy_read_counter,
+            energy_write_counter=energy_write_counter,
+            energy_size=energy_size,
+            edge_id=edge_id,
+            edge_from=edge_from,
+            edge_to=edge_to,
+            edge_name=edge_name,
+            out_offsets=out_offsets,
+            out_edges=out_edges,
+            in_offsets=in_offsets,
+            in_edges=in_edges,
+            stack_id=stack_id,
+            stack_function_name=stack_function_name,
+            stack_script_name=stack_script_name,
+            stack_line_number=stack_line_number,
+            stack_column_number=stack_column_number,
+            stack_frame_offsets=stack_frame_offsets,
+            stack_frame_ids=np.asarray(stack_frame_ids, dtype=np.int32),
+        )
+        columnar._node_index = node_index
+        return columnar
+
+
+def _validate_list(model: type, items: List[dict]) -> list:
+    """Validates many domain models in one call, which is faster than constructing them one by one."""
+    adapter = _LIST_ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _LIST_ADAPTERS[model] = TypeAdapter(List[model])
+    return adapter.validate_python(items)
+
+
+def build_csr(keys: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Groups element positions by key.
+
+    Returns offsets of length `size + 1` and the positions ordered by key. Positions
+    sharing a key keep their original order.
+    """
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, order
@@ -1,5 +1,9 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .columnar_runtime import ColumnarRuntime
+    from .indexed_matching_result import IndexedMatchingResult
 
 class MatchSubgraphResult(BaseModel):
     """Represents a node that exists in both runtimes and has the same state or context."""
@@ -22,4 +26,17 @@ class MatchingResult(BaseModel):
     matched: List[MatchSubgraphResult]
     modified: List[ModificationSubgraphResult]
     added_node_ids: List[DeltaSubgraphResult]
-    removed_node_ids: List[DeltaSubgraphResult]
\ No newline at end of file
+    removed_node_ids: List[DeltaSubgraphResult]
+
+    def to_indexed(self, baseline: "ColumnarRuntime", modified: "ColumnarRuntime") -> "IndexedMatchingResult":
+        """The result held as node indices into the columnar representations of both runtimes."""
+        from .indexed_matching_result import IndexedMatchingResult
+        return IndexedMatchingResult.from_matching_result(self, baseline, modified)
+
+    def iter_dump(self, category: str) -> Iterator[Dict[str, Any]]:
+        """Dumps the results of a category one at a time."""
+        return (result.model_dump() for result in getattr(self, category))
+
+    def node_count(self, category: str) -> int:
+        """Number of baseline and modified node ids of all results of a category."""
+        return sum(len(result.nodes_baseline_id) + len(result.nodes_modified_id) for result in getattr(self, category))
@@ -0,0 +1,199 @@
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Type, Union, TYPE_CHECKING
+
+import numpy as np
+
+from .differentiation import DeltaSubgraphResult, MatchSubgraphResult, ModificationSubgraphResult, MatchingResult
+
+if TYPE_CHECKING:
+    from .columnar_runtime import ColumnarRuntime
+
+SubgraphResult = Union[MatchSubgraphResult, ModificationSubgraphResult, DeltaSubgraphResult]
+
+
+def _concatenate(offsets: List[int], arrays: List[np.ndarray]) -> np.ndarray:
+    return np.concatenate(arrays).astype(np.int64, copy=False) if offsets[-1] else np.empty(0, dtype=np.int64)
+
+
+class SubgraphResultArrays(Sequence):
+    """
+    One category of subgraph results held as node index arrays (CSR layout).
+
+    Result `i` consists of the baseline node indices
+    `baseline_indices[baseline_offsets[i]:baseline_offsets[i + 1]]` and the modified node
+    indices `modified_indices[modified_offsets[i]:modified_offsets[i + 1]]`. The category
+    behaves like a list of result models, which are created from the id tables on access.
+    """
+
+    def __init__(self, result_type: Type[SubgraphResult], baseline_ids: List[str], modified_ids: List[str],
+                 baseline_offsets: np.ndarray, baseline_indices: np.ndarray,
+                 modified_offsets: np.ndarray, modified_indices: np.ndarray,
+                 similarity_score: Optional[np.ndarray] = None):
+        """
+        Args:
+            result_type: Result model created per subgraph result.
+            baseline_ids: Node id per node index of the baseline runtime.
+            modified_ids: Node id per node index of the modified runtime.
+            baseline_offsets: Start of the baseline nodes of every result, followed by the total count.
+            baseline_indices: Baseline node indices of all results.
+            modified_offsets: Start of the modified nodes of every result, followed by the total count.
+            modified_indices: Modified node indices of all results.
+            similarity_score: Similarity score per result, only for ModificationSubgraphResult.
+        """
+        self.result_type = result_type
+        self.baseline_ids = baseline_ids
+        self.modified_ids = modified_ids
+        self.baseline_offsets = baseline_offsets
+        self.baseline_indices = baseline_indices
+        self.modified_offsets = modified_offsets
+        self.modified_indices = modified_indices
+        self.similarity_score = similarity_score
+
+    @classmethod
+    def from_index_lists(cls, result_type: Type[SubgraphResult], baseline_ids: List[str], modified_ids: List[str],
+                         baseline_nodes: List[np.ndarray], modified_nodes: List[np.ndarray],
+                         similarity_score: Optional[List[float]] = None) -> "SubgraphResultArrays":
+        """Creates the arrays from the baseline and modified node indices of every result."""
+        baseline_offsets = np.zeros(len(baseline_nodes) + 1, dtype=np.int64)
+        np.cumsum([len(nodes) for nodes in baseline_nodes], out=baseline_offsets[1:])
+        modified_offsets = np.zeros(len(modified_nodes) + 1, dtype=np.int64)
+        np.cumsum([len(nodes) for nodes in modified_nodes], out=modified_offsets[1:])
+        return cls(
+            result_type, baseline_ids, modified_ids,
+            baseline_offsets, _concatenate(baseline_offsets.tolist(), baseline_nodes),
+            modified_offsets, _concatenate(modified_offsets.tolist(), modified_nodes),
+            None if similarity_score is None else np.asarray(similarity_score, dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.baseline_offsets) - 1
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[SubgraphResult, List[SubgraphResult]]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("subgraph result index out of range")
+        return self.result_type.model_construct(**self._fields(item))
+
+    def baseline_nodes_of(self, item: int) -> np.ndarray:
+        """Baseline node indices of a result."""
+        return self.baseline_indices[self.baseline_offsets[item]:self.baseline_offsets[item + 1]]
+
+    def modified_nodes_of(self, item: int) -> np.ndarray:
+        """Modified node indices of a result."""
+        return self.modified_indices[self.modified_offsets[item]:self.modified_offsets[item + 1]]
+
+    def dump(self) -> List[Dict[str, Any]]:
+        """The results as they are dumped by the result models."""
+        return list(self.iter_dump())
+
+    def iter_dump(self) -> Iterator[Dict[str, Any]]:
+        """Dumps the results one at a time."""
+        for item in range(len(self)):
+            yield self._fields(item)
+
+    def _fields(self, item: int) -> Dict[str, Any]:
+        baseline_ids, modified_ids = self.baseline_ids, self.modified_ids
+        fields: Dict[str, Any] = {
+            "nodes_baseline_id": [baseline_ids[index] for index in self.baseline_nodes_of(item).tolist()],
+            "nodes_modified_id": [modified_ids[index] for index in self.modified_nodes_of(item).tolist()],
+        }
+        if self.result_type is ModificationSubgraphResult:
+            fields["similarity_score"] = None if self.similarity_score is None else float(self.similarity_score[item])
+        return fields
+
+
+class IndexedMatchingResult:
+    """
+    The result of the differentiation process held as node indices into both runtimes.
+
+    Provides the attributes and methods of a MatchingResult. Node ids are only materialized
+    when a result is accessed or the whole result is dumped.
+    """
+
+    # Categories with the result model of their results
+    CATEGORIES = (
+        ("matched", MatchSubgraphResult),
+        ("modified", ModificationSubgraphResult),
+        ("added_node_ids", DeltaSubgraphResult),
+        ("removed_node_ids", DeltaSubgraphResult),
+    )
+
+    def __init__(self, matched: SubgraphResultArrays, modified: SubgraphResultArrays,
+                 added_node_ids: SubgraphResultArrays, removed_node_ids: SubgraphResultArrays):
+        self.matched = matched
+        self.modified = modified
+        self.added_node_ids = added_node_ids
+        self.removed_node_ids = removed_node_ids
+
+    @classmethod
+    def from_matching_result(cls, result: Union[MatchingResult, "IndexedMatchingResult"], baseline: "ColumnarRuntime",
+                             modified: "ColumnarRuntime") -> "IndexedMatchingResult":
+        """
+        Resolves the node ids of a matching result to node indices into both runtimes.
+
+        Args:
+            result: The matching result to resolve.
+            baseline: Columnar representation of the baseline runtime.
+            modified: Columnar representation of the modified runtime.
+
+        Raises:
+            ValueError: If a node id is not part of its runtime.
+        """
+        categories = {}
+        for category, result_type in cls.CATEGORIES:
+            results = list(getattr(result, category))
+            baseline_nodes = [_indices_of(baseline, item.nodes_baseline_id) for item in results]
+            modified_nodes = [_indices_of(modified, item.nodes_modified_id) for item in results]
+            similarity_score = None
+            if result_type is ModificationSubgraphResult and results \
+                    and all(item.similarity_score is not None for item in results):
+                similarity_score = [item.similarity_score for item in results]
+            categories[category] = SubgraphResultArrays.from_index_lists(
+                result_type, baseline.node_ids, modified.node_ids, baseline_nodes, modified_nodes,
+                similarity_score=similarity_score)
+        return cls(**categories)
+
+    def to_indexed(self, baseline: "ColumnarRuntime", modified: "ColumnarRuntime") -> "IndexedMatchingResult":
+        """The result itself if it indexes the given runtimes, see `MatchingResult.to_indexed`."""
+        if self.matched.baseline_ids is baseline.node_ids and self.matched.modified_ids is modified.node_ids:
+            return self
+        return self.from_matching_result(self, baseline, modified)
+
+    def iter_dump(self, category: str) -> Iterator[Dict[str, Any]]:
+        """Dumps the results of a category one at a time, without creating result models."""
+        return getattr(self, category).iter_dump()
+
+    def node_count(self, category: str) -> int:
+        """Number of baseline and modified nodes of all results of a category."""
+        results = getattr(self, category)
+        return len(results.baseline_indices) + len(results.modified_indices)
+
+    def model_dump(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Same output as `MatchingResult.model_dump()`."""
+        return {
+            "matched": self.matched.dump(),
+            "modified": self.modified.dump(),
+            "added_node_ids": self.added_node_ids.dump(),
+            "removed_node_ids": self.removed_node_ids.dump(),
+        }
+
+    def to_matching_result(self) -> MatchingResult:
+        """Creates the MatchingResult model holding the node id lists."""
+        return MatchingResult(
+            matched=list(self.matched),
+            modified=list(self.modified),
+            added_node_ids=list(self.added_node_ids),
+            removed_node_ids=list(self.removed_node_ids)
+        )
+
+
+def _indices_of(graph: "ColumnarRuntime", node_ids: List[str]) -> np.ndarray:
+    node_index = graph.node_index
+    try:
+        return np.asarray([node_index[node_id] for node_id in node_ids], dtype=np.int64)
+    except KeyError as error:
+        raise ValueError(f"Node with id {error.args[0]} not found") from None
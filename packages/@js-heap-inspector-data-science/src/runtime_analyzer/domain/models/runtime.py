@@ -1,20 +1,111 @@
-from typing import List, Dict, Optional
+import gc
+from typing import List, Dict, Optional, TYPE_CHECKING
 from pydantic import BaseModel, PrivateAttr
 from .node import Node
 from .edge import Edge
 from .stack import Stack
 
+if TYPE_CHECKING:
+    from .columnar_runtime import ColumnarRuntime
+    from .dominator_tree import DominatorTree
+
+# Fields a runtime backed by columns builds on first access
+_MATERIALIZED_FIELDS = ("nodes", "edges", "stacks")
+
 class Runtime(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
     stacks: List[Stack]
     _nodes_by_id: Dict[str, Node] = PrivateAttr(default_factory=dict)
+    _columnar: Optional["ColumnarRuntime"] = PrivateAttr(default=None)
+    _dominator_tree: Optional["DominatorTree"] = PrivateAttr(default=None)
 
     def model_post_init(self, __context):
-        self._nodes_by_id = {node.id: node for node in self.nodes}
+        # Runtimes backed by columns index their nodes once they are materialized
+        if "nodes" in self.__dict__:
+            self._nodes_by_id = {node.id: node for node in self.nodes}
+
+    @classmethod
+    def from_columnar(cls, columnar: "ColumnarRuntime") -> "Runtime":
+        """
+        Returns a runtime backed by a columnar representation, e.g. one loaded from the runtime
+        cache. Its nodes, edges and stacks are built from the columns on first access, so stages
+        working on the columns never pay for the domain models.
+        """
+        runtime = cls.model_construct()
+        runtime._columnar = columnar
+        return runtime
+
+    def __getattr__(self, name: str):
+        if name in _MATERIALIZED_FIELDS and self._columnar is not None:
+            return self._materialize(name)
+        return super().__getattr__(name)
 
     def get_node_by_id(self, node_id: str) -> Node:
+        if "nodes" not in self.__dict__:
+            self._materialize("nodes")
         node = self._nodes_by_id.get(node_id)
         if node:
             return node
         raise ValueError(f"Node with id {node_id} not found")
+
+    def materialize(self) -> "Runtime":
+        """Builds the nodes, edges and stacks of a runtime backed by columns. Returns the runtime itself."""
+        for name in _MATERIALIZED_FIELDS:
+            getattr(self, name)
+        return self
+
+    def model_dump(self, **kwargs):
+        return super(Runtime, self.materialize()).model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        return super(Runtime, self.materialize()).model_dump_json(**kwargs)
+
+    def __getstate__(self):
+        return super(Runtime, self.materialize()).__getstate__()
+
+    def __eq__(self, other) -> bool:
+        # Compares the content only: the cached columns and dominator tree do not take part
+        if not isinstance(other, Runtime):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _MATERIALIZED_FIELDS)
+
+    def __iter__(self):
+        return super(Runtime, self.materialize()).__iter__()
+
+    def to_columnar(self) -> "ColumnarRuntime":
+        """Returns the array-backed representation of this runtime, built once on first access."""
+        if self._columnar is None:
+            from .columnar_runtime import ColumnarRuntime
+            self._columnar = ColumnarRuntime.from_runtime(self)
+        return self._columnar
+
+    def attach_columnar(self, columnar: "ColumnarRuntime"):
+        """
+        Uses a columnar representation built elsewhere from the same data, e.g. by another
+        process. An already built representation is kept.
+        """
+        if self._columnar is None:
+            self._columnar = columnar
+
+    def to_dominator_tree(self) -> "DominatorTree":
+        """Returns the dominator tree with the retained size of every node, built once on first access."""
+        if self._dominator_tree is None:
+            from .dominator_tree import DominatorTree
+            self._dominator_tree = DominatorTree.from_columnar(self.to_columnar())
+        return self._dominator_tree
+
+    def _materialize(self, name: str) -> list:
+        if name not in self.__dict__:
+            # The models hold no cycles, collections while building them would only rescan the heap
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                self.__dict__[name] = getattr(self._columnar, f"materialize_{name}")()
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            self.__pydantic_fields_set__.add(name)
+            if name == "nodes":
+                self._nodes_by_id = {node.id: node for node in self.nodes}
+        return self.__dict__[name]
@@ -0,0 +1,108 @@
+from collections.abc import Sequence
+from typing import Dict, List, TYPE_CHECKING, Union
+
+import numpy as np
+
+from .subgraph import Subgraph
+from .subgraph_view import SubgraphView
+
+if TYPE_CHECKING:
+    from .runtime import Runtime
+
+
+class SubgraphPartition(Sequence):
+    """
+    Subgraphs of a runtime held as index arrays.
+
+    Subgraph `i` is centered on node index `center_index[i]` and consists of the node
+    indices `node_indices[node_offsets[i]:node_offsets[i + 1]]` and the edge indices
+    `edge_indices[edge_offsets[i]:edge_offsets[i + 1]]`. The partition behaves like a
+    list of subgraphs whose items are SubgraphViews into these arrays.
+    """
+
+    def __init__(self, runtime: "Runtime", center_index: np.ndarray, node_offsets: np.ndarray,
+                 node_indices: np.ndarray, edge_offsets: np.ndarray, edge_indices: np.ndarray):
+        """
+        Args:
+            runtime: Runtime the indices refer to.
+            center_index: Center node index per subgraph.
+            node_offsets: Start of the nodes of every subgraph, followed by the total count.
+            node_indices: Node indices of all subgraphs.
+            edge_offsets: Start of the edges of every subgraph, followed by the total count.
+            edge_indices: Edge indices of all subgraphs.
+        """
+        self.runtime = runtime
+        self.center_index = center_index
+        self.node_offsets = node_offsets
+        self.node_indices = node_indices
+        self.edge_offsets = edge_offsets
+        self.edge_indices = edge_indices
+
+    @classmethod
+    def from_subgraphs(cls, runtime: "Runtime", subgraphs: List[Subgraph]) -> "SubgraphPartition":
+        """
+        Index arrays of Subgraph models. Nodes and edges are resolved by identity, copies
+        that are not part of the runtime by their id (first occurrence).
+        """
+        graph = runtime.to_columnar()
+        node_positions = {id(node): i for i, node in enumerate(runtime.nodes)}
+        edge_positions = {id(edge): i for i, edge in enumerate(runtime.edges)}
+        edge_index: Dict[str, int] = {}
+
+        def edge_position(edge) -> int:
+            position = edge_positions.get(id(edge))
+            if position is None:
+                if not edge_index:
+                    for i in range(len(runtime.edges) - 1, -1, -1):
+                        edge_index[runtime.edges[i].id] = i
+                position = edge_index[edge.id]
+            return position
+
+        centers, node_indices, edge_indices = [], [], []
+        node_offsets, edge_offsets = [0], [0]
+        for subgraph in subgraphs:
+            nodes = [node_positions.get(id(node), graph.node_index.get(node.id)) for node in subgraph.nodes]
+            center = next((index for node, index in zip(subgraph.nodes, nodes) if node.id == subgraph.center_node_id),
+                          None)
+            centers.append(graph.node_index[subgraph.center_node_id] if center is None else center)
+            node_indices.extend(nodes)
+            node_offsets.append(len(node_indices))
+            edge_indices.extend(edge_position(edge) for edge in subgraph.edges)
+            edge_offsets.append(len(edge_indices))
+
+        return cls(
+            runtime,
+            center_index=np.asarray(centers, dtype=np.int32),
+            node_offsets=np.asarray(node_offsets, dtype=np.int64),
+            node_indices=np.asarray(node_indices, dtype=np.int32),
+            edge_offsets=np.asarray(edge_offsets, dtype=np.int64),
+            edge_indices=np.asarray(edge_indices, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.center_index)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[SubgraphView, List[SubgraphView]]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("subgraph index out of range")
+        return SubgraphView(self.runtime, int(self.center_index[item]), self.nodes_of(item), self.edges_of(item))
+
+    def center_node_id(self, item: int) -> str:
+        return self.runtime.to_columnar().node_ids[self.center_index[item]]
+
+    def nodes_of(self, item: int) -> np.ndarray:
+        """Node indices of a subgraph."""
+        return self.node_indices[self.node_offsets[item]:self.node_offsets[item + 1]]
+
+    def edges_of(self, item: int) -> np.ndarray:
+        """Edge indices of a subgraph."""
+        return self.edge_indices[self.edge_offsets[item]:self.edge_offsets[item + 1]]
+
+    def materialize(self, item: int) -> Subgraph:
+        """Creates the Subgraph model of a subgraph."""
+        return self[item].to_subgraph()
@@ -0,0 +1,57 @@
+from typing import List, TYPE_CHECKING
+
+import numpy as np
+
+from .node import Node
+from .edge import Edge
+from .subgraph import Subgraph
+
+if TYPE_CHECKING:
+    from .runtime import Runtime
+
+
+class SubgraphView:
+    """
+    Subgraph held as indices into its runtime instead of copied node and edge lists.
+
+    Provides the attributes of a Subgraph (`center_node_id`, `nodes`, `edges`), which
+    are resolved from the runtime on access and not kept by the view.
+    """
+
+    __slots__ = ("runtime", "center_index", "node_indices", "edge_indices")
+
+    def __init__(self, runtime: "Runtime", center_index: int, node_indices: np.ndarray, edge_indices: np.ndarray):
+        """
+        Args:
+            runtime: Runtime the indices refer to.
+            center_index: Node index of the center node.
+            node_indices: Node indices of the subgraph.
+            edge_indices: Edge indices of the subgraph.
+        """
+        self.runtime = runtime
+        self.center_index = center_index
+        self.node_indices = node_indices
+        self.edge_indices = edge_indices
+
+    @property
+    def center_node_id(self) -> str:
+        return self.runtime.to_columnar().node_ids[self.center_index]
+
+    @property
+    def node_ids(self) -> List[str]:
+        node_ids = self.runtime.to_columnar().node_ids
+        return [node_ids[index] for index in self.node_indices.tolist()]
+
+    @property
+    def nodes(self) -> List[Node]:
+        nodes = self.runtime.nodes
+        return [nodes[index] for index in self.node_indices.tolist()]
+
+    @property
+    def edges(self) -> List[Edge]:
+        edges = self.runtime.edges
+        return [edges[index] for index in self.edge_indices.tolist()]
+
+    def to_subgraph(self) -> Subgraph:
+        """Creates the Subgraph model holding the node and edge lists."""
+        return Subgraph(center_node_id=self.center_node_id, nodes=self.nodes, edges=self.edges)
@@ -0,0 +1,73 @@
+from typing import NamedTuple
+
+import pytest
+
+from runtime_analyzer.application.services.code_link.deterministic_code_link_algorithm import DeterministicLinkage
+from runtime_analyzer.application.services.matching.contracts.differentiation_algorithm import DifferentiationResult
+from runtime_analyzer.application.services.matching.heuristic_matching_algorithm import HeuristicMatchingAlgorithm
+from runtime_analyzer.application.services.runtime_causal_link.runtime_causal_link import RuntimeCausalLinkService
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+from runtime_analyzer.domain.models import CodeChangeSpan, CodeEvolution, CodeLinkContainer, Runtime
+
+
+def build_runtime(value, trace_all=False, energy=False):
+    """
+    A runtime of 20 nodes with values derived from `value` and one edge per node. Odd nodes (or all
+    with `trace_all`) are allocated by the stack at app.js line 10. With `energy`, every third node
+    has energy counters.
+    """
+    nodes = [{"id": f"n{i}", "edgeIds": [], "type": "object", "value": f"{value}{i % 3}",
+              "traceId": "s1" if trace_all or i % 2 else None} for i in range(20)]
+    if energy:
+        for i, node in enumerate(nodes[::3]):
+            node["energy"] = {"nodeId": node["id"], "readCounter": i, "writeCounter": 2 * i, "size": 8}
+    edges = [{"id": f"e{i}", "fromNodeId": f"n{i}", "toNodeId": f"n{(i * 7 + 1) % 20}", "name": "ref"}
+             for i in range(20)]
+    stacks = [{"id": "s1", "frameIds": [], "functionName": "f", "scriptName": "app.js", "lineNumber": 10,
+               "columnNumber": 1}]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": stacks})
+
+
+class Comparison(NamedTuple):
+    baseline: Runtime
+    modified: Runtime
+    matching: DifferentiationResult
+    links: CodeLinkContainer
+    time_tracking: dict
+
+
+class SmallComparison:
+    """
+    Compares the runtimes "a" and "b" of `build_runtime` end to end with the heuristic greedy
+    strategy (similarity threshold 0.5, k=1), linking `change` in the modified runtime.
+    """
+
+    change = CodeEvolution(fileId="app.js", modificationType="modify", modificationSource="modified",
+                           codeChangeSpan=CodeChangeSpan(lineStart=5, lineEnd=15, columnStart=0, columnEnd=100))
+
+    @staticmethod
+    def service(subgraph_algorithm=GreedyKHopSubgraphAlgorithm, matching_workers=1, **params):
+        """The service of the comparison, `params` are passed on to RuntimeCausalLinkService."""
+        return RuntimeCausalLinkService(HeuristicMatchingAlgorithm, subgraph_algorithm, DeterministicLinkage,
+                                        differentiation_params={"similarity_threshold": 0.5,
+                                                                "workers": matching_workers},
+                                        subgraph_params={"k": 1}, **params)
+
+    def __call__(self, trace_all=False, energy=False, **params) -> Comparison:
+        """Builds both runtimes with `trace_all` and `energy` and compares them with `service(**params)`."""
+        baseline, modified = build_runtime("a", trace_all, energy), build_runtime("b", trace_all, energy)
+        matching, links, time_tracking = self.service(**params).compare(baseline, [], modified, [self.change])
+        return Comparison(baseline, modified, matching, links, time_tracking)
+
+
+@pytest.fixture(scope="session")
+def generate_runtime():
+    """Builds the small runtimes compared end to end, see `build_runtime`."""
+    return build_runtime
+
+
+@pytest.fixture(scope="session")
+def small_comparison():
+    """Compares the small runtimes end to end and returns the pair and its results, see `SmallComparison`."""
+    return SmallComparison()
@@ -0,0 +1,73 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from runtime_analyzer.application.services.runtime_causal_link.batch_comparison import BatchComparisonService
+from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+from runtime_analyzer.domain.models import BatchComparison
+
+
+class CountingGreedyKHop(GreedyKHopSubgraphAlgorithm):
+    generated = 0
+
+    def generate(self, runtime):
+        CountingGreedyKHop.generated += 1
+        return super().generate(runtime)
+
+
+def runtime_data(seed, node_count=40):
+    rng = random.Random(seed)
+    nodes = [{"id": f"n{i}", "edgeIds": [], "type": rng.choice(["object", "array"]), "value": str(rng.randrange(3)),
+              "traceId": "s1"} for i in range(node_count)]
+    edges = [{"id": f"e{i}", "fromNodeId": f"n{rng.randrange(node_count)}", "toNodeId": f"n{rng.randrange(node_count)}",
+              "name": "ref"} for i in range(node_count)]
+    stacks = [{"id": "s1", "frameIds": [], "functionName": "f", "scriptName": "app.js", "lineNumber": 10,
+               "columnNumber": 1}]
+    return {"nodes": nodes, "edges": edges, "stacks": stacks}
+
+
+# Matching workers run inside the batch workers
+@pytest.mark.parametrize("workers, matching_workers", [(1, 1), (2, 1), (2, 2)])
+def test_batch_loads_every_runtime_once_and_matches_single_comparisons(tmp_path, small_comparison, workers,
+                                                                       matching_workers):
+    paths = []
+    for seed in range(4):
+        paths.append(str(tmp_path / f"runtime-{seed}.json"))
+        with open(paths[-1], 'w') as f:
+            json.dump(runtime_data(seed), f)
+
+    # One baseline against all candidates plus a cross pair
+    comparisons = [BatchComparison(name=f"candidate-{i}", baseline=paths[0], modified=paths[i],
+                                   code_evolution_modified=[small_comparison.change]) for i in range(1, 4)]
+    comparisons.append(BatchComparison(name="cross", baseline=paths[1], modified=paths[2]))
+
+    parser = RuntimeParserService()
+    loads = Counter()
+
+    def load_runtime(path):
+        loads[path] += 1
+        return parser.parse_file(path)
+
+    CountingGreedyKHop.generated = 0
+    batch = BatchComparisonService(small_comparison.service(CountingGreedyKHop, matching_workers), load_runtime,
+                                   workers=workers)
+    results = batch.run(comparisons, lambda comparison, baseline, modified, matching, links, _: (
+        comparison.name, matching.model_dump(), links.model_dump()))
+
+    assert loads == Counter(paths)
+    if workers == 1:
+        # With workers, subgraphs are generated in worker processes
+        assert CountingGreedyKHop.generated == len(paths)
+    assert [name for name, _, _ in results] == [comparison.name for comparison in comparisons]
+
+    service = small_comparison.service()
+    for comparison, (_, matching, links) in zip(comparisons, results):
+        expected_matching, expected_links, _ = service.compare(
+            parser.parse_file(comparison.baseline), comparison.code_evolution_baseline,
+            parser.parse_file(comparison.modified), comparison.code_evolution_modified)
+        assert matching == expected_matching.model_dump()
+        assert links == expected_links.model_dump()
@@ -0,0 +1,35 @@
+from runtime_analyzer.application.helpers.instrumentation import Profiler
+
+
+def run(small_comparison, checkpoint_dir, code_link_params=None):
+    profiler = Profiler()
+    comparison = small_comparison(code_link_params=code_link_params, instrumentation=profiler,
+                                  checkpoint_dir=str(checkpoint_dir))
+    return comparison.matching.model_dump(), comparison.links.model_dump(), profiler.counters
+
+
+def test_rerun_loads_all_stages_from_checkpoints(tmp_path, small_comparison):
+    matching, links, counters = run(small_comparison, tmp_path)
+    assert counters["checkpoint.misses"] == 4 and "checkpoint.hits" not in counters
+    assert "matching.exact_comparisons" in counters
+
+    resumed_matching, resumed_links, counters = run(small_comparison, tmp_path)
+    assert counters["checkpoint.hits"] == 4 and "checkpoint.misses" not in counters
+    # Neither matching nor linking ran again
+    assert "matching.exact_comparisons" not in counters and "code_link.direct_links" not in counters
+    assert resumed_matching == matching
+    assert resumed_links == links and links["regressions"]
+
+
+def test_changed_code_link_parameters_only_rerun_linking(tmp_path, small_comparison):
+    run(small_comparison, tmp_path)
+    _, links, counters = run(small_comparison, tmp_path, code_link_params={"max_distance": 0})
+    assert counters["checkpoint.hits"] == 3 and counters["checkpoint.misses"] == 1
+    assert "matching.exact_comparisons" not in counters and counters["code_link.direct_links"] > 0
+
+    # A broken checkpoint is dropped and its stage runs again
+    for manifest in tmp_path.glob("matching-*/manifest.json"):
+        manifest.write_text("{")
+    _, resumed_links, counters = run(small_comparison, tmp_path, code_link_params={"max_distance": 0})
+    assert counters["checkpoint.misses"] == 1 and "matching.exact_comparisons" in counters
+    assert resumed_links == links and links["unmappable_regressions"]
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+CLI_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "@js-heap-inspector-causal-link-cli", "src")
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+# Import time of the CLI on top of the domain models, which every run needs to parse the runtimes
+STARTUP_BUDGET_MS = 100
+
+_PROBE = """
+import json, sys
+import causal_link
+modules = sorted(sys.modules)
+strategies = {name: {stage: causal_link.load_component(reference).__name__ for stage, reference in strategy.items()}
+              for name, strategy in causal_link.STRATEGY_MAP.items()}
+print(json.dumps({"modules": modules, "strategies": strategies}))
+"""
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([CLI_DIR, SRC_DIR]))
+    return subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+
+
+def import_overhead_ms():
+    """Cumulative import time of the CLI module minus the domain models, from `-X importtime`."""
+    stderr = run_python("-X", "importtime", "-c", "import causal_link").stderr
+    cumulative = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    return (cumulative["causal_link"] - cumulative["runtime_analyzer.domain.models"]) / 1000
+
+
+def test_strategies_and_reporters_are_imported_on_use():
+    probe = json.loads(run_python("-c", _PROBE).stdout)
+
+    loaded = [module for module in probe["modules"]
+              if module.startswith(("runtime_analyzer.application.services.subgraph_creation.",
+                                    "runtime_analyzer.application.services.matching.",
+                                    "runtime_analyzer.application.services.code_link.",
+                                    "runtime_analyzer.application.services.checkpoint",
+                                    "runtime_analyzer.application.reporter.code_link",
+                                    "runtime_analyzer.application.reporter.matching",
+                                    "runtime_analyzer.application.helpers.columnar_export",
+                                    "runtime_analyzer.application.reporter.report_sidecars",
+                                    "multiprocessing", "pyarrow", "networkx"))
+              and ".contracts" not in module]
+    assert loaded == []
+
+    # Every reference of the strategy map resolves to its class
+    assert probe["strategies"]["dominator-tree"] == {"matching": "HeuristicMatchingAlgorithm",
+                                                     "subgraph": "DominatorTreeSubgraphAlgorithm",
+                                                     "code_link": "DeterministicLinkage"}
+    assert {strategy["subgraph"] for strategy in probe["strategies"].values()} == {
+        "GreedyKHopSubgraphAlgorithm", "CommunityDetectionSubgraphAlgorithm", "PrimitiveSubgraphAlgorithm",
+        "DominatorTreeSubgraphAlgorithm"}
+
+
+def test_import_time_is_within_budget():
+    # Best of three, the first run may also pay for writing bytecode caches
+    assert min(import_overhead_ms() for _ in range(3)) < STARTUP_BUDGET_MS
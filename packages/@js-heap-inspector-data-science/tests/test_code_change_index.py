@@ -0,0 +1,50 @@
+import random
+
+from runtime_analyzer.application.services.code_link.code_change_index import CodeChangeIndex
+from runtime_analyzer.domain.models import CodeEvolution, CodeChangeSpan, Stack
+
+
+def generate_changes(rng, count):
+    changes = []
+    for _ in range(count):
+        line_start = rng.randrange(50)
+        changes.append(CodeEvolution(
+            fileId=rng.choice(["app.js", "util.js", "lib/util.js", "vendor.js"]),
+            modificationType="modify",
+            modificationSource="modified",
+            codeChangeSpan=CodeChangeSpan(lineStart=line_start, lineEnd=line_start + rng.randrange(-2, 10),
+                                          columnStart=rng.randrange(20), columnEnd=rng.randrange(40))
+        ))
+    return changes
+
+
+def scan_match(frame, changes, use_column_span):
+    """Reference: files in order of first appearance, changes in list order."""
+    file_order = list(dict.fromkeys(c.fileId for c in changes))
+    for file_id in file_order:
+        if file_id not in frame.scriptName:
+            continue
+        for change in changes:
+            span = change.codeChangeSpan
+            if change.fileId != file_id:
+                continue
+            if use_column_span:
+                position = (frame.lineNumber, frame.columnNumber)
+                if (span.lineStart, span.columnStart) <= position <= (span.lineEnd, span.columnEnd):
+                    return change
+            elif span.lineStart <= frame.lineNumber <= span.lineEnd:
+                return change
+    return None
+
+
+def test_index_matches_linear_scan():
+    rng = random.Random(7)
+    for _ in range(20):
+        changes = generate_changes(rng, rng.randrange(1, 40))
+        for use_column_span in (False, True):
+            index = CodeChangeIndex(changes, use_column_span=use_column_span)
+            for i in range(200):
+                frame = Stack(id=f"s{i}", frameIds=[], functionName="f",
+                              scriptName=rng.choice(["src/app.js", "lib/util.js", "other.js", "vendor.js"]),
+                              lineNumber=rng.randrange(-2, 65), columnNumber=rng.randrange(45))
+                assert index.match(frame) is scan_match(frame, changes, use_column_span)
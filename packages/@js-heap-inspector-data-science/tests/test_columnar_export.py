@@ -0,0 +1,44 @@
+import pytest
+
+from runtime_analyzer.application.helpers.columnar_export import columnar_tables, write_columnar
+
+
+def node_columns(runtime, node_id):
+    node = runtime.get_node_by_id(node_id)
+    energy = node.energy
+    return {"node_type": node.type, "read_counter": energy.readCounter if energy else None,
+            "write_counter": energy.writeCounter if energy else None, "size": energy.size if energy else None}
+
+
+def test_tables_join_node_columns(tmp_path, small_comparison):
+    pa = pytest.importorskip("pyarrow")
+    baseline, modified, matching, links, _ = small_comparison(energy=True)
+
+    tables = columnar_tables(baseline, modified, matching, links)
+    runtimes = {"baseline": baseline, "modified": modified}
+    for category in ("matched", "modified", "added_node_ids", "removed_node_ids"):
+        expected = [{"group_id": group, "side": side, "node_id": node_id,
+                     "similarity_score": getattr(result, "similarity_score", None),
+                     **node_columns(runtimes[side], node_id)}
+                    for side in ("baseline", "modified")
+                    for group, result in enumerate(getattr(matching, category))
+                    for node_id in getattr(result, f"nodes_{side}_id")]
+        assert tables[category].to_pylist() == expected
+    assert pa.types.is_dictionary(tables["matched"].schema.field("node_id").type)
+
+    regressions = tables["regressions"].to_pylist()
+    assert regressions and [row["node_id"] for row in regressions] == [pair.node_id for pair in links.regressions]
+    assert regressions[0]["file_id"] == "app.js" and regressions[0]["line_end"] == 15
+    assert all({key: row[key] for key in ("node_type", "read_counter", "write_counter", "size")}
+               == node_columns(modified, row["node_id"]) for row in regressions)
+    assert tables["unmappable_improvements"]["node_id"].to_pylist() == links.unmappable_improvements
+
+    # Model results give the same tables, which are written and read back unchanged
+    model_tables = columnar_tables(baseline, modified, matching.to_matching_result(), links)
+    assert {name: table.to_pylist() for name, table in model_tables.items()} == \
+           {name: table.to_pylist() for name, table in tables.items()}
+    for file_format in ("parquet", "arrow"):
+        paths = write_columnar(str(tmp_path / file_format), baseline, modified, matching, links, file_format)
+        assert len(paths) == len(tables)
+        read = pa.parquet.read_table if file_format == "parquet" else lambda path: pa.ipc.open_file(path).read_all()
+        assert read(paths[0]) == tables["matched"]
@@ -0,0 +1,66 @@
+from runtime_analyzer.application.services.code_link.deterministic_code_link_algorithm import DeterministicLinkage
+from runtime_analyzer.domain.models import Runtime, ColumnarRuntime
+
+RUNTIME_RAW = {
+    "nodes": [
+        {"id": "n1", "edgeIds": ["e1", "e3"], "type": "root", "root": True},
+        {"id": "n2", "edgeIds": ["e2"], "type": "object", "value": "v", "traceId": "s1",
+         "energy": {"nodeId": "n2", "allocationTime": 1.5, "readCounter": 3, "writeCounter": 1, "size": 64}},
+        {"id": "n3", "edgeIds": [], "type": "object",
+         "energy": {"nodeId": "n3", "readCounter": 0, "writeCounter": 2, "size": 8}}
+    ],
+    "edges": [
+        {"id": "e1", "fromNodeId": "n1", "toNodeId": "n2", "name": "a"},
+        {"id": "e2", "fromNodeId": "n2", "toNodeId": "n3", "name": "b"},
+        {"id": "e3", "fromNodeId": "n1", "toNodeId": "n3", "name": "c"},
+        {"id": "e4", "fromNodeId": "ghost", "toNodeId": "n3", "name": "d"}
+    ],
+    "stacks": [
+        {"id": "s1", "frameIds": ["s2"], "functionName": "f", "scriptName": "app.js", "lineNumber": 1,
+         "columnNumber": 2},
+        {"id": "s2", "frameIds": [], "functionName": "g", "scriptName": "app.js", "lineNumber": 3, "columnNumber": 4}
+    ]
+}
+
+
+def test_columnar_runtime_round_trip():
+    runtime = Runtime.model_validate(RUNTIME_RAW)
+    columnar = ColumnarRuntime.from_runtime(runtime)
+
+    assert columnar.to_runtime().model_dump() == runtime.model_dump()
+
+
+def test_columnar_runtime_adjacency():
+    columnar = Runtime.model_validate(RUNTIME_RAW).to_columnar()
+    index = columnar.node_index
+
+    # Edges to unknown nodes are kept as phantom nodes after the real ones
+    assert columnar.node_count == 3
+    assert columnar.node_ids[3:] == ["ghost"]
+
+    assert columnar.successors(index["n1"]).tolist() == [index["n2"], index["n3"]]
+    assert columnar.retainers(index["n3"]).tolist() == [index["n2"], index["n1"], index["ghost"]]
+    assert columnar.retainers(index["n1"]).tolist() == []
+    assert columnar.energy_size.tolist() == [0, 64, 8]
+
+
+def test_runtime_backed_by_columns_behaves_like_parsed_runtime():
+    runtime = Runtime.model_validate(RUNTIME_RAW)
+    runtime.to_columnar()
+
+    # Cached columns take no part in the comparison
+    assert runtime == Runtime.model_validate(RUNTIME_RAW)
+    assert Runtime.from_columnar(runtime.to_columnar()) == runtime
+    assert dict(Runtime.from_columnar(runtime.to_columnar())) == dict(runtime)
+    assert Runtime.from_columnar(runtime.to_columnar()) != Runtime.model_validate({**RUNTIME_RAW, "stacks": []})
+
+
+def test_deterministic_linkage_keeps_runtimes_backed_by_columns(small_comparison):
+    baseline, modified, matching, expected, _ = small_comparison()
+
+    lazy_baseline, lazy_modified = (Runtime.from_columnar(runtime.to_columnar()) for runtime in (baseline, modified))
+    links = DeterministicLinkage(matching, lazy_baseline, [], lazy_modified, [small_comparison.change]).link()
+
+    # Only the stacks are built, the nodes are looked up in the columns
+    assert links == expected
+    assert lazy_baseline.model_fields_set == {"stacks"} and lazy_modified.model_fields_set == {"stacks"}
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from runtime_analyzer.application.services.subgraph_creation.community_creation_subgraph_algorithm import \
+    CommunityDetectionSubgraphAlgorithm
+from runtime_analyzer.domain.exceptions import UnsupportedAlgorithmError
+from runtime_analyzer.domain.models import Runtime, SubgraphPartition
+
+
+def generate_runtime(seed, clusters=6, cluster_size=15):
+    """Dense clusters connected by a few edges, plus a phantom node and a duplicate node id."""
+    rng = random.Random(seed)
+    node_ids = [f"n{c}-{i}" for c in range(clusters) for i in range(cluster_size)]
+    nodes = [{"id": node_id, "edgeIds": [], "type": "object"} for node_id in node_ids]
+    nodes.append({"id": node_ids[0], "edgeIds": [], "type": "duplicate"})
+
+    edges = []
+    for c in range(clusters):
+        members = node_ids[c * cluster_size:(c + 1) * cluster_size]
+        edges += [(rng.choice(members), rng.choice(members)) for _ in range(cluster_size * 3)]
+    edges += [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(clusters)]
+    edges.append((node_ids[1], "ghost"))
+    edges = [{"id": f"e{i}", "fromNodeId": u, "toNodeId": v, "name": "ref"} for i, (u, v) in enumerate(edges)]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def test_native_communities_partition_the_runtime():
+    runtime = generate_runtime(0)
+    subgraphs = CommunityDetectionSubgraphAlgorithm(seed=1).generate(runtime)
+
+    assert isinstance(subgraphs, SubgraphPartition)
+    node_ids = [node_id for subgraph in subgraphs for node_id in subgraph.node_ids]
+    assert sorted(node_ids) == sorted({node.id for node in runtime.nodes})
+    assert 3 <= len(subgraphs) <= 12
+
+    # One edge per undirected pair (the last one) between members, center has the highest degree.
+    # The phantom node joins the community of its only neighbor.
+    last_edge = {}
+    for edge in runtime.edges:
+        last_edge[frozenset((edge.fromNodeId, edge.toNodeId))] = edge.id
+    for subgraph in subgraphs:
+        members = set(subgraph.node_ids) | ({"ghost"} if "n0-1" in subgraph.node_ids else set())
+        expected = sorted((edge_id for pair, edge_id in last_edge.items() if pair <= members),
+                          key=lambda edge_id: int(edge_id[1:]))
+        assert [edge.id for edge in subgraph.edges] == expected
+
+        degree = {node_id: 0 for node_id in members}
+        degree["ghost"] = -1
+        for edge in subgraph.edges:
+            degree[edge.fromNodeId] += 1
+            degree[edge.toNodeId] += 1
+        assert degree[subgraph.center_node_id] == max(degree.values())
+
+
+def test_native_communities_are_deterministic():
+    runtime = generate_runtime(1)
+    first = CommunityDetectionSubgraphAlgorithm(seed=3).partition(runtime)
+    second = CommunityDetectionSubgraphAlgorithm(seed=3).partition(generate_runtime(1))
+
+    assert [subgraph.node_ids for subgraph in first] == [subgraph.node_ids for subgraph in second]
+    assert first.center_index.tolist() == second.center_index.tolist()
+
+
+def test_networkx_backend_finds_similar_communities():
+    nx = pytest.importorskip("networkx")
+    runtime = generate_runtime(2)
+    graph = nx.Graph()
+    graph.add_nodes_from(node.id for node in runtime.nodes)
+    graph.add_edges_from((edge.fromNodeId, edge.toNodeId) for edge in runtime.edges)
+
+    native = [set(subgraph.node_ids) | ({"ghost"} if "n0-1" in subgraph.node_ids else set())
+              for subgraph in CommunityDetectionSubgraphAlgorithm(seed=1).generate(runtime)]
+    reference = nx.community.louvain_communities(graph, seed=1)
+    assert nx.community.modularity(graph, native) >= nx.community.modularity(graph, reference) - 0.02
+
+    with pytest.raises(KeyError):
+        # The networkx backend cannot represent nodes that are only referenced by edges
+        CommunityDetectionSubgraphAlgorithm(seed=1, backend="networkx").generate(runtime)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(UnsupportedAlgorithmError):
+        CommunityDetectionSubgraphAlgorithm(backend="igraph")
@@ -0,0 +1,71 @@
+import json
+import random
+
+import pytest
+
+from runtime_analyzer.application.services.runtime_causal_link.concurrent_stages import ConcurrentRuntimeStages
+from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+from runtime_analyzer.application.services.subgraph_creation.primitive_subgraph_algorithm import \
+    PrimitiveSubgraphAlgorithm
+from runtime_analyzer.domain.exceptions import ParsingError
+
+pytestmark = pytest.mark.skipif(not ConcurrentRuntimeStages.available(), reason="requires forking worker processes")
+
+
+def runtime_data(seed, node_count=80, edge_count=120):
+    rng = random.Random(seed)
+    node_ids = [f"n{i}" for i in range(node_count)] + ["n0"]
+    nodes = [{"id": node_id, "edgeIds": [], "type": rng.choice(["object", "array"])} for node_id in node_ids]
+    edges = [{"id": f"e{i}", "fromNodeId": rng.choice(node_ids), "toNodeId": rng.choice(node_ids + ["ghost"]),
+              "name": "ref"} for i in range(edge_count)]
+    return {"nodes": nodes, "edges": edges, "stacks": []}
+
+
+def contents(subgraphs):
+    return [(subgraph.center_node_id, [node.id for node in subgraph.nodes], [edge.id for edge in subgraph.edges])
+            for subgraph in subgraphs]
+
+
+@pytest.mark.parametrize("algorithm", [GreedyKHopSubgraphAlgorithm(k=2), PrimitiveSubgraphAlgorithm()])
+def test_concurrent_subgraphs_match_serial_generation(tmp_path, algorithm):
+    parser = RuntimeParserService()
+    paths = []
+    for seed in range(2):
+        paths.append(str(tmp_path / f"runtime-{seed}.json"))
+        with open(paths[-1], 'w') as f:
+            json.dump(runtime_data(seed), f)
+
+    expected = [contents(algorithm.generate(parser.parse_file(path))) for path in paths]
+
+    runtimes = [parser.parse_file(path) for path in paths]
+    generated = ConcurrentRuntimeStages(algorithm).generate(runtimes)
+    assert [contents(subgraphs) for subgraphs in generated] == expected
+
+    # Every runtime is parsed once, by its worker, and handed back as columns
+    log = tmp_path / "parsed.log"
+
+    def parse_logged(path):
+        with open(log, 'a') as f:
+            f.write(path + "\n")
+        return parser.parse_file(path)
+
+    with ConcurrentRuntimeStages(algorithm, parse_logged).submit(paths) as pending:
+        loaded = pending.collect()
+    assert sorted(log.read_text().splitlines()) == paths
+    assert [contents(subgraphs) for subgraphs in loaded] == expected
+    for subgraphs, path in zip(loaded, paths):
+        reference = parser.parse_file(path)
+        assert subgraphs.runtime.to_columnar().out_edges.tolist() == reference.to_columnar().out_edges.tolist()
+        assert subgraphs.runtime.nodes == reference.nodes and subgraphs.runtime.edges == reference.edges
+
+
+def test_worker_errors_propagate(tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{")
+
+    with pytest.raises(ParsingError):
+        with ConcurrentRuntimeStages(PrimitiveSubgraphAlgorithm(), RuntimeParserService().parse_file) \
+                .submit([str(broken)]) as pending:
+            pending.collect()
@@ -0,0 +1,55 @@
+import random
+from collections import deque
+
+from runtime_analyzer.application.services.code_link.derived_linkage import DerivedLinkageIndex
+from runtime_analyzer.domain.models import Runtime, CodeEvolution, CodeChangeSpan
+
+
+def generate_runtime(rng, node_count, edge_count):
+    nodes = [{"id": f"n{i}", "edgeIds": [], "type": "object"} for i in range(node_count)]
+    edges = [{"id": f"e{i}", "fromNodeId": f"n{rng.randrange(node_count)}",
+              "toNodeId": f"n{rng.randrange(node_count)}", "name": "ref"} for i in range(edge_count)]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def change(line):
+    return CodeEvolution(fileId="app.js", modificationType="modify", modificationSource="modified",
+                         codeChangeSpan=CodeChangeSpan(lineStart=line, lineEnd=line, columnStart=0, columnEnd=0))
+
+
+def bfs_retainer(graph, node_id, link_map, max_distance):
+    """Reference: BFS over the retainers of a single node, the first linked node wins."""
+    start = graph.node_index[node_id]
+    queue = deque([(start, 0)])
+    visited = {start}
+    while queue:
+        index, dist = queue.popleft()
+        if graph.node_ids[index] in link_map:
+            return link_map[graph.node_ids[index]]
+        if dist >= max_distance:
+            continue
+        for retainer in graph.retainers(index).tolist():
+            if retainer not in visited:
+                visited.add(retainer)
+                queue.append((retainer, dist + 1))
+    return None
+
+
+def test_derived_linkage_equals_bfs_per_node():
+    rng = random.Random(3)
+    for _ in range(30):
+        node_count = rng.randrange(10, 80)
+        graph = generate_runtime(rng, node_count, rng.randrange(node_count, 4 * node_count)).to_columnar()
+        max_distance = rng.choice([0, 1, 2, 5])
+
+        link_map = {f"n{i}": change(i) for i in range(node_count) if rng.random() < 0.1}
+        index = DerivedLinkageIndex(graph, [link_map.get(node_id) for node_id in graph.node_ids], max_distance)
+
+        unmapped = [f"n{i}" for i in range(node_count) if f"n{i}" not in link_map]
+        rng.shuffle(unmapped)
+        for node_id in unmapped:
+            expected = bfs_retainer(graph, node_id, link_map, max_distance)
+            assert index.find(node_id) is expected
+            if expected:
+                link_map[node_id] = expected
+                index.add_link(node_id, expected)
@@ -0,0 +1,85 @@
+import random
+
+from runtime_analyzer.application.reporter.code_link.code_link_reporter import CodeLinkReporter
+from runtime_analyzer.application.services.subgraph_creation.dominator_tree_subgraph_algorithm import \
+    DominatorTreeSubgraphAlgorithm
+from runtime_analyzer.domain.models import Runtime, CodeLinkContainer, CausalPair, CodeEvolution, CodeChangeSpan
+from runtime_analyzer.domain.models.dominator_tree import VIRTUAL_ROOT
+
+
+def generate_runtime(seed, node_count=60, edge_count=90):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(node_count):
+        node = {"id": f"n{i}", "edgeIds": [], "type": rng.choice(["object", "array"]), "root": rng.random() < 0.05}
+        if rng.random() < 0.8:
+            node["energy"] = {"nodeId": f"n{i}", "readCounter": 0, "writeCounter": 0, "size": rng.randrange(1, 100)}
+        nodes.append(node)
+    ids = [node["id"] for node in nodes] + ["ghost"]
+    edges = [{"id": f"e{i}", "fromNodeId": rng.choice(ids), "toNodeId": rng.choice(ids), "name": "ref"}
+             for i in range(edge_count)]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def reachable(graph, roots, removed=None):
+    seen, stack = set(), [root for root in roots if root != removed]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        stack.extend(successor for successor in graph.successors(node).tolist() if successor != removed)
+    return seen
+
+
+def test_dominators_match_definition():
+    for seed in range(4):
+        runtime = generate_runtime(seed, node_count=40, edge_count=60)
+        graph = runtime.to_columnar()
+        tree = runtime.to_dominator_tree()
+        roots = tree.roots.tolist()
+
+        # Strict dominators of w: nodes whose removal makes w unreachable from the virtual root
+        dominators = {w: {v for v in range(graph.id_count) if v != w and w not in reachable(graph, roots, v)}
+                      for w in range(graph.id_count)}
+        for w, strict in dominators.items():
+            # The immediate dominator is the strict dominator dominated by all others
+            expected = next((v for v in strict if strict - {v} <= dominators[v]), VIRTUAL_ROOT)
+            assert tree.idom[w] == expected
+
+            dominated = [v for v in range(graph.id_count) if w == v or w in dominators[v]]
+            assert tree.retained_size[w] == sum(int(tree.shallow_size[v]) for v in dominated)
+
+
+def test_partition_consists_of_dominator_subtrees():
+    runtime = generate_runtime(1, node_count=300, edge_count=400)
+    tree = runtime.to_dominator_tree()
+    subgraphs = DominatorTreeSubgraphAlgorithm(max_nodes=5).generate(runtime)
+
+    covered = sorted(index for i in range(len(subgraphs)) for index in subgraphs.nodes_of(i).tolist())
+    assert covered == list(range(runtime.to_columnar().node_count))
+    for i in range(len(subgraphs)):
+        center, members = int(subgraphs.center_index[i]), set(subgraphs.nodes_of(i).tolist())
+        assert center in members and len(members) <= 5
+        for node in members:
+            while node != center:
+                node = int(tree.idom[node])
+                assert node in members
+        for edge in subgraphs[i].edges:
+            assert {edge.fromNodeId, edge.toNodeId} <= set(subgraphs[i].node_ids) | {"ghost"}
+
+
+def test_code_link_report_ranks_by_retained_size():
+    runtime = generate_runtime(2)
+    tree = runtime.to_dominator_tree()
+    change = CodeEvolution(fileId="app.js", modificationType="modify", modificationSource="modified",
+                           codeChangeSpan=CodeChangeSpan(lineStart=1, lineEnd=2, columnStart=0, columnEnd=10))
+    pairs = [CausalPair(node_id=f"n{i}", code_evolution=change, confidence="Direct") for i in range(10)]
+    container = CodeLinkContainer(regressions=pairs, improvements=[], unmappable_regressions=[],
+                                  unmappable_improvements=[])
+
+    html = CodeLinkReporter(runtime, runtime, rank_by_retained_size=True, top_retainers=3).report(container)
+    largest = sorted(range(10), key=lambda i: -tree.retained_size_of(f"n{i}"))[:3]
+    positions = [html.index(f"<td>n{i}</td>") for i in largest]
+    assert "Top Retainers" in html and positions == sorted(positions)
+    assert "Top Retainers" not in CodeLinkReporter(runtime, runtime).report(container)
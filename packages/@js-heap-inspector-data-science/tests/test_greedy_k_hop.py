@@ -0,0 +1,69 @@
+import random
+from collections import deque
+
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+from runtime_analyzer.domain.models import Runtime, Subgraph, SubgraphPartition, SubgraphView
+
+
+def generate_runtime(seed, node_count=80, edge_count=160):
+    rng = random.Random(seed)
+    nodes = [{"id": f"n{rng.randrange(10 ** 6)}-{i}", "edgeIds": [], "type": "object"} for i in range(node_count)]
+    # Some edges reference phantom nodes that are not part of the node list
+    ids = [node["id"] for node in nodes] + ["ghost1", "ghost2"]
+    edges = [{"id": f"e{i}", "fromNodeId": rng.choice(ids), "toNodeId": rng.choice(ids), "name": "ref"}
+             for i in range(edge_count)]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def reference_partition(runtime, k):
+    """Greedy K-Hop clustering as a plain BFS over the edge lists."""
+    incident = {}
+    for edge in runtime.edges:
+        incident.setdefault(edge.fromNodeId, []).append((edge, edge.toNodeId))
+    for edge in runtime.edges:
+        incident.setdefault(edge.toNodeId, []).append((edge, edge.fromNodeId))
+    node_ids = {node.id for node in runtime.nodes}
+
+    visited, partition = set(), []
+    for start in sorted(node.id for node in runtime.nodes):
+        if start in visited:
+            continue
+        visited.add(start)
+        nodes, edges, queue = [start], [], deque([(start, 0)])
+        while queue:
+            curr, dist = queue.popleft()
+            if dist >= k:
+                continue
+            for edge, neighbor in incident.get(curr, []):
+                if edge.id not in edges:
+                    edges.append(edge.id)
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append((neighbor, dist + 1))
+                    if neighbor in node_ids:
+                        nodes.append(neighbor)
+        partition.append((start, nodes, edges))
+    return partition
+
+
+def test_partition_equals_reference_bfs():
+    for seed in range(10):
+        runtime = generate_runtime(seed)
+        for k in (0, 1, 2, 3):
+            subgraphs = GreedyKHopSubgraphAlgorithm(k=k).generate(runtime)
+            assert isinstance(subgraphs, SubgraphPartition)
+            assert [(sg.center_node_id, [n.id for n in sg.nodes], [e.id for e in sg.edges])
+                    for sg in subgraphs] == reference_partition(runtime, k)
+
+
+def test_partition_items_are_index_views():
+    runtime = generate_runtime(0)
+    subgraphs = GreedyKHopSubgraphAlgorithm(k=1).generate(runtime)
+
+    view = subgraphs[-1]
+    assert isinstance(view, SubgraphView)
+    assert view.center_index == subgraphs.center_index[len(subgraphs) - 1]
+    assert view.node_ids == [node.id for node in view.nodes]
+    assert subgraphs.materialize(len(subgraphs) - 1) == Subgraph(center_node_id=view.center_node_id,
+                                                                  nodes=view.nodes, edges=view.edges)
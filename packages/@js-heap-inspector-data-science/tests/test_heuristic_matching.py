@@ -0,0 +1,195 @@
+import random
+import warnings
+
+import numpy as np
+
+from runtime_analyzer.application.helpers.instrumentation import Profiler, use_instrumentation
+from runtime_analyzer.application.services.matching.heuristic_matching_algorithm import HeuristicMatchingAlgorithm
+from runtime_analyzer.application.services.matching.subgraph_distance import SubgraphDistance
+from runtime_analyzer.application.services.matching.subgraph_features import FeatureVocabulary, SubgraphFeatures
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+from runtime_analyzer.application.services.subgraph_creation.primitive_subgraph_algorithm import PrimitiveSubgraphAlgorithm
+from runtime_analyzer.domain.models import Runtime, MatchingResult, IndexedMatchingResult
+
+
+def generate_runtime(seed, node_count=60, prefix="n", edge_count=0):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(node_count):
+        node = {"id": f"{prefix}{i}", "edgeIds": [], "type": rng.choice(["object", "string", "closure", "array"])}
+        if rng.random() < 0.8:
+            node["value"] = f"v{rng.randrange(4)}"
+        nodes.append(node)
+    edges = [{"id": f"{prefix}e{i}", "fromNodeId": f"{prefix}{rng.randrange(node_count)}",
+              "toNodeId": f"{prefix}{rng.randrange(node_count)}", "name": "ref"} for i in range(edge_count)]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def brute_force_exact_matches(algorithm):
+    """Phase 1 as a full scan: the first unmatched identical baseline subgraph wins."""
+    matched_baseline = set()
+    pairs = []
+    for mod_sg in algorithm.subgraphs_modified:
+        for base_sg in algorithm.subgraphs_baseline:
+            if base_sg.center_node_id not in matched_baseline and algorithm._are_subgraphs_identical(mod_sg, base_sg):
+                matched_baseline.add(base_sg.center_node_id)
+                pairs.append(([n.id for n in base_sg.nodes], [n.id for n in mod_sg.nodes]))
+                break
+    return pairs
+
+
+def create_algorithm(seed, **params):
+    baseline = generate_runtime(seed, prefix="b")
+    modified = generate_runtime(seed + 1, prefix="m")
+    subgraph_algorithm = PrimitiveSubgraphAlgorithm()
+    return HeuristicMatchingAlgorithm(baseline, subgraph_algorithm.generate(baseline), modified,
+                                      subgraph_algorithm.generate(modified), **params)
+
+
+def test_exact_matching_keeps_first_unmatched_semantics():
+    for seed in range(5):
+        algorithm = create_algorithm(seed)
+        result: MatchingResult = algorithm.differentiate()
+
+        expected = brute_force_exact_matches(algorithm)
+        assert [(m.nodes_baseline_id, m.nodes_modified_id) for m in result.matched] == expected
+
+
+def brute_force_inexact_matches(algorithm, result):
+    """Phase 2 over all pairs of subgraphs left unmatched by phase 1."""
+    matched_modified = {ids for m in result.matched for ids in m.nodes_modified_id}
+    matched_baseline = {ids for m in result.matched for ids in m.nodes_baseline_id}
+    unmatched_modified = [sg for sg in algorithm.subgraphs_modified if sg.center_node_id not in matched_modified]
+    unmatched_baseline = [sg for sg in algorithm.subgraphs_baseline if sg.center_node_id not in matched_baseline]
+
+    candidates = []
+    for mod_sg in unmatched_modified:
+        for base_sg in unmatched_baseline:
+            dist = algorithm._calculate_distance(mod_sg, base_sg)
+            if dist < algorithm.threshold:
+                candidates.append((dist, mod_sg, base_sg))
+    candidates.sort(key=lambda x: x[0])
+
+    pairs = []
+    for dist, mod_sg, base_sg in candidates:
+        if mod_sg.center_node_id in matched_modified or base_sg.center_node_id in matched_baseline:
+            continue
+        matched_modified.add(mod_sg.center_node_id)
+        matched_baseline.add(base_sg.center_node_id)
+        pairs.append(([n.id for n in base_sg.nodes], [n.id for n in mod_sg.nodes], 1.0 - dist))
+    return pairs
+
+
+def test_exact_candidate_generation_matches_all_pairs():
+    weight_settings = [
+        {},
+        {"similarity_threshold": 0.6},
+        {"similarity_threshold": 0.4, "w_type": 0.1, "w_value": 0.5},
+        {"similarity_threshold": 1.1},
+        {"similarity_threshold": 0.0},
+    ]
+    for seed in range(3):
+        for params in weight_settings:
+            algorithm = create_algorithm(seed, **params)
+            result = algorithm.differentiate()
+
+            expected = brute_force_inexact_matches(algorithm, result)
+            assert [(m.nodes_baseline_id, m.nodes_modified_id, m.similarity_score) for m in result.modified] == expected
+
+
+def test_candidate_recall_is_measured_before_truncation(capsys):
+    subgraph_algorithm = GreedyKHopSubgraphAlgorithm(k=1)
+    baseline = generate_runtime(3, prefix="b", edge_count=80)
+    modified = generate_runtime(4, prefix="m", edge_count=80)
+    for candidate_generation, expected_recall in (("exact", 1.0), ("approximate", 201 / 205)):
+        for max_candidates in (None, 1):
+            algorithm = HeuristicMatchingAlgorithm(baseline, subgraph_algorithm.generate(baseline), modified,
+                                                   subgraph_algorithm.generate(modified), similarity_threshold=0.6,
+                                                   candidate_generation=candidate_generation,
+                                                   report_candidate_recall=True,
+                                                   max_candidates_per_subgraph=max_candidates)
+            profiler = Profiler()
+            with use_instrumentation(profiler), warnings.catch_warnings():
+                # Keeping a single candidate changes assignments, which is warned about
+                warnings.simplefilter("ignore", RuntimeWarning)
+                algorithm.differentiate()
+
+            assert algorithm.candidate_recall == expected_recall
+            counters = profiler.counters
+            assert counters["matching.recall_generated_pairs"] / counters["matching.recall_qualifying_pairs"] == \
+                expected_recall
+            assert len(algorithm.candidate_scorer.last_truncated_rows) == (0 if max_candidates is None else 25)
+    # Stdout carries the result JSON without an output file
+    assert capsys.readouterr().out == ""
+
+
+def test_batched_distance_equals_pairwise_distance():
+    subgraph_algorithm = GreedyKHopSubgraphAlgorithm(k=1)
+    baseline = subgraph_algorithm.generate(generate_runtime(3, prefix="b", edge_count=80))
+    modified = subgraph_algorithm.generate(generate_runtime(4, prefix="m", edge_count=80))
+    algorithm = HeuristicMatchingAlgorithm(None, baseline, None, modified, w_topology=0.15)
+
+    vocabulary = FeatureVocabulary()
+    distance = SubgraphDistance(SubgraphFeatures.from_subgraphs(modified, vocabulary),
+                                SubgraphFeatures.from_subgraphs(baseline, vocabulary), vocabulary.type_words,
+                                algorithm.w_type, algorithm.w_value, algorithm.w_topology)
+    mod_positions = np.repeat(np.arange(len(modified)), len(baseline))
+    base_positions = np.tile(np.arange(len(baseline)), len(modified))
+
+    expected = [algorithm._calculate_distance(modified[m], baseline[b])
+                for m, b in zip(mod_positions.tolist(), base_positions.tolist())]
+    assert distance.distances(mod_positions, base_positions).tolist() == expected
+
+
+def test_parallel_scoring_equals_serial_run():
+    for params in ({"similarity_threshold": 0.6}, {"similarity_threshold": 0.6, "candidate_generation": "approximate"}):
+        serial = create_algorithm(1, **params).differentiate()
+        parallel_algorithm = create_algorithm(1, workers=2, **params)
+        parallel_algorithm.candidate_scorer.task_size = 16
+        parallel = parallel_algorithm.differentiate()
+
+        assert parallel.model_dump() == serial.model_dump()
+
+
+def test_top_k_candidates_equal_full_run_unless_reported():
+    for seed in range(4):
+        full = create_algorithm(seed, similarity_threshold=0.6).differentiate()
+        for k in (1, 3, 1000):
+            algorithm = create_algorithm(seed, similarity_threshold=0.6, max_candidates_per_subgraph=k)
+            algorithm.candidate_scorer.task_size = 8
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                result = algorithm.differentiate()
+
+            assert len(caught) == (1 if algorithm.truncation_affected_subgraphs else 0)
+            if not algorithm.truncation_affected_subgraphs:
+                assert result.model_dump() == full.model_dump()
+            if k == 1000:
+                assert algorithm.truncation_affected_subgraphs == []
+
+
+def test_indexed_result_dumps_like_matching_result():
+    baseline = generate_runtime(3, prefix="b", edge_count=80)
+    modified = generate_runtime(4, prefix="b", edge_count=80)
+    subgraph_algorithm = GreedyKHopSubgraphAlgorithm(k=1)
+    algorithm = HeuristicMatchingAlgorithm(baseline, subgraph_algorithm.generate(baseline), modified,
+                                           subgraph_algorithm.generate(modified), similarity_threshold=0.5)
+    result = algorithm.differentiate()
+
+    assert isinstance(result, IndexedMatchingResult)
+    assert len(result.modified) > 0
+    assert result.model_dump() == result.to_matching_result().model_dump()
+    modification = result.modified[-1]
+    assert modification.nodes_modified_id == [modified.to_columnar().node_ids[index]
+                                              for index in result.modified.modified_nodes_of(len(result.modified) - 1)]
+    assert modification.similarity_score == result.modified.similarity_score[-1]
+
+    # Both result shapes provide the same interface
+    model = result.to_matching_result()
+    graphs = (baseline.to_columnar(), modified.to_columnar())
+    assert result.to_indexed(*graphs) is result
+    assert model.to_indexed(*graphs).model_dump() == result.model_dump()
+    for category in ("matched", "modified", "added_node_ids", "removed_node_ids"):
+        assert result.node_count(category) == model.node_count(category)
+        assert list(result.iter_dump(category)) == list(model.iter_dump(category))
@@ -0,0 +1,61 @@
+from runtime_analyzer.application.helpers.instrumentation import Instrumentation, Profiler, current_instrumentation, \
+    use_instrumentation
+from runtime_analyzer.application.services.subgraph_creation.greedy_k_hop_subgraph_algorithm import \
+    GreedyKHopSubgraphAlgorithm
+
+
+def test_profiler_records_stages_and_counters_of_a_comparison(small_comparison):
+    reports = []
+    profiler = Profiler(lambda name, done, total: reports.append((name, done, total)), progress_interval=3600)
+    modified = small_comparison(trace_all=True, instrumentation=profiler).modified
+
+    stages = {stage["name"]: stage for stage in profiler.summary()["stages"]}
+    assert {"subgraph_generation", "matching", "matching.exact", "matching.inexact", "matching.residual",
+            "code_link", "code_link.direct", "code_link.derived"} <= set(stages)
+    assert stages["matching.exact"]["depth"] == stages["matching"]["depth"] + 1
+    assert all(stage["duration_seconds"] >= 0 and stage["cpu_seconds"] >= 0 for stage in stages.values())
+
+    counters = profiler.counters
+    assert counters["subgraphs.modified"] == len(GreedyKHopSubgraphAlgorithm(k=1).generate(modified))
+    assert counters["matching.pairs_scored"] >= counters["matching.candidates_kept"] > 0
+    assert counters["code_link.direct_links"] == 20
+
+    # Rate limited within the interval, except for the final report of every loop
+    subgraph_count = counters["subgraphs.modified"]
+    phase_1 = [(done, total) for name, done, total in reports if name == "Heuristic Matching Phase 1"]
+    assert phase_1 == [(0, subgraph_count), (subgraph_count, subgraph_count)]
+    final_reports = {}
+    for name, done, total in reports:
+        final_reports[name] = (done, total)
+    assert {"Heuristic Matching Phase 3 Added", "Direct Linkage Modified/Added from Modified Phase 1"} <= set(final_reports)
+    assert all(done == total for done, total in final_reports.values() if total is not None)
+
+    trace = profiler.trace()
+    phases = {event["ph"] for event in trace["traceEvents"]}
+    assert phases == {"X", "C"}
+    assert [event["ts"] for event in trace["traceEvents"]] == sorted(event["ts"] for event in trace["traceEvents"])
+
+
+def test_profiler_traces_memory_of_nested_stages():
+    profiler = Profiler(trace_memory=True)
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            retained = [bytes(1 << 16) for _ in range(16)]
+        del retained
+
+    inner, outer = profiler.summary()["stages"]
+    assert inner["traced_delta_bytes"] >= 16 << 16
+    assert outer["traced_peak_bytes"] >= inner["traced_peak_bytes"] >= inner["traced_delta_bytes"]
+    assert outer["traced_delta_bytes"] < inner["traced_delta_bytes"]
+
+
+def test_default_instrumentation_records_nothing():
+    instrumentation = current_instrumentation()
+    assert type(instrumentation) is Instrumentation and instrumentation.progress("loop", 10) is None
+
+    profiler = Profiler()
+    with use_instrumentation(profiler):
+        assert current_instrumentation() is profiler
+        # Without a callback there is nothing to report progress to
+        assert profiler.progress("loop", 10) is None
+    assert current_instrumentation() is instrumentation
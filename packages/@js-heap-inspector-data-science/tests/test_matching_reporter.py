@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from runtime_analyzer.application.helpers.energy import get_nodes_energy_for_access_metric
+from runtime_analyzer.application.reporter.matching.matching_reporter import MatchingReporter
+from runtime_analyzer.domain.models import Runtime, MatchingResult, MatchSubgraphResult, ModificationSubgraphResult, \
+    DeltaSubgraphResult, IndexedMatchingResult, SubgraphResultArrays
+
+
+def generate_runtime(seed, node_count=60):
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(node_count):
+        # Some ids are duplicates, which resolve to their last node
+        node_id = f"n{rng.randrange(node_count)}" if rng.random() < 0.15 else f"n{i}"
+        node = {"id": node_id, "edgeIds": [], "type": rng.choice(["object", "array", "string"])}
+        if rng.random() < 0.7:
+            node["energy"] = {"nodeId": node_id, "readCounter": rng.randrange(5), "writeCounter": rng.randrange(5),
+                              "size": rng.randrange(100)}
+        nodes.append(node)
+    edges = [{"id": "e0", "fromNodeId": nodes[0]["id"], "toNodeId": "ghost", "name": "ref"}]
+    return Runtime.model_validate({"nodes": nodes, "edges": edges, "stacks": []})
+
+
+def generate_groups(rng, result_type, baseline, modified, count):
+    baseline_ids = [node.id for node in baseline.nodes]
+    modified_ids = [node.id for node in modified.nodes]
+    groups = []
+    for _ in range(count):
+        fields = {"nodes_baseline_id": rng.sample(baseline_ids, rng.randrange(4)),
+                  "nodes_modified_id": rng.sample(modified_ids, rng.randrange(4))}
+        if result_type is ModificationSubgraphResult:
+            fields["similarity_score"] = 0.5
+        groups.append(result_type(**fields))
+    return groups
+
+
+def test_group_and_category_aggregates_match_node_models():
+    rng = random.Random(7)
+    baseline, modified = generate_runtime(1), generate_runtime(2)
+    result = MatchingResult(
+        matched=generate_groups(rng, MatchSubgraphResult, baseline, modified, 12),
+        modified=generate_groups(rng, ModificationSubgraphResult, baseline, modified, 6),
+        added_node_ids=[],
+        removed_node_ids=generate_groups(rng, DeltaSubgraphResult, baseline, modified, 5),
+    )
+    reporter = MatchingReporter(baseline, modified)
+
+    groups = reporter.analyze_matched_elements_access_count(result.matched)
+    assert list(groups) == list(range(len(result.matched)))
+    for match, totals in zip(result.matched, groups.values()):
+        assert (totals.baseline_read_counter, totals.baseline_write_counter, totals.baseline_read_size,
+                totals.baseline_write_size) == get_nodes_energy_for_access_metric(
+            reporter.get_nodes_from_baseline(match.nodes_baseline_id))
+        assert (totals.modified_read_counter, totals.modified_write_counter, totals.modified_read_size,
+                totals.modified_write_size) == get_nodes_energy_for_access_metric(
+            reporter.get_nodes_from_modified(match.nodes_modified_id))
+
+    aggregation = reporter.aggregate(result)
+    assert aggregation.category_totals("added_node_ids") == dict.fromkeys(aggregation.category_totals("matched"), 0)
+    removed_nodes = [baseline.get_node_by_id(node_id) for removal in result.removed_node_ids
+                     for node_id in removal.nodes_baseline_id]
+    assert aggregation.node_count("removed_node_ids", "baseline") == len(removed_nodes)
+    expected_analytics = {}
+    for node in removed_nodes:
+        analytics = expected_analytics.setdefault(node.type, {"count": 0, "total_size": 0})
+        analytics["count"] += 1
+        analytics["total_size"] += node.energy.size if node.energy else 0
+    assert aggregation.node_analytics("removed_node_ids", "baseline") == expected_analytics
+
+    # Index arrays and id lists produce the same report
+    graphs = (baseline.to_columnar(), modified.to_columnar())
+    categories = {}
+    for category in ("matched", "modified", "added_node_ids", "removed_node_ids"):
+        results = getattr(result, category)
+        categories[category] = SubgraphResultArrays.from_index_lists(
+            type(results[0]) if results else DeltaSubgraphResult, graphs[0].node_ids, graphs[1].node_ids,
+            [[graphs[0].node_index[node_id] for node_id in item.nodes_baseline_id] for item in results],
+            [[graphs[1].node_index[node_id] for node_id in item.nodes_modified_id] for item in results],
+            [item.similarity_score for item in results] if category == "modified" else None)
+    assert MatchingReporter(baseline, modified).report(IndexedMatchingResult(**categories)) == reporter.report(result)
+
+
+def test_ids_without_node_are_rejected():
+    baseline, modified = generate_runtime(1), generate_runtime(2)
+    result = MatchingResult(matched=[], modified=[], removed_node_ids=[],
+                            added_node_ids=[DeltaSubgraphResult(nodes_baseline_id=[], nodes_modified_id=["ghost"])])
+    with pytest.raises(ValueError, match="ghost"):
+        MatchingReporter(baseline, modified).report(result)
@@ -0,0 +1,82 @@
+import io
+import json
+import os
+
+from runtime_analyzer.application.reporter.code_link.code_link_reporter import CodeLinkReporter
+from runtime_analyzer.application.reporter.matching.matching_reporter import MatchingReporter
+from runtime_analyzer.application.reporter.report_sidecars import ReportSidecars
+from runtime_analyzer.domain.models import Runtime, MatchingResult, MatchSubgraphResult, DeltaSubgraphResult, \
+    CodeLinkContainer, CausalPair, CodeEvolution, CodeChangeSpan
+
+
+def generate_runtime(offset):
+    nodes = [{"id": f"n{i}", "edgeIds": [], "type": ("object", "array")[i % 2],
+              "energy": {"nodeId": f"n{i}", "readCounter": i % 3 + offset, "writeCounter": i % 2, "size": i * 10}}
+             for i in range(20)]
+    return Runtime.model_validate({"nodes": nodes, "edges": [], "stacks": []})
+
+
+def generate_groups(result_type, count):
+    return [result_type(nodes_baseline_id=[f"n{j}" for j in range(i, i + i % 3)],
+                        nodes_modified_id=[f"n{j}" for j in range(i, i + i % 4)]) for i in range(count)]
+
+
+def read_chunks(directory, table_id):
+    rows, chunk = [], 0
+    while os.path.exists(os.path.join(directory, f"{table_id}-{chunk}.js")):
+        with open(os.path.join(directory, f"{table_id}-{chunk}.js")) as f:
+            content = f.read()
+        assert content.startswith(f'reportChunkLoaded("{table_id}", {chunk}, ')
+        rows.append(json.loads(content[content.index("[["):content.rindex(")")]))
+        chunk += 1
+    return rows
+
+
+def test_matching_groups_are_split_into_chunks(tmp_path):
+    baseline, modified = generate_runtime(0), generate_runtime(1)
+    result = MatchingResult(matched=generate_groups(MatchSubgraphResult, 7), modified=[],
+                            added_node_ids=generate_groups(DeltaSubgraphResult, 2), removed_node_ids=[])
+    reporter = MatchingReporter(baseline, modified)
+
+    path = str(tmp_path / "report.html")
+    stream = io.StringIO()
+    reporter.write(stream, result, ReportSidecars(path, chunk_rows=3))
+    html = stream.getvalue()
+
+    # The summary comes first and is unchanged, empty categories get no table
+    assert html.startswith(reporter.report(result))
+    assert html.count("<details") == 2 and html.count("window.reportChunkLoaded") == 1
+    assert 'reportTable("detail-0", "report-data", 3, 7);' in html
+
+    chunks = read_chunks(str(tmp_path / "report-data"), "detail-0")
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    totals = reporter.analyze_matched_elements_access_count(result.matched)
+    for row in [row for chunk in chunks for row in chunk]:
+        group = totals[row[0]]
+        assert row[1:3] == [len(result.matched[row[0]].nodes_baseline_id),
+                            len(result.matched[row[0]].nodes_modified_id)]
+        assert row[3:] == [group.baseline_read_counter, group.modified_read_counter, group.baseline_write_counter,
+                           group.modified_write_counter, group.baseline_read_size, group.modified_read_size,
+                           group.baseline_write_size, group.modified_write_size]
+
+
+def test_causal_pairs_are_split_into_chunks(tmp_path):
+    baseline, modified = generate_runtime(0), generate_runtime(1)
+    evolution = CodeEvolution(fileId="app.js", modificationType="modify", modificationSource="modified",
+                              codeChangeSpan=CodeChangeSpan(lineStart=1, lineEnd=2, columnStart=0, columnEnd=9))
+    node_ids = ["n3", "n1", "n4", "n1", "n5"]
+    container = CodeLinkContainer(
+        regressions=[CausalPair(node_id=node_id, code_evolution=evolution, confidence="Direct")
+                     for node_id in node_ids],
+        improvements=[], unmappable_regressions=[], unmappable_improvements=[])
+    reporter = CodeLinkReporter(baseline, modified)
+
+    stream = io.StringIO()
+    reporter.write(stream, container, ReportSidecars(str(tmp_path / "report.html"), chunk_rows=2))
+    html = stream.getvalue()
+
+    summary = reporter.report(container)
+    assert html.startswith(summary[:-len("</body></html>")]) and html.endswith("</body></html>")
+    rows = [row for chunk in read_chunks(str(tmp_path / "report-data"), "detail-0") for row in chunk]
+    assert [row[0] for row in rows] == node_ids
+    assert rows[0] == ["n3", "array", "Direct", "modify", "L1:0 - L2:9", 1, 1, 30]
@@ -0,0 +1,57 @@
+import io
+import json
+
+import pytest
+
+from runtime_analyzer.application.helpers.result_writer import compression_of, open_input, open_output, \
+    read_ndjson, with_compression_extension, write_json, write_ndjson
+
+
+@pytest.fixture(scope="module")
+def comparison(small_comparison):
+    _, _, matching, links, time_tracking = small_comparison()
+    document = {"time_tracking": time_tracking, "matching": matching.model_dump(), "causal_links": links.model_dump()}
+    return time_tracking, matching, links, document
+
+
+def test_json_output_matches_json_dump(comparison):
+    time_tracking, matching, links, document = comparison
+    assert document["causal_links"]["regressions"] and document["causal_links"]["unmappable_improvements"]
+
+    pretty = io.StringIO()
+    write_json(pretty, time_tracking, matching, links, indent=2)
+    assert pretty.getvalue() == json.dumps(document, indent=2)
+
+    # The MatchingResult model is streamed the same way as the indexed result
+    compact = io.StringIO()
+    write_json(compact, time_tracking, matching.to_matching_result(), links)
+    assert compact.getvalue() == json.dumps(document, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("extension", ["ndjson", "ndjson.gz", "ndjson.zst"])
+def test_ndjson_output_round_trips(tmp_path, comparison, extension):
+    if extension.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    time_tracking, matching, links, document = comparison
+
+    path = str(tmp_path / f"result.{extension}")
+    with open_output(path) as f:
+        write_ndjson(f, time_tracking, matching, links)
+    with open_input(path) as f:
+        lines = f.readlines()
+        f.seek(0)
+        assert read_ndjson(f) == document
+
+    # One record per subgraph result, causal pair and unmappable node, after the time tracking
+    counts = [len(values) for section in ("matching", "causal_links") for values in document[section].values()]
+    assert len(lines) == 1 + sum(counts)
+    assert json.loads(lines[0])["record"] == "time_tracking"
+
+
+def test_compressed_paths_get_the_extension_of_their_compression():
+    assert with_compression_extension("m1.ndjson", None) == "m1.ndjson"
+    assert with_compression_extension("m1.ndjson", "gzip") == "m1.ndjson.gz"
+    assert with_compression_extension("m1.json", "zstd") == "m1.json.zst"
+    assert with_compression_extension("m1.json.gz", "gzip") == "m1.json.gz"
+    assert all(compression_of(with_compression_extension("m1.json", compression)) == compression
+               for compression in ("gzip", "zstd"))
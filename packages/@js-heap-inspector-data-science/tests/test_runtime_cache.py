@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import time
+
+from runtime_analyzer.application.services.runtime_cache.runtime_cache import RuntimeCacheService
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from synthetic_runtime import generate_heap  # noqa: E402
+
+
+def write_runtime(path, value):
+    with open(path, 'w') as f:
+        json.dump({
+            "nodes": [
+                {"id": "n1", "edgeIds": ["e1"], "type": "root", "root": True},
+                {"id": "n2", "edgeIds": [], "type": "string", "value": value, "traceId": "s1",
+                 "energy": {"nodeId": "n2", "readCounter": 1, "writeCounter": 2, "size": 16}}
+            ],
+            "edges": [{"id": "e1", "fromNodeId": "n1", "toNodeId": "n2", "name": "ref"}],
+            "stacks": [{"id": "s1", "frameIds": [], "functionName": "f", "scriptName": "app.js", "lineNumber": 1,
+                        "columnNumber": 1}]
+        }, f)
+
+
+def cache_entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, name)))
+
+
+def test_runtime_cache_hit_returns_same_runtime(tmp_path):
+    runtime_path = tmp_path / "runtime.json"
+    write_runtime(runtime_path, "ünïcode")
+    cache = RuntimeCacheService(str(tmp_path / "cache"))
+
+    parsed = cache.load(str(runtime_path))
+    cached = cache.load(str(runtime_path))
+
+    assert cached.model_dump() == parsed.model_dump()
+    assert len(cache_entries(cache.cache_dir)) == 1
+
+
+def test_runtime_cache_invalidates_changed_file(tmp_path):
+    runtime_path = tmp_path / "runtime.json"
+    cache = RuntimeCacheService(str(tmp_path / "cache"))
+
+    write_runtime(runtime_path, "old")
+    cache.load(str(runtime_path))
+    write_runtime(runtime_path, "new-value")
+    os.utime(runtime_path, ns=(0, 0))
+
+    assert cache.load(str(runtime_path)).get_node_by_id("n2").value == "new-value"
+
+
+def test_runtime_cache_evicts_least_recently_used(tmp_path):
+    cache = RuntimeCacheService(str(tmp_path / "cache"))
+    keys = []
+    for name in ("a", "b", "c"):
+        runtime_path = tmp_path / f"{name}.json"
+        write_runtime(runtime_path, name)
+        cache.load(str(runtime_path))
+        keys.append(cache.key_for(str(runtime_path)))
+        os.utime(os.path.join(cache.cache_dir, keys[-1], "manifest.json"), (len(keys), len(keys)))
+
+    # Touch "a" so that "b" is the least recently used entry
+    cache.get(keys[0])
+    entry_size = sum(os.path.getsize(os.path.join(cache.cache_dir, keys[0], f))
+                     for f in os.listdir(os.path.join(cache.cache_dir, keys[0])))
+    cache.max_size_bytes = entry_size * 2
+    cache.evict()
+
+    assert cache_entries(cache.cache_dir) == sorted([keys[0], keys[2]])
+
+
+def test_runtime_cache_hit_is_faster_than_parsing(tmp_path):
+    runtime_path = str(tmp_path / "runtime.json")
+    generate_heap(20000).write(runtime_path)
+    cache = RuntimeCacheService(str(tmp_path / "cache"))
+    cache.load(runtime_path)
+
+    start = time.perf_counter()
+    parsed = cache.parser.parse_file(runtime_path)
+    parse_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    cached = cache.load(runtime_path)
+    hit_seconds = time.perf_counter() - start
+
+    assert hit_seconds < parse_seconds
+    # Domain models are built from the columns on first access only
+    assert cached.model_fields_set == set()
+    assert cached.get_node_by_id(parsed.nodes[7].id) == parsed.nodes[7]
+    assert cached.model_fields_set == {"nodes"}
+    assert cached.nodes == parsed.nodes and cached.edges == parsed.edges and cached.stacks == parsed.stacks
@@ -71,7 +71,7 @@ def test_runtime_causal_link_e2e():
     )
     
     # Compare
-    matching_result, code_link = service.compare(
+    matching_result, code_link, _ = service.compare(
         baseline=baseline_runtime,
         code_evolution_baseline=ce_baseline,
         modified=modified_runtime,
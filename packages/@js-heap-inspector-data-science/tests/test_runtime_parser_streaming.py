@@ -0,0 +1,54 @@
+import io
+import json
+import pytest
+from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
+from runtime_analyzer.domain.exceptions import ParsingError
+
+RUNTIME_RAW = {
+    "meta": {"source": "v8", "version": 12.5},
+    "nodes": [
+        {"id": "n1", "edgeIds": ["e1"], "type": "root", "root": True},
+        {"id": "n2", "edgeIds": [], "type": "string", "value": "with \"quotes\", commas and ] brackets",
+         "traceId": "s1", "energy": {"nodeId": "n2", "readCounter": 3, "writeCounter": 1, "size": 64}}
+    ],
+    "edges": [
+        {"id": "e1", "fromNodeId": "n1", "toNodeId": "n2", "name": "ref"}
+    ],
+    "stacks": [
+        {"id": "s1", "frameIds": [], "functionName": "func", "scriptName": "app.js", "lineNumber": 10,
+         "columnNumber": 1}
+    ],
+    "trailing": 12345
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_parse_stream_matches_parse(chunk_size):
+    parser = RuntimeParserService()
+    raw = json.dumps(RUNTIME_RAW, indent=2)
+
+    expected = parser.parse(raw)
+    streamed = parser.parse_stream(io.StringIO(raw), chunk_size=chunk_size)
+
+    assert streamed.model_dump() == expected.model_dump()
+    assert streamed.get_node_by_id("n2").energy.size == 64
+
+
+def test_parse_stream_reports_peak_memory():
+    parser = RuntimeParserService()
+    parser.parse_stream(io.StringIO(json.dumps(RUNTIME_RAW)), track_memory=True)
+
+    assert parser.last_peak_memory is not None
+    assert parser.last_peak_memory > 0
+
+
+@pytest.mark.parametrize("raw", [
+    '{"nodes": [{"id": "n1", "edgeIds": [], "type": "root"}',
+    '{"nodes": [{"id": "n1"}], "edges": [], "stacks": []}',
+    '{"nodes": {}, "edges": [], "stacks": []}',
+    '{"edges": [], "stacks": []}',
+    '[]',
+])
+def test_parse_stream_rejects_invalid_input(raw):
+    with pytest.raises(ParsingError):
+        RuntimeParserService().parse_stream(io.StringIO(raw), chunk_size=4)
@@ -0,0 +1,51 @@
+import random
+from collections import deque
+
+from runtime_analyzer.application.services.code_link.code_change_index import CodeChangeIndex
+from runtime_analyzer.application.services.code_link.stack_trace_resolver import StackTraceResolver
+from runtime_analyzer.domain.models import CodeEvolution, CodeChangeSpan, Stack
+
+
+def generate_stacks(rng, count):
+    # Frames reference arbitrary stacks (cycles included), unknown ids and duplicate stack ids
+    return [Stack(id=f"s{rng.randrange(count)}" if rng.random() < 0.1 else f"s{i}",
+                  frameIds=[f"s{rng.randrange(count + 3)}" for _ in range(rng.randrange(4))],
+                  functionName="f", scriptName=rng.choice(["app.js", "util.js"]),
+                  lineNumber=rng.randrange(30), columnNumber=0)
+            for i in range(count)]
+
+
+def bfs_trace(trace_id, stack_map, change_index):
+    """Reference: breadth-first search over the frames of a trace, the first matching frame wins."""
+    queue = deque([trace_id])
+    visited = {trace_id}
+    while queue:
+        stack = stack_map.get(queue.popleft())
+        if stack is None:
+            continue
+        match = change_index.match(stack)
+        if match:
+            return match
+        for frame_id in stack.frameIds:
+            if frame_id in stack_map and frame_id not in visited:
+                visited.add(frame_id)
+                queue.append(frame_id)
+    return None
+
+
+def test_resolver_equals_bfs_per_trace():
+    rng = random.Random(11)
+    for _ in range(30):
+        stacks = generate_stacks(rng, rng.randrange(5, 60))
+        changes = [CodeEvolution(fileId=rng.choice(["app.js", "util.js"]), modificationType="modify",
+                                 modificationSource="modified",
+                                 codeChangeSpan=CodeChangeSpan(lineStart=line, lineEnd=line + rng.randrange(3),
+                                                               columnStart=0, columnEnd=0))
+                   for line in rng.sample(range(30), 3)]
+        change_index = CodeChangeIndex(changes)
+        resolver = StackTraceResolver(stacks)
+        resolver.add_context("regression", change_index)
+
+        stack_map = {s.id: s for s in stacks}
+        for trace_id in [f"s{i}" for i in range(len(stacks) + 3)]:
+            assert resolver.resolve(trace_id, "regression") is bfs_trace(trace_id, stack_map, change_index)
@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from runtime_analyzer.application.services.runtime_parser.runtime_parser import RuntimeParserService
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from run_benchmarks import compare_to_baselines, machine, machine_differences  # noqa: E402
+from synthetic_runtime import generate_heap, generate_runtime_pair  # noqa: E402
+
+
+def test_runtime_pair_is_deterministic(tmp_path):
+    paths = generate_runtime_pair(str(tmp_path / "first"), 3000, seed=4)
+    again = generate_runtime_pair(str(tmp_path / "second"), 3000, seed=4)
+    for name, path in paths.items():
+        with open(path, 'rb') as f, open(again[name], 'rb') as g:
+            assert f.read() == g.read()
+
+    parser = RuntimeParserService()
+    baseline, modified = parser.parse_file(paths["baseline"]), parser.parse_file(paths["modified"])
+    # 2% removed and 2% added by default
+    assert len(baseline.nodes) == 3000 and len(modified.nodes) == 3000 - 60 + 60
+    baseline_ids, modified_ids = {node.id for node in baseline.nodes}, {node.id for node in modified.nodes}
+    assert len(baseline_ids - modified_ids) == 60 and len(modified_ids - baseline_ids) == 60
+    modified_edge_ids = {edge.id for edge in modified.edges}
+    assert all(edge_id in modified_edge_ids for node in modified.nodes for edge_id in node.edgeIds)
+
+    with open(paths["code_evolution"]) as f:
+        hunks = json.load(f)
+    assert {hunk["modificationSource"] for hunk in hunks} == {"base", "modified"}
+    scripts = {stack.scriptName for stack in baseline.stacks}
+    assert all(hunk["fileId"] in scripts for hunk in hunks)
+
+
+def test_fan_in_follows_a_power_law():
+    heap = generate_heap(20000, seed=1)
+    in_degree = np.bincount(heap.edge_to, minlength=heap.node_count)
+    # A few hubs retain many nodes while the typical node has fewer retainers than the mean
+    assert in_degree.max() > 100 * in_degree.mean()
+    assert np.median(in_degree) < in_degree.mean()
+
+
+def test_regressions_exceed_tolerance_and_noise():
+    baselines = {"cases": {"primitive/1000": {"stages": {
+        "matching": {"seconds": 1.0, "peak_rss_mib": 100.0},
+        "code_link": {"seconds": 0.01, "peak_rss_mib": 100.0},
+    }}}}
+    result = {"strategy": "primitive", "nodes": 1000, "stages": {
+        "matching": {"seconds": 1.6, "peak_rss_mib": 200.0},
+        # Three times slower, but within the noise
+        "code_link": {"seconds": 0.03, "peak_rss_mib": 110.0},
+    }}
+    regressions = compare_to_baselines([result], baselines, time_tolerance=0.5, memory_tolerance=0.25)
+    assert regressions == ["primitive/1000 matching: 1.600s (baseline 1.000s)",
+                           "primitive/1000 matching: peak RSS 200 MiB (baseline 100 MiB)"]
+    assert compare_to_baselines([result], baselines, time_tolerance=1.0, memory_tolerance=1.5) == []
+
+
+def test_durations_are_only_compared_on_the_machine_of_the_baselines():
+    baselines = {"machine": {**machine(), "cpus": 1}, "cases": {"primitive/1000": {"stages": {
+        "matching": {"seconds": 1.0, "peak_rss_mib": 100.0},
+    }}}}
+    result = {"strategy": "primitive", "nodes": 1000, "stages": {
+        "matching": {"seconds": 4.0, "peak_rss_mib": 200.0},
+    }}
+
+    assert machine_differences(baselines, {**machine(), "cpus": 1}) == []
+    assert machine_differences(baselines, {**machine(), "cpus": 8}) == ["cpus 8 (baseline 1)"]
+    assert machine_differences({"cases": baselines["cases"]}, machine()) == ["machine of the baselines unknown"]
+    assert machine_differences({}, machine()) == []
+    # On another machine, only the peak RSS is compared
+    regressions = compare_to_baselines([result], baselines, time_tolerance=0.5, memory_tolerance=0.25,
+                                       compare_durations=False)
+    assert regressions == ["primitive/1000 matching: peak RSS 200 MiB (baseline 100 MiB)"]